@@ -0,0 +1,78 @@
+"""Layout of the binary AST format written by `ASTWriter` and read by
+`ASTReader`.
+
+    header:   MAGIC, FORMAT_VERSION byte, string count, root count
+    strings:  end offset of every string in the blob, then the UTF-8 blob
+    roots:    per top-level node the offsets of the first record of its
+              subtree and of its own record
+    records:  the nodes in post-order, one record each
+
+Counts, string ends and roots are little-endian 32-bit words so a reader
+can index them in place, record offsets are relative to the start of the
+records. A record is a tag byte
+followed by the node's fields. A child is referenced by the distance back
+from its parent's record to its own, children always come first so the
+distance is positive and 0 stands for a missing child. Tokens are a string
+index and their offsets (start + 1 and length) in the source, literals a
+string index.
+"""
+
+from core.ops import BinaryOp, UnaryOp
+
+
+MAGIC = b'ARAST'
+
+# Bump on any change to the layout or the tags below.
+FORMAT_VERSION = 2
+
+# Type code of the fixed-width words, see `array`.
+WORD = 'I'
+WORD_SIZE = 4
+
+TAG_INVALID_EXPR    = 0     # -
+TAG_ASSIGN_EXPR     = 1     # token, value
+TAG_CALL_EXPR       = 2     # callee, count, args
+TAG_VARIABLE_EXPR   = 3     # token
+TAG_BINARY_EXPR     = 4     # op, lhs, rhs
+TAG_UNARY_EXPR      = 5     # op, expr
+TAG_GROUP_EXPR      = 6     # expr
+TAG_LITERAL_EXPR    = 7     # string
+TAG_BLOCK_STMT      = 8     # count, elems
+TAG_EXPR_STMT       = 9     # expr
+TAG_IF_STMT         = 10    # cond, thenbranch, elsebranch
+TAG_WHILE_STMT      = 11    # cond, body
+TAG_RETURN_STMT     = 12    # expr, cond
+TAG_INVALID_DECL    = 13    # -
+TAG_LET_DECL        = 14    # token, initializer
+TAG_FUNC_DECL       = 15    # token, count, params, body
+TAG_CLASS_DECL      = 16    # token, count, inherited tokens, body
+
+# Operators by their enum value.
+BINARY_OPS: dict[int, BinaryOp] = {op.value: op for op in BinaryOp}
+UNARY_OPS: dict[int, UnaryOp] = {op.value: op for op in UnaryOp}
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    """Appends `value` as an unsigned LEB128 varint."""
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data: memoryview, pos: int) -> tuple[int, int]:
+    """Returns the varint at `pos` and the position after it."""
+    byte: int = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+
+    value: int = byte & 0x7f
+    shift: int = 7
+    pos += 1
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
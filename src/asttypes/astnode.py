@@ -1,6 +1,41 @@
 from abc import ABC
+from typing import Optional
+import zlib
 
 
 class ASTNode(ABC):
-    """ASTNode provides a base class for Stmt, Decl and Expr."""
-    pass
+    """ASTNode provides a base class for Stmt, Decl and Expr.
+
+    Nodes declare `__slots__` and have no per-instance `__dict__`, every
+    subclass has to list the attributes it adds. The `type` of a node is a
+    class attribute.
+
+    Every node carries a `struct_hash` computed bottom-up when it is built,
+    from its kind tag (see `astformat`), operator values, identifier and
+    literal text and the hashes of its children. Equal subtrees hash equal
+    in any run with the same Python version, so passes can key caches on
+    it, see `structural` and `MemoCache`.
+    """
+    __slots__ = ('struct_hash',)
+
+    struct_hash: int
+
+
+# Stable hashes of the texts seen so far, names and literals repeat a lot.
+# Dropped when it grows past TEXT_HASHES_LIMIT entries.
+TEXT_HASHES: dict[str, int] = {}
+TEXT_HASHES_LIMIT = 1 << 20
+
+def text_hash(text: Optional[str]) -> int:
+    """Hash of identifier or literal text that is stable across runs, unlike
+    `hash()` of a string.
+    """
+    if text == None:
+        return 0
+    value: Optional[int] = TEXT_HASHES.get(text)
+    if value == None:
+        value = zlib.crc32(text.encode('utf-8'))
+        if len(TEXT_HASHES) >= TEXT_HASHES_LIMIT:
+            TEXT_HASHES.clear()
+        TEXT_HASHES[text] = value
+    return value
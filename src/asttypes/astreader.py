@@ -0,0 +1,231 @@
+from __future__ import annotations
+from array import array
+import sys
+from typing import Optional
+
+from asttypes.astformat import (
+    BINARY_OPS,
+    FORMAT_VERSION,
+    MAGIC,
+    TAG_ASSIGN_EXPR,
+    TAG_BINARY_EXPR,
+    TAG_BLOCK_STMT,
+    TAG_CALL_EXPR,
+    TAG_CLASS_DECL,
+    TAG_EXPR_STMT,
+    TAG_FUNC_DECL,
+    TAG_GROUP_EXPR,
+    TAG_IF_STMT,
+    TAG_INVALID_DECL,
+    TAG_INVALID_EXPR,
+    TAG_LET_DECL,
+    TAG_LITERAL_EXPR,
+    TAG_RETURN_STMT,
+    TAG_UNARY_EXPR,
+    TAG_VARIABLE_EXPR,
+    TAG_WHILE_STMT,
+    UNARY_OPS,
+    WORD,
+    WORD_SIZE,
+    read_varint
+)
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.paramlist import ParamList
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, WhileStmt
+
+from core.tokenkind import TokenKind
+
+from lexer.token import Token
+
+
+class ASTReader:
+    """Decodes trees written by `ASTWriter`, on demand.
+
+    Opening a reader only reads the header, the string and top-level node
+    tables are indexed in place. Indexing materializes one top-level node
+    and its subtree and keeps it, strings are decoded the first time a node
+    uses them. The buffer is read in place through a `memoryview` and must
+    stay alive as long as the reader.
+
+    Laziness is per top-level node: indexing decodes its whole subtree at
+    once, e.g. a function with all of its body, nested nodes are not
+    decoded on demand.
+    """
+
+    def __init__(self, data: bytes | bytearray | memoryview) -> None:
+        self.data: memoryview = memoryview(data)
+        if bytes(self.data[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a serialized AST.")
+        if self.data[len(MAGIC)] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported AST format version {self.data[len(MAGIC)]}.")
+        pos: int = len(MAGIC) + 1
+
+        strings, roots = self.words(pos, 2)
+        pos += 2 * WORD_SIZE
+        # End offsets of the strings in the blob, and per root the offsets of
+        # its first and its own record.
+        self.string_ends = self.words(pos, strings)
+        pos += strings * WORD_SIZE
+        self.roots = self.words(pos, 2 * roots)
+        pos += 2 * roots * WORD_SIZE
+
+        self.blob: memoryview = self.data[pos:pos + (self.string_ends[-1] if strings else 0)]
+        self.records: memoryview = self.data[pos + len(self.blob):]
+        self.strings: list[Optional[str]] = [None] * strings
+        self.nodes: list[Optional[ASTNode]] = [None] * roots
+
+    def words(self, pos: int, count: int) -> memoryview | array[int]:
+        """Returns the `count` words at `pos`, in place where the byte order
+        allows it.
+        """
+        data: memoryview = self.data[pos:pos + count * WORD_SIZE]
+        if sys.byteorder == 'little':
+            return data.cast(WORD)
+        words: array[int] = array(WORD, data)
+        words.byteswap()
+        return words
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __getitem__(self, index: int) -> ASTNode:
+        node: Optional[ASTNode] = self.nodes[index]
+        if node == None:
+            node = self.read_tree(self.roots[2 * index], self.roots[2 * index + 1])
+            self.nodes[index] = node
+        return node
+
+    def read_all(self) -> list[ASTNode]:
+        return [self[index] for index in range(len(self))]
+
+    def string(self, index: int) -> str:
+        string: Optional[str] = self.strings[index]
+        if string == None:
+            start: int = self.string_ends[index - 1] if index > 0 else 0
+            string = str(self.blob[start:self.string_ends[index]], 'utf-8')
+            self.strings[index] = string
+        return string
+
+    def read_tree(self, first: int, root: int) -> ASTNode:
+        """Materializes the subtree whose records span `first` up to the
+        record of its root at `root`.
+
+        The records of a subtree are contiguous and children come before
+        their parents, so they are decoded front to back without
+        recursing.
+        """
+        records: memoryview = self.records
+        nodes: dict[int, ASTNode] = {}
+        pos: int = first
+
+        offset: int = 0
+
+        def ref() -> Optional[ASTNode]:
+            """Resolves the child reference at `pos`."""
+            nonlocal pos
+            distance: int = records[pos]
+            if distance < 0x80:
+                pos += 1
+            else:
+                distance, pos = read_varint(records, pos)
+            return nodes.pop(offset - distance) if distance != 0 else None
+
+        while pos <= root:
+            offset = pos
+            tag: int = records[pos]
+            pos += 1
+            node: ASTNode
+
+            if tag == TAG_BINARY_EXPR:
+                op = BINARY_OPS[records[pos]]
+                pos += 1
+                lhs = ref()
+                node = BinaryExpr(lhs, op, ref()) # type: ignore
+            elif tag == TAG_VARIABLE_EXPR:
+                node = VariableExpr(self.read_token(pos))
+                pos = self.pos
+            elif tag == TAG_LITERAL_EXPR:
+                index, pos = read_varint(records, pos)
+                node = LiteralExpr(self.string(index))
+            elif tag == TAG_CALL_EXPR:
+                callee = ref()
+                count, pos = read_varint(records, pos)
+                node = CallExpr(callee, [ref() for _ in range(count)]) # type: ignore
+            elif tag == TAG_UNARY_EXPR:
+                op = UNARY_OPS[records[pos]]
+                pos += 1
+                node = UnaryExpr(op, ref()) # type: ignore
+            elif tag == TAG_GROUP_EXPR:
+                node = GroupExpr(ref()) # type: ignore
+            elif tag == TAG_ASSIGN_EXPR:
+                name: Token = self.read_token(pos)
+                pos = self.pos
+                node = AssignExpr(name, ref()) # type: ignore
+            elif tag == TAG_INVALID_EXPR:
+                node = InvalidExpr()
+            elif tag == TAG_BLOCK_STMT:
+                count, pos = read_varint(records, pos)
+                node = BlockStmt([ref() for _ in range(count)]) # type: ignore
+            elif tag == TAG_EXPR_STMT:
+                node = ExprStmt(ref()) # type: ignore
+            elif tag == TAG_IF_STMT:
+                cond = ref()
+                thenbranch = ref()
+                node = IfStmt(cond, thenbranch, ref()) # type: ignore
+            elif tag == TAG_WHILE_STMT:
+                cond = ref()
+                node = WhileStmt(cond, ref()) # type: ignore
+            elif tag == TAG_RETURN_STMT:
+                expr = ref()
+                node = ReturnStmt(expr, ref()) # type: ignore
+            elif tag == TAG_LET_DECL:
+                name = self.read_token(pos)
+                pos = self.pos
+                node = LetDecl(name, ref()) # type: ignore
+            elif tag == TAG_FUNC_DECL:
+                name = self.read_token(pos)
+                pos = self.pos
+                count, pos = read_varint(records, pos)
+                params: ParamList = ParamList([])
+                for _ in range(count):
+                    params.append(ref()) # type: ignore
+                node = FuncDecl(name, params, ref()) # type: ignore
+            elif tag == TAG_CLASS_DECL:
+                name = self.read_token(pos)
+                pos = self.pos
+                count, pos = read_varint(records, pos)
+                inherited: list[Token] = []
+                for _ in range(count):
+                    inherited.append(self.read_token(pos))
+                    pos = self.pos
+                node = ClassDecl(name, inherited, ref()) # type: ignore
+            elif tag == TAG_INVALID_DECL:
+                node = InvalidDecl()
+            else:
+                raise ValueError(f"Unknown AST record tag {tag} at {offset}.")
+
+            nodes[offset] = node
+
+        return nodes[root]
+
+    def read_token(self, pos: int) -> Token:
+        """Decodes the identifier token at `pos`, leaving the position after
+        it in `self.pos`.
+        """
+        index, pos = read_varint(self.records, pos)
+        start, pos = read_varint(self.records, pos)
+        length, self.pos = read_varint(self.records, pos)
+        start -= 1
+        return Token(TokenKind.Identifier, self.string(index), start,
+            start + length if start >= 0 else -1)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+from array import array
+import sys
+from typing import Optional
+
+from asttypes.astformat import (
+    FORMAT_VERSION,
+    MAGIC,
+    TAG_ASSIGN_EXPR,
+    TAG_BINARY_EXPR,
+    TAG_BLOCK_STMT,
+    TAG_CALL_EXPR,
+    TAG_CLASS_DECL,
+    TAG_EXPR_STMT,
+    TAG_FUNC_DECL,
+    TAG_GROUP_EXPR,
+    TAG_IF_STMT,
+    TAG_INVALID_DECL,
+    TAG_INVALID_EXPR,
+    TAG_LET_DECL,
+    TAG_LITERAL_EXPR,
+    TAG_RETURN_STMT,
+    TAG_UNARY_EXPR,
+    TAG_VARIABLE_EXPR,
+    TAG_WHILE_STMT,
+    WORD,
+    write_varint
+)
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, WhileStmt
+
+from lexer.token import Token
+
+
+class ASTWriter:
+    """Encodes trees into the binary format described in `astformat`.
+
+    Nodes are written in post-order from an explicit stack, so the depth of
+    a tree is not limited by the recursion limit. Identifier and literal
+    text is written once into a shared string table. Identifier ids of the
+    lexer's `Interner` are not kept.
+    """
+
+    def __init__(self) -> None:
+        self.strings: dict[str, int] = {}
+        self.records: bytearray = bytearray()
+        # Record offset of every node written so far, by id.
+        self.offsets: dict[int, int] = {}
+
+    def write(self, nodes: list[ASTNode]) -> bytes:
+        """Returns the encoding of the top-level `nodes`."""
+        roots: list[tuple[int, int]] = []
+        for node in nodes:
+            first: int = len(self.records)
+            roots.append((first, self.write_tree(node)))
+
+        blob: bytearray = bytearray()
+        ends: array[int] = array(WORD)
+        for string in self.strings:
+            blob += string.encode('utf-8')
+            ends.append(len(blob))
+
+        words: array[int] = array(WORD, [len(self.strings), len(roots)])
+        words.extend(ends)
+        words.extend(offset for pair in roots for offset in pair)
+        if sys.byteorder == 'big':
+            words.byteswap()
+
+        out: bytearray = bytearray(MAGIC)
+        out.append(FORMAT_VERSION)
+        out += words.tobytes()
+        out += blob
+        out += self.records
+        return bytes(out)
+
+    def write_tree(self, root: ASTNode) -> int:
+        """Writes `root` and everything below it, returns its offset."""
+        # Visiting parents first and the last child first gives the reverse
+        # of the post-order.
+        order: list[ASTNode] = []
+        stack: list[Optional[ASTNode]] = [root]
+        while stack:
+            node = stack.pop()
+            if node != None:
+                order.append(node)
+                stack.extend(children(node))
+
+        offsets: dict[int, int] = self.offsets
+        for node in reversed(order):
+            offsets[id(node)] = self.write_node(node)
+        return offsets[id(root)]
+
+    def write_node(self, node: ASTNode) -> int:
+        out: bytearray = self.records
+        offset: int = len(out)
+        kind: type = type(node)
+        ref = lambda child: write_varint(out, 0 if child == None else offset - self.offsets[id(child)])
+
+        if kind is BinaryExpr:
+            out.append(TAG_BINARY_EXPR)
+            out.append(node.op.value)
+            ref(node.lhs)
+            ref(node.rhs)
+        elif kind is VariableExpr:
+            out.append(TAG_VARIABLE_EXPR)
+            self.write_token(node.name)
+        elif kind is LiteralExpr:
+            out.append(TAG_LITERAL_EXPR)
+            write_varint(out, self.string(node.literal))
+        elif kind is CallExpr:
+            out.append(TAG_CALL_EXPR)
+            ref(node.callee)
+            write_varint(out, len(node.args))
+            for arg in node.args:
+                ref(arg)
+        elif kind is UnaryExpr:
+            out.append(TAG_UNARY_EXPR)
+            out.append(node.op.value)
+            ref(node.expr)
+        elif kind is GroupExpr:
+            out.append(TAG_GROUP_EXPR)
+            ref(node.expr)
+        elif kind is AssignExpr:
+            out.append(TAG_ASSIGN_EXPR)
+            self.write_token(node.name)
+            ref(node.value)
+        elif kind is InvalidExpr:
+            out.append(TAG_INVALID_EXPR)
+        elif kind is BlockStmt:
+            out.append(TAG_BLOCK_STMT)
+            write_varint(out, len(node.elems))
+            for elem in node.elems:
+                ref(elem)
+        elif kind is ExprStmt:
+            out.append(TAG_EXPR_STMT)
+            ref(node.expr)
+        elif kind is IfStmt:
+            out.append(TAG_IF_STMT)
+            ref(node.cond)
+            ref(node.thenbranch)
+            ref(node.elsebranch)
+        elif kind is WhileStmt:
+            out.append(TAG_WHILE_STMT)
+            ref(node.cond)
+            ref(node.body)
+        elif kind is ReturnStmt:
+            out.append(TAG_RETURN_STMT)
+            ref(node.expr)
+            ref(node.cond)
+        elif kind is LetDecl:
+            out.append(TAG_LET_DECL)
+            self.write_token(node.name)
+            ref(node.initializer)
+        elif kind is FuncDecl:
+            out.append(TAG_FUNC_DECL)
+            self.write_token(node.name)
+            write_varint(out, len(node.params))
+            for param in node.params:
+                ref(param)
+            ref(node.body)
+        elif kind is ClassDecl:
+            out.append(TAG_CLASS_DECL)
+            self.write_token(node.name)
+            write_varint(out, len(node.inherited))
+            for base in node.inherited:
+                self.write_token(base)
+            ref(node.body)
+        elif kind is InvalidDecl:
+            out.append(TAG_INVALID_DECL)
+        else:
+            raise TypeError(f"Cannot serialize {type(node).__name__}.")
+        return offset
+
+    def write_token(self, token: Token) -> None:
+        out: bytearray = self.records
+        write_varint(out, self.string(token.get_identifier_data() or ''))
+        write_varint(out, token.start + 1)
+        write_varint(out, token.end - token.start if token.start >= 0 else 0)
+
+    def string(self, string: str) -> int:
+        index: Optional[int] = self.strings.get(string)
+        if index == None:
+            index = len(self.strings)
+            self.strings[string] = index
+        return index
+
+
+def children(node: ASTNode) -> list[Optional[ASTNode]]:
+    """Returns the child nodes of `node` in the order they are written."""
+    # Compare exact types, isinstance() on the ABC based nodes is slow.
+    kind: type = type(node)
+    if kind is BinaryExpr:
+        return [node.lhs, node.rhs]
+    if kind is CallExpr:
+        return [node.callee, *node.args]
+    if kind is UnaryExpr or kind is GroupExpr or kind is ExprStmt:
+        return [node.expr]
+    if kind is AssignExpr:
+        return [node.value]
+    if kind is BlockStmt:
+        return list(node.elems)
+    if kind is IfStmt:
+        return [node.cond, node.thenbranch, node.elsebranch]
+    if kind is WhileStmt:
+        return [node.cond, node.body]
+    if kind is ReturnStmt:
+        return [node.expr, node.cond]
+    if kind is LetDecl:
+        return [node.initializer]
+    if kind is FuncDecl:
+        return [*node.params, node.body]
+    if kind is ClassDecl:
+        return [node.body]
+    return []
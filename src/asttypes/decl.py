@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
 import enum
-from typing import TypeVar
+from typing import Callable, Optional, TypeVar
 
-from asttypes.astnode import ASTNode
+from asttypes.astformat import TAG_CLASS_DECL, TAG_FUNC_DECL, TAG_INVALID_DECL, TAG_LET_DECL
+from asttypes.astnode import ASTNode, text_hash
 from asttypes.declvisitor import DeclVisitor
 from asttypes.expr import Expr
 from asttypes.paramlist import ParamList
@@ -22,8 +23,9 @@ class Decl(ASTNode, ABC):
         Func    = enum.auto()
         Class   = enum.auto()
 
-    def __init__(self, type: Type) -> None:
-       self.type = type
+    __slots__ = ()
+
+    type: Type
 
     @abstractmethod
     def accept(self, visitor: DeclVisitor[T]) -> T:
@@ -33,8 +35,11 @@ class Decl(ASTNode, ABC):
 class InvalidDecl(Decl):
     """Erroneous declaration."""
 
+    __slots__ = ()
+    type = Decl.Type.Invalid
+
     def __init__(self) -> None:
-        super().__init__(Decl.Type.Invalid)
+        self.struct_hash = hash((TAG_INVALID_DECL,))
 
     def accept(self, visitor: DeclVisitor[T]) -> T:
         raise Exception("Visiting invalid declaration.")
@@ -43,44 +48,165 @@ class InvalidDecl(Decl):
 class LetDecl(Decl):
     """A 'let' variable declaration."""
 
+    __slots__ = ('name', 'name_id', 'initializer')
+    type = Decl.Type.Let
+
     def __init__(self, name: Token, initializer: Expr | None) -> None:
-        super().__init__(Decl.Type.Let)
         self.name = name
+        self.name_id = name.ident_id
         self.initializer = initializer
+        self.struct_hash = hash((TAG_LET_DECL, text_hash(name.get_identifier_data()),
+            initializer.struct_hash if initializer != None else 0))
 
     def accept(self, visitor: DeclVisitor[T]) -> T:
         return visitor.visit_let(self)
 
 
-class AbstractFuncDecl(Decl, ABC):
+class BodyDecl(Decl, ABC):
+    """Base class for declarations with a block body.
+
+    A lazily parsing `Parser` skips bodies and instead of the `BlockStmt`
+    passes a `body_loader` that parses it, on first access to `body`.
+    `body_range` is then the token range of the body between its braces.
+
+    The `struct_hash` of a skipped body is computed on first access, which
+    parses the body.
+    """
+
+    __slots__ = ('__body', '__body_loader', '__struct_hash', 'body_range')
+
+    def __init__(
+        self,
+        body: Optional[BlockStmt],
+        body_loader: Optional[Callable[[], BlockStmt]] = None,
+        body_range: Optional[tuple[int, int]] = None
+    ) -> None:
+        self.__body = body
+        self.__body_loader = body_loader
+        self.__struct_hash: Optional[int] = None
+        self.body_range = body_range
+
+    @property
+    def body(self) -> BlockStmt:
+        if self.__body_loader != None:
+            self.__body = self.__body_loader()
+            self.__body_loader = None
+        return self.__body # type: ignore
+
+    @body.setter
+    def body(self, body: BlockStmt) -> None:
+        self.__body = body
+        self.__body_loader = None
+        self.__struct_hash = None
+
+    def is_body_loaded(self) -> bool:
+        return self.__body_loader == None
+
+    @property
+    def struct_hash(self) -> int: # type: ignore
+        if self.__struct_hash == None:
+            return self.compute_hash()
+        return self.__struct_hash
+
+    @struct_hash.setter
+    def struct_hash(self, value: int) -> None:
+        # Used when unpickling.
+        self.__struct_hash = value
+
+    def compute_hash(self) -> int:
+        self.__struct_hash = hash((self.header_hash(), self.body.struct_hash))
+        return self.__struct_hash
+
+    @abstractmethod
+    def header_hash(self) -> int:
+        """Hash of everything but the body."""
+        raise NotImplementedError()
+
+
+class AbstractFuncDecl(BodyDecl, ABC):
     """Base class for function-like declarations."""
 
-    def __init__(self, params: ParamList, body: BlockStmt) -> None:
-        super().__init__(Decl.Type.Func)
+    __slots__ = ('params',)
+    type = Decl.Type.Func
+
+    def __init__(
+        self,
+        params: ParamList,
+        body: Optional[BlockStmt],
+        body_loader: Optional[Callable[[], BlockStmt]] = None,
+        body_range: Optional[tuple[int, int]] = None
+    ) -> None:
+        super().__init__(body, body_loader, body_range)
         self.params = params
-        self.body = body
 
 
 class FuncDecl(AbstractFuncDecl):
     """A 'func' declaration."""
 
+    __slots__ = ('name', 'name_id')
+
     def __init__(
         self,
         name: Token,
         params: ParamList,
-        body: BlockStmt
+        body: Optional[BlockStmt],
+        body_loader: Optional[Callable[[], BlockStmt]] = None,
+        body_range: Optional[tuple[int, int]] = None
     ) -> None:
-        super().__init__(params, body)
+        """Creates a function declaration.
+
+        Args:
+            name: Name of the function.
+            params: Parameters.
+            body: Function body, None if it is loaded by `body_loader`.
+            body_loader: Parses the body on first access, see `BodyDecl`.
+            body_range: Token range of a lazily parsed body.
+        """
+        super().__init__(params, body, body_loader, body_range)
         self.name = name
+        self.name_id = name.ident_id
+        if body != None:
+            self.compute_hash()
+
+    def header_hash(self) -> int:
+        return hash((TAG_FUNC_DECL, text_hash(self.name.get_identifier_data()),
+            *[param.struct_hash for param in self.params]))
 
     def accept(self, visitor: DeclVisitor[T]) -> T:
         return visitor.visit_func(self)
 
 
-class ClassDecl(Decl):
-    def __init__(self, name: Token, inherited: list[Token]) -> None:
-        super().__init__(Decl.Type.Class)
+class ClassDecl(BodyDecl):
+    __slots__ = ('name', 'name_id', 'inherited')
+    type = Decl.Type.Class
+
+    def __init__(
+        self,
+        name: Token,
+        inherited: list[Token],
+        body: Optional[BlockStmt],
+        body_loader: Optional[Callable[[], BlockStmt]] = None,
+        body_range: Optional[tuple[int, int]] = None
+    ) -> None:
+        """Creates a class declaration.
+
+        Args:
+            name: Name of the class.
+            inherited: Names of the base classes.
+            body: Class body, None if it is loaded by `body_loader`.
+            body_loader: Parses the body on first access, see `BodyDecl`.
+            body_range: Token range of a lazily parsed body.
+        """
+        super().__init__(body, body_loader, body_range)
         self.name = name
+        self.name_id = name.ident_id
+        self.inherited = inherited
+        if body != None:
+            self.compute_hash()
+
+    def header_hash(self) -> int:
+        return hash((TAG_CLASS_DECL, text_hash(self.name.get_identifier_data()),
+            *[text_hash(base.get_identifier_data()) for base in self.inherited]))
 
     def accept(self, visitor: DeclVisitor[T]) -> T:
-        return super().accept(visitor)
+        return visitor.visit_class(self)
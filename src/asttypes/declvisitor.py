@@ -1,8 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import TYPE_CHECKING, Generic, TypeVar
 
-from asttypes import decl
+if TYPE_CHECKING:
+    from asttypes import decl
 
 
 T = TypeVar('T')
@@ -15,3 +16,7 @@ class DeclVisitor(ABC, Generic[T]):
     @abstractmethod
     def visit_func(self, func_decl: decl.FuncDecl) -> T:
         raise NotImplementedError()
+
+    @abstractmethod
+    def visit_class(self, class_decl: decl.ClassDecl) -> T:
+        raise NotImplementedError()
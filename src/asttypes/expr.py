@@ -1,12 +1,26 @@
 from __future__ import annotations
-from abc import ABC
+from abc import ABC, abstractmethod
 import enum
-
-from asttypes.astnode import ASTNode
+from typing import TypeVar
+
+from asttypes.astformat import (
+    TAG_ASSIGN_EXPR,
+    TAG_BINARY_EXPR,
+    TAG_CALL_EXPR,
+    TAG_GROUP_EXPR,
+    TAG_INVALID_EXPR,
+    TAG_LITERAL_EXPR,
+    TAG_UNARY_EXPR,
+    TAG_VARIABLE_EXPR
+)
+from asttypes.astnode import ASTNode, text_hash
+from asttypes.exprvisitor import ExprVisitor
 from core.ops import BinaryOp, UnaryOp
 from lexer.token import Token
 
 
+T = TypeVar('T')
+
 class Expr(ASTNode, ABC):
     """Base class for all types of expressions."""
 
@@ -20,57 +34,119 @@ class Expr(ASTNode, ABC):
         Group       = enum.auto()
         Variable    = enum.auto()
 
-    def __init__(self, type: Type) -> None:
-        self.type = type
+    __slots__ = ()
+
+    type: Type
+
+    @abstractmethod
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        raise NotImplementedError()
 
 
 class InvalidExpr(Expr):
+    __slots__ = ()
+    type = Expr.Type.Invalid
+
     def __init__(self) -> None:
-        super().__init__(Expr.Type.Invalid)
+        self.struct_hash = hash((TAG_INVALID_EXPR,))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        raise Exception("Visiting invalid expression.")
 
 
 class AssignExpr(Expr):
+    __slots__ = ('name', 'name_id', 'value')
+    type = Expr.Type.Assign
+
     def __init__(self, name: Token, value: Expr) -> None:
-        super().__init__(Expr.Type.Assign)
         self.name = name
+        self.name_id = name.ident_id
         self.value = value
+        self.struct_hash = hash((TAG_ASSIGN_EXPR, text_hash(name.get_identifier_data()),
+            value.struct_hash))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visit_assign_expr(self)
 
 
 class CallExpr(Expr):
+    __slots__ = ('callee', 'args')
+    type = Expr.Type.Call
+
     def __init__(self, callee: Expr, args: list[Expr]) -> None:
-        super().__init__(Expr.Type.Call)
         self.callee = callee
         self.args = args
+        self.struct_hash = hash((TAG_CALL_EXPR, callee.struct_hash,
+            *[arg.struct_hash for arg in args]))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visit_call_expr(self)
 
 
 class VariableExpr(Expr):
+    __slots__ = ('name', 'name_id')
+    type = Expr.Type.Variable
+
     def __init__(self, name: Token) -> None:
-        super().__init__(Expr.Type.Variable)
         self.name = name
+        self.name_id = name.ident_id
+        self.struct_hash = hash((TAG_VARIABLE_EXPR, text_hash(name.get_identifier_data())))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visit_variable_expr(self)
 
 
 class BinaryExpr(Expr):
+    __slots__ = ('lhs', 'op', 'rhs')
+    type = Expr.Type.Binary
+
     def __init__(self, lhs: Expr, op: BinaryOp, rhs: Expr) -> None:
-        super().__init__(Expr.Type.Binary)
         self.lhs = lhs
         self.op = op
         self.rhs = rhs
+        self.struct_hash = hash((TAG_BINARY_EXPR, op.value, lhs.struct_hash, rhs.struct_hash))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visit_binary_expr(self)
 
 
 class UnaryExpr(Expr):
+    __slots__ = ('op', 'expr')
+    type = Expr.Type.Unary
+
     def __init__(self, op: UnaryOp, expr: Expr) -> None:
-        super().__init__(Expr.Type.Unary)
         self.op = op
         self.expr = expr
+        self.struct_hash = hash((TAG_UNARY_EXPR, op.value, expr.struct_hash))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visit_unary_expr(self)
 
 
 class GroupExpr(Expr):
+    __slots__ = ('expr',)
+    type = Expr.Type.Group
+
     def __init__(self, expr: Expr) -> None:
-        super().__init__(Expr.Type.Group)
         self.expr = expr
+        self.struct_hash = hash((TAG_GROUP_EXPR, expr.struct_hash))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visit_group_expr(self)
 
 
 class LiteralExpr(Expr):
+    """A number literal. `value` is its integer value, converted once here
+    rather than by every consumer.
+    """
+
+    __slots__ = ('literal', 'value')
+    type = Expr.Type.Literal
+
     def __init__(self, literal: str) -> None:
-        super().__init__(Expr.Type.Literal)
         self.literal = literal
+        self.value = int(literal)
+        self.struct_hash = hash((TAG_LITERAL_EXPR, text_hash(literal)))
+
+    def accept(self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visit_literal_expr(self)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from asttypes import expr
+
+
+T = TypeVar('T')
+
+class ExprVisitor(ABC, Generic[T]):
+    @abstractmethod
+    def visit_assign_expr(self, assign_expr: expr.AssignExpr) -> T:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def visit_call_expr(self, call_expr: expr.CallExpr) -> T:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def visit_unary_expr(self, unary_expr: expr.UnaryExpr) -> T:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def visit_binary_expr(self, binary_expr: expr.BinaryExpr) -> T:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def visit_literal_expr(self, literal_expr: expr.LiteralExpr) -> T:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def visit_group_expr(self, group_expr: expr.GroupExpr) -> T:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def visit_variable_expr(self, variable_expr: expr.VariableExpr) -> T:
+        raise NotImplementedError()
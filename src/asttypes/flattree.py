@@ -0,0 +1,448 @@
+from __future__ import annotations
+from array import array
+from typing import Optional
+
+from asttypes.astformat import (
+    BINARY_OPS,
+    TAG_ASSIGN_EXPR,
+    TAG_BINARY_EXPR,
+    TAG_BLOCK_STMT,
+    TAG_CALL_EXPR,
+    TAG_CLASS_DECL,
+    TAG_EXPR_STMT,
+    TAG_FUNC_DECL,
+    TAG_GROUP_EXPR,
+    TAG_IF_STMT,
+    TAG_INVALID_DECL,
+    TAG_INVALID_EXPR,
+    TAG_LET_DECL,
+    TAG_LITERAL_EXPR,
+    TAG_RETURN_STMT,
+    TAG_UNARY_EXPR,
+    TAG_VARIABLE_EXPR,
+    TAG_WHILE_STMT,
+    UNARY_OPS
+)
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.paramlist import ParamList
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, WhileStmt
+
+from core.tokenkind import TokenKind
+
+from lexer.token import Token
+
+
+# Node kinds are the record tags of the binary format, plus one for a bare
+# name such as a base class of a `ClassDecl`.
+KIND_NAME = 17
+
+# Kind of every node class.
+KINDS: dict[type, int] = {
+    InvalidExpr:    TAG_INVALID_EXPR,
+    AssignExpr:     TAG_ASSIGN_EXPR,
+    CallExpr:       TAG_CALL_EXPR,
+    VariableExpr:   TAG_VARIABLE_EXPR,
+    BinaryExpr:     TAG_BINARY_EXPR,
+    UnaryExpr:      TAG_UNARY_EXPR,
+    GroupExpr:      TAG_GROUP_EXPR,
+    LiteralExpr:    TAG_LITERAL_EXPR,
+    BlockStmt:      TAG_BLOCK_STMT,
+    ExprStmt:       TAG_EXPR_STMT,
+    IfStmt:         TAG_IF_STMT,
+    WhileStmt:      TAG_WHILE_STMT,
+    ReturnStmt:     TAG_RETURN_STMT,
+    InvalidDecl:    TAG_INVALID_DECL,
+    LetDecl:        TAG_LET_DECL,
+    FuncDecl:       TAG_FUNC_DECL,
+    ClassDecl:      TAG_CLASS_DECL,
+}
+
+CLASSES: dict[int, type] = {kind: cls for cls, kind in KINDS.items()}
+
+# Child fields of every kind in order. '*' marks the one field holding a
+# list, '?' a field that may be missing; which optional fields are present
+# is kept as bits of the node's `ops` entry, in order.
+LAYOUTS: dict[int, tuple[str, ...]] = {
+    TAG_ASSIGN_EXPR:    ('value',),
+    TAG_CALL_EXPR:      ('callee', '*args'),
+    TAG_BINARY_EXPR:    ('lhs', 'rhs'),
+    TAG_UNARY_EXPR:     ('expr',),
+    TAG_GROUP_EXPR:     ('expr',),
+    TAG_BLOCK_STMT:     ('*elems',),
+    TAG_EXPR_STMT:      ('expr',),
+    TAG_IF_STMT:        ('cond', 'thenbranch', '?elsebranch'),
+    TAG_WHILE_STMT:     ('cond', 'body'),
+    TAG_RETURN_STMT:    ('?expr', '?cond'),
+    TAG_LET_DECL:       ('?initializer',),
+    TAG_FUNC_DECL:      ('*params', 'body'),
+    TAG_CLASS_DECL:     ('*inherited', 'body'),
+}
+
+# Field name to (kind, position in its layout), to answer attribute
+# lookups on views.
+FIELDS: dict[tuple[int, str], int] = {
+    (kind, field.lstrip('*?')): position
+    for kind, layout in LAYOUTS.items()
+    for position, field in enumerate(layout)
+}
+
+NONE = -1
+
+
+class FlatTree:
+    """Arena holding whole programs as parallel typed arrays.
+
+    Node `i` is described by `kinds[i]`, `ops[i]` (operator value, or the
+    bits of present optional fields), `first_child[i]`, `next_sibling[i]`
+    and `token[i]`, an index into the token table or -1. Nodes are stored
+    in pre-order, so a node's descendants follow it and come before any
+    later sibling. Tokens are stored as their text, an index into
+    `strings`, and their offsets; a literal is a token without offsets.
+
+    There is one Python object per array instead of one per node, so the
+    collector has next to nothing to traverse and pickling a tree copies a
+    few buffers. `view()` gives field access like the object AST,
+    `from_nodes()` and `to_nodes()` convert between both.
+    """
+
+    def __init__(self) -> None:
+        self.kinds: array[int] = array('B')
+        self.ops: array[int] = array('B')
+        self.first_child: array[int] = array('i')
+        self.next_sibling: array[int] = array('i')
+        self.token: array[int] = array('i')
+
+        self.token_text: array[int] = array('i')
+        self.token_start: array[int] = array('i')
+        self.token_end: array[int] = array('i')
+        self.token_ident: array[int] = array('i')
+        self.strings: list[str] = []
+        self.string_ids: dict[str, int] = {}
+
+        # Top-level nodes in program order.
+        self.roots: array[int] = array('i')
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def nbytes(self) -> int:
+        """Size of the arrays in bytes, not counting the strings."""
+        arrays = (self.kinds, self.ops, self.first_child, self.next_sibling,
+                  self.token, self.token_text, self.token_start, self.token_end,
+                  self.token_ident, self.roots)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def __getstate__(self) -> dict:
+        # The string index is rebuilt on demand, leave it out.
+        state = {name: getattr(self, name) for name in vars(self) if name != 'string_ids'}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        vars(self).update(state)
+        self.string_ids = {string: index for index, string in enumerate(self.strings)}
+
+    # ------------------------------ Access ------------------------------
+    def view(self, index: int) -> NodeView:
+        return NodeView(self, index)
+
+    def root_views(self) -> list[NodeView]:
+        return [NodeView(self, index) for index in self.roots]
+
+    def children(self, index: int) -> list[int]:
+        children: list[int] = []
+        child: int = self.first_child[index]
+        while child != NONE:
+            children.append(child)
+            child = self.next_sibling[child]
+        return children
+
+    def get_token(self, index: int) -> Optional[Token]:
+        """Materializes the token of node `index`."""
+        entry: int = self.token[index]
+        if entry == NONE:
+            return None
+        return Token(TokenKind.Identifier, self.strings[self.token_text[entry]],
+            self.token_start[entry], self.token_end[entry], None, self.token_ident[entry])
+
+    def get_text(self, index: int) -> Optional[str]:
+        """Returns the identifier or literal text of node `index`."""
+        entry: int = self.token[index]
+        return self.strings[self.token_text[entry]] if entry != NONE else None
+
+    def fields(self, index: int) -> dict[str, int | list[int] | None]:
+        """Returns the child fields of node `index` by name, as node indices."""
+        layout: tuple[str, ...] = LAYOUTS.get(self.kinds[index], ())
+        children: list[int] = self.children(index)
+        present: int = self.ops[index]
+        optional: int = 0
+        fixed: int = 0
+        for field in layout:
+            if field[0] == '?':
+                fixed += (present >> optional) & 1
+                optional += 1
+            elif field[0] != '*':
+                fixed += 1
+
+        fields: dict[str, int | list[int] | None] = {}
+        position: int = 0
+        optional = 0
+        for field in layout:
+            if field[0] == '*':
+                count: int = len(children) - fixed
+                fields[field[1:]] = children[position:position + count]
+                position += count
+            elif field[0] == '?':
+                if (present >> optional) & 1:
+                    fields[field[1:]] = children[position]
+                    position += 1
+                else:
+                    fields[field[1:]] = None
+                optional += 1
+            else:
+                fields[field] = children[position]
+                position += 1
+        return fields
+
+    # ------------------------------ Building ------------------------------
+    def add_token(self, text: str, start: int = -1, end: int = -1, ident_id: int = -1) -> int:
+        string: Optional[int] = self.string_ids.get(text)
+        if string == None:
+            string = len(self.strings)
+            self.strings.append(text)
+            self.string_ids[text] = string
+        self.token_text.append(string)
+        self.token_start.append(start)
+        self.token_end.append(end)
+        self.token_ident.append(ident_id)
+        return len(self.token_text) - 1
+
+    def add_node(self, kind: int, op: int = 0, token: int = NONE) -> int:
+        self.kinds.append(kind)
+        self.ops.append(op)
+        self.first_child.append(NONE)
+        self.next_sibling.append(NONE)
+        self.token.append(token)
+        return len(self.kinds) - 1
+
+    @classmethod
+    def from_nodes(cls, nodes: list[ASTNode]) -> FlatTree:
+        """Flattens a program of object AST nodes. Lazy bodies are parsed."""
+        tree: FlatTree = cls()
+        for node in nodes:
+            tree.roots.append(tree.add_tree(node))
+        return tree
+
+    def add_tree(self, root: ASTNode) -> int:
+        """Appends `root` and its descendants in pre-order, returns its index."""
+        # (node or token, parent index, last child of parent so far)
+        stack: list[tuple[ASTNode | Token, int]] = [(root, NONE)]
+        last_child: dict[int, int] = {}
+        first: int = len(self)
+
+        while stack:
+            node, parent = stack.pop()
+            if isinstance(node, Token):
+                index = self.add_node(KIND_NAME, 0, self.add_name(node))
+                children: list[ASTNode | Token] = []
+            else:
+                kind: int = KINDS[type(node)]
+                op, token, children = self.flatten(kind, node)
+                index = self.add_node(kind, op, token)
+
+            if parent != NONE:
+                previous: Optional[int] = last_child.get(parent)
+                if previous == None:
+                    self.first_child[parent] = index
+                else:
+                    self.next_sibling[previous] = index
+                last_child[parent] = index
+
+            for child in reversed(children):
+                stack.append((child, index))
+        return first
+
+    def add_name(self, token: Token) -> int:
+        return self.add_token(token.get_identifier_data() or '', token.start, token.end,
+            token.ident_id)
+
+    def flatten(self, kind: int, node) -> tuple[int, int, list[ASTNode | Token]]:
+        """Returns the op entry, token entry and children of `node`."""
+        if kind == TAG_BINARY_EXPR:
+            return node.op.value, NONE, [node.lhs, node.rhs]
+        if kind == TAG_VARIABLE_EXPR:
+            return 0, self.add_name(node.name), []
+        if kind == TAG_LITERAL_EXPR:
+            return 0, self.add_token(node.literal), []
+        if kind == TAG_CALL_EXPR:
+            return 0, NONE, [node.callee, *node.args]
+        if kind == TAG_UNARY_EXPR:
+            return node.op.value, NONE, [node.expr]
+        if kind == TAG_GROUP_EXPR or kind == TAG_EXPR_STMT:
+            return 0, NONE, [node.expr]
+        if kind == TAG_ASSIGN_EXPR:
+            return 0, self.add_name(node.name), [node.value]
+        if kind == TAG_BLOCK_STMT:
+            return 0, NONE, list(node.elems)
+        if kind == TAG_IF_STMT:
+            if node.elsebranch == None:
+                return 0, NONE, [node.cond, node.thenbranch]
+            return 1, NONE, [node.cond, node.thenbranch, node.elsebranch]
+        if kind == TAG_WHILE_STMT:
+            return 0, NONE, [node.cond, node.body]
+        if kind == TAG_RETURN_STMT:
+            present = [child for child in (node.expr, node.cond) if child != None]
+            return (node.expr != None) | (node.cond != None) << 1, NONE, present
+        if kind == TAG_LET_DECL:
+            if node.initializer == None:
+                return 0, self.add_name(node.name), []
+            return 1, self.add_name(node.name), [node.initializer]
+        if kind == TAG_FUNC_DECL:
+            return 0, self.add_name(node.name), [*node.params, node.body]
+        if kind == TAG_CLASS_DECL:
+            return 0, self.add_name(node.name), [*node.inherited, node.body]
+        return 0, NONE, []
+
+    # ------------------------------ Converting back ------------------------------
+    def to_nodes(self) -> list[ASTNode]:
+        """Builds the object AST of every root."""
+        built: dict[int, ASTNode | Token] = {}
+        # Descendants come after their ancestors, so walking backwards builds
+        # every child before its parent.
+        for index in range(len(self) - 1, -1, -1):
+            built[index] = self.build(index, built)
+        return [built[root] for root in self.roots] # type: ignore
+
+    def build(self, index: int, built: dict[int, ASTNode | Token]) -> ASTNode | Token:
+        kind: int = self.kinds[index]
+        if kind == KIND_NAME:
+            return self.get_token(index) # type: ignore
+
+        fields = {name: (None if value == None
+                         else [built.pop(child) for child in value] if isinstance(value, list)
+                         else built.pop(value))
+                  for name, value in self.fields(index).items()}
+
+        if kind == TAG_BINARY_EXPR:
+            return BinaryExpr(fields['lhs'], BINARY_OPS[self.ops[index]], fields['rhs']) # type: ignore
+        if kind == TAG_VARIABLE_EXPR:
+            return VariableExpr(self.get_token(index)) # type: ignore
+        if kind == TAG_LITERAL_EXPR:
+            return LiteralExpr(self.get_text(index)) # type: ignore
+        if kind == TAG_CALL_EXPR:
+            return CallExpr(fields['callee'], fields['args']) # type: ignore
+        if kind == TAG_UNARY_EXPR:
+            return UnaryExpr(UNARY_OPS[self.ops[index]], fields['expr']) # type: ignore
+        if kind == TAG_GROUP_EXPR:
+            return GroupExpr(fields['expr']) # type: ignore
+        if kind == TAG_ASSIGN_EXPR:
+            return AssignExpr(self.get_token(index), fields['value']) # type: ignore
+        if kind == TAG_BLOCK_STMT:
+            return BlockStmt(fields['elems']) # type: ignore
+        if kind == TAG_EXPR_STMT:
+            return ExprStmt(fields['expr']) # type: ignore
+        if kind == TAG_IF_STMT:
+            return IfStmt(fields['cond'], fields['thenbranch'], fields['elsebranch']) # type: ignore
+        if kind == TAG_WHILE_STMT:
+            return WhileStmt(fields['cond'], fields['body']) # type: ignore
+        if kind == TAG_RETURN_STMT:
+            return ReturnStmt(fields['expr'], fields['cond']) # type: ignore
+        if kind == TAG_LET_DECL:
+            return LetDecl(self.get_token(index), fields['initializer']) # type: ignore
+        if kind == TAG_FUNC_DECL:
+            params: ParamList = ParamList([])
+            params.extend(fields['params']) # type: ignore
+            return FuncDecl(self.get_token(index), params, fields['body']) # type: ignore
+        if kind == TAG_CLASS_DECL:
+            return ClassDecl(self.get_token(index), fields['inherited'], fields['body']) # type: ignore
+        return CLASSES[kind]()
+
+
+class NodeView:
+    """Cursor on one node of a `FlatTree`.
+
+    Has the attributes of the object AST class of the node: child fields
+    return views (or lists of views), `name` a `Token`, `op` the operator
+    enum and `type` the node's type enum. A view holds only the tree and an
+    index, so it is cheap to create and throw away.
+    """
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree: FlatTree, index: int) -> None:
+        self.tree = tree
+        self.index = index
+
+    @property
+    def kind(self) -> int:
+        return self.tree.kinds[self.index]
+
+    @property
+    def node_class(self) -> type:
+        return CLASSES[self.kind]
+
+    @property
+    def type(self):
+        return CLASSES[self.kind].type
+
+    @property
+    def op(self):
+        kind: int = self.kind
+        if kind == TAG_BINARY_EXPR:
+            return BINARY_OPS[self.tree.ops[self.index]]
+        if kind == TAG_UNARY_EXPR:
+            return UNARY_OPS[self.tree.ops[self.index]]
+        raise AttributeError('op')
+
+    @property
+    def name(self) -> Token:
+        if self.tree.token[self.index] == NONE or self.kind == TAG_LITERAL_EXPR:
+            raise AttributeError('name')
+        return self.tree.get_token(self.index) # type: ignore
+
+    @property
+    def name_id(self) -> int:
+        return self.name.ident_id
+
+    @property
+    def literal(self) -> str:
+        if self.kind != TAG_LITERAL_EXPR:
+            raise AttributeError('literal')
+        return self.tree.get_text(self.index) # type: ignore
+
+    def children(self) -> list[NodeView]:
+        return [NodeView(self.tree, child) for child in self.tree.children(self.index)]
+
+    def __getattr__(self, name: str):
+        if (self.kind, name) not in FIELDS:
+            raise AttributeError(name)
+        value = self.tree.fields(self.index)[name]
+        if value == None:
+            return None
+        if isinstance(value, list):
+            return [self.wrap(child) for child in value]
+        return self.wrap(value)
+
+    def wrap(self, index: int) -> NodeView | Token:
+        if self.tree.kinds[index] == KIND_NAME:
+            return self.tree.get_token(index) # type: ignore
+        return NodeView(self.tree, index)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, NodeView) and self.tree is other.tree and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self) -> str:
+        return f"<{CLASSES[self.kind].__name__} view {self.index}>"
@@ -0,0 +1,77 @@
+from __future__ import annotations
+import enum
+from typing import Any, Callable, Generic, TypeVar
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import Decl
+from asttypes.expr import Expr
+from asttypes.stmt import Stmt
+
+
+T = TypeVar('T')
+
+# Handler method of every node kind, named like the methods of
+# `ExprVisitor`, `StmtVisitor` and `DeclVisitor`.
+HANDLER_NAMES: dict[enum.Enum, str] = {
+    Expr.Type.Invalid:  'visit_invalid_expr',
+    Expr.Type.Assign:   'visit_assign_expr',
+    Expr.Type.Call:     'visit_call_expr',
+    Expr.Type.Unary:    'visit_unary_expr',
+    Expr.Type.Binary:   'visit_binary_expr',
+    Expr.Type.Literal:  'visit_literal_expr',
+    Expr.Type.Group:    'visit_group_expr',
+    Expr.Type.Variable: 'visit_variable_expr',
+
+    Stmt.Type.Brace:    'visit_block_stmt',
+    Stmt.Type.Expr:     'visit_expr_stmt',
+    Stmt.Type.If:       'visit_if_stmt',
+    Stmt.Type.While:    'visit_while_stmt',
+    Stmt.Type.Return:   'visit_return_stmt',
+
+    Decl.Type.Invalid:  'visit_invalid_decl',
+    Decl.Type.Let:      'visit_let',
+    Decl.Type.Func:     'visit_func',
+    Decl.Type.Class:    'visit_class',
+}
+
+
+class KindTable(dict):
+    """Maps node classes to the entry of their `type` in `by_kind`.
+
+    Filled on first lookup of each class, so dispatch hashes the class
+    rather than the enum member, whose `__hash__` is written in Python.
+    """
+
+    def __init__(self, by_kind: dict[enum.Enum, Any]) -> None:
+        super().__init__()
+        self.by_kind = by_kind
+
+    def __missing__(self, kind: type) -> Any:
+        value = self.by_kind[kind.type] # type: ignore
+        self[kind] = value
+        return value
+
+
+class NodeVisitor(Generic[T]):
+    """Visitor over expressions, statements and declarations alike that
+    dispatches on the `type` of a node through a table.
+
+    Subclasses define the handlers of `HANDLER_NAMES` they need, kinds
+    without one go to `visit_default`. The handlers are bound once per
+    instance, `visit` is then a single dictionary lookup and call.
+
+    Handlers call `visit` themselves to descend, so deep trees can exceed
+    the recursion limit; use `walker` for those.
+    """
+
+    def __init__(self) -> None:
+        self.handlers: dict[type, Callable[[Any], T]] = KindTable({
+            kind: getattr(self, name, self.visit_default)
+            for kind, name in HANDLER_NAMES.items()
+        })
+
+    def visit(self, node: ASTNode) -> T:
+        return self.handlers[type(node)](node)
+
+    def visit_default(self, node: ASTNode) -> T:
+        raise NotImplementedError(f"{type(self).__name__} does not handle {node.type}.") # type: ignore
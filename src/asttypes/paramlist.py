@@ -2,5 +2,7 @@ from asttypes.expr import Expr
 
 
 class ParamList(list[Expr]):
+    __slots__ = ('params',)
+
     def __init__(self, params: list[Expr]):
         self.params = params
@@ -3,6 +3,13 @@ from abc import ABC, abstractmethod
 import enum
 from typing import Optional, TypeVar
 
+from asttypes.astformat import (
+    TAG_BLOCK_STMT,
+    TAG_EXPR_STMT,
+    TAG_IF_STMT,
+    TAG_RETURN_STMT,
+    TAG_WHILE_STMT
+)
 from asttypes.astnode import ASTNode
 from asttypes.expr import Expr
 from asttypes.stmtvisitor import StmtVisitor
@@ -20,8 +27,9 @@ class Stmt(ASTNode, ABC):
         While   = enum.auto()
         Return  = enum.auto()
 
-    def __init__(self, type: Type) -> None:
-        self.type = type
+    __slots__ = ()
+
+    type: Type
 
     @abstractmethod
     def accept(self, visitor: StmtVisitor[T]) -> T:
@@ -31,21 +39,27 @@ class Stmt(ASTNode, ABC):
 class BlockStmt(Stmt):
     """Represents a '{' ... '}' block."""
 
+    __slots__ = ('elems',)
+    type = Stmt.Type.Brace
+
     def __init__(self, elems: list[ASTNode]) -> None:
         # TODO: Should be a more fundamental type for this method
         #       to support declarations, statments and expressions
         #       together.
-        super().__init__(Stmt.Type.Brace)
         self.elems = elems
+        self.struct_hash = hash((TAG_BLOCK_STMT, *[elem.struct_hash for elem in elems]))
 
     def accept(self, visitor: StmtVisitor[T]) -> T:
         return visitor.visit_block_stmt(self)
 
 
 class ExprStmt(Stmt):
+    __slots__ = ('expr',)
+    type = Stmt.Type.Expr
+
     def __init__(self, expr: Expr) -> None:
-        super().__init__(Stmt.Type.Expr)
         self.expr = expr
+        self.struct_hash = hash((TAG_EXPR_STMT, expr.struct_hash))
 
     def accept(self, visitor: StmtVisitor[T]) -> T:
         return visitor.visit_expr_stmt(self)
@@ -54,6 +68,9 @@ class ExprStmt(Stmt):
 class IfStmt(Stmt):
     """If statement."""
 
+    __slots__ = ('cond', 'thenbranch', 'elsebranch')
+    type = Stmt.Type.If
+
     def __init__(
         self,
         cond: Expr,
@@ -67,10 +84,11 @@ class IfStmt(Stmt):
             thenbranch: True branch.
             elsebrach: False branch.
         """
-        super().__init__(Stmt.Type.If)
         self.cond = cond
         self.thenbranch = thenbranch
         self.elsebranch = elsebranch
+        self.struct_hash = hash((TAG_IF_STMT, cond.struct_hash, thenbranch.struct_hash,
+            elsebranch.struct_hash if elsebranch != None else 0))
 
     def accept(self, visitor: StmtVisitor[T]) -> T:
         return visitor.visit_if_stmt(self)
@@ -79,10 +97,13 @@ class IfStmt(Stmt):
 class WhileStmt(Stmt):
     """While statement."""
 
+    __slots__ = ('cond', 'body')
+    type = Stmt.Type.While
+
     def __init__(self, cond: Expr, body: Stmt) -> None:
-        super().__init__(Stmt.Type.While)
         self.cond = cond
         self.body = body
+        self.struct_hash = hash((TAG_WHILE_STMT, cond.struct_hash, body.struct_hash))
 
     def accept(self, visitor: StmtVisitor[T]) -> T:
         return visitor.visit_while_stmt(self)
@@ -91,14 +112,24 @@ class WhileStmt(Stmt):
 class ReturnStmt(Stmt):
     """Return statement."""
 
+    __slots__ = ('expr', 'cond')
+    type = Stmt.Type.Return
+
     def __init__(
         self,
-        expr: Expr,
+        expr: Optional[Expr],
         cond: Optional[Expr]
     ) -> None:
-        super().__init__(Stmt.Type.Return)
+        """Creates a return statement.
+
+        Args:
+            expr: Returned value, if any.
+            cond: Condition of a 'return ... if' statement, if any.
+        """
         self.expr = expr
         self.cond = cond
+        self.struct_hash = hash((TAG_RETURN_STMT, expr.struct_hash if expr != None else 0,
+            cond.struct_hash if cond != None else 0))
 
     def accept(self, visitor: StmtVisitor[T]) -> T:
         return visitor.visit_return_stmt(self)
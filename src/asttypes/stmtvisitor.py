@@ -1,8 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import TYPE_CHECKING, Generic, TypeVar
 
-from asttypes import stmt
+if TYPE_CHECKING:
+    from asttypes import stmt
 
 
 T = TypeVar('T')
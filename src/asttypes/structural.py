@@ -0,0 +1,66 @@
+"""Structural comparison of subtrees, with `struct_hash` as a fast path."""
+
+from typing import Any
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import BodyDecl
+from lexer.token import Token
+
+
+# Attributes that do not describe the structure of a node.
+IGNORED_FIELDS = frozenset({'name_id', 'struct_hash', 'body_range'})
+
+FIELDS: dict[type, list[str]] = {}
+
+
+def node_fields(kind: type) -> list[str]:
+    """Returns the names of the structural attributes of node class `kind`:
+    its public slots and those of its bases, and `body` for declarations
+    with a body.
+    """
+    fields = FIELDS.get(kind)
+    if fields == None:
+        fields = []
+        for base in kind.__mro__:
+            slots = base.__dict__.get('__slots__', ())
+            for name in [slots] if isinstance(slots, str) else slots:
+                if not name.startswith('_') and name not in IGNORED_FIELDS:
+                    fields.append(name)
+        if issubclass(kind, BodyDecl):
+            fields.append('body')
+        fields.sort()
+        FIELDS[kind] = fields
+    return fields
+
+
+def structurally_equal(a: Any, b: Any) -> bool:
+    """Returns whether two subtrees have the same shape, operators and text.
+
+    Token offsets and interner ids are ignored. Nodes with different
+    `struct_hash` are told apart right away, equal hashes are confirmed by
+    comparing the trees, without recursing, unless both sides are the same
+    object.
+    """
+    stack: list[tuple[Any, Any]] = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if x is y:
+            continue
+        if type(x) is not type(y):
+            return False
+
+        if isinstance(x, ASTNode):
+            if x.struct_hash != y.struct_hash:
+                return False
+            for name in node_fields(type(x)):
+                stack.append((getattr(x, name), getattr(y, name)))
+        elif isinstance(x, Token):
+            if x.kind != y.kind or x.get_identifier_data() != y.get_identifier_data():
+                return False
+        elif isinstance(x, list):
+            if len(x) != len(y):
+                return False
+            stack.extend(zip(x, y))
+        elif x != y:
+            return False
+    return True
@@ -0,0 +1,121 @@
+"""Non-recursive traversals of the AST, for trees of any depth."""
+
+from __future__ import annotations
+import enum
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import Decl
+from asttypes.expr import Expr
+from asttypes.nodevisitor import KindTable
+from asttypes.stmt import Stmt
+
+
+NO_CHILDREN: tuple = ()
+
+# Stack entry placed above a node whose children are pending.
+LEAVE = object()
+
+# Children of every node kind, in source order. Lazily parsed bodies are
+# loaded when reached.
+CHILDREN: dict[enum.Enum, Callable[[Any], Sequence[ASTNode]]] = {
+    Expr.Type.Invalid:  lambda node: NO_CHILDREN,
+    Expr.Type.Assign:   lambda node: (node.value,),
+    Expr.Type.Call:     lambda node: (node.callee, *node.args),
+    Expr.Type.Unary:    lambda node: (node.expr,),
+    Expr.Type.Binary:   lambda node: (node.lhs, node.rhs),
+    Expr.Type.Literal:  lambda node: NO_CHILDREN,
+    Expr.Type.Group:    lambda node: (node.expr,),
+    Expr.Type.Variable: lambda node: NO_CHILDREN,
+
+    Stmt.Type.Brace:    lambda node: node.elems,
+    Stmt.Type.Expr:     lambda node: (node.expr,),
+    Stmt.Type.If:       lambda node: (node.cond, node.thenbranch) if node.elsebranch == None
+                                     else (node.cond, node.thenbranch, node.elsebranch),
+    Stmt.Type.While:    lambda node: (node.cond, node.body),
+    Stmt.Type.Return:   lambda node: tuple(child for child in (node.expr, node.cond)
+                                           if child != None),
+
+    Decl.Type.Invalid:  lambda node: NO_CHILDREN,
+    Decl.Type.Let:      lambda node: NO_CHILDREN if node.initializer == None
+                                     else (node.initializer,),
+    Decl.Type.Func:     lambda node: (*node.params, node.body),
+    Decl.Type.Class:    lambda node: (node.body,),
+}
+
+CHILDREN_OF_CLASS: dict[type, Callable[[Any], Sequence[ASTNode]]] = KindTable(CHILDREN)
+
+
+def children(node: ASTNode) -> Sequence[ASTNode]:
+    """Returns the child nodes of `node` in source order."""
+    return CHILDREN_OF_CLASS[type(node)](node)
+
+
+def as_roots(roots: ASTNode | Iterable[ASTNode]) -> list[ASTNode]:
+    if isinstance(roots, ASTNode):
+        return [roots]
+    return list(roots)
+
+
+def preorder(roots: ASTNode | Iterable[ASTNode]) -> Iterator[ASTNode]:
+    """Yields every node, each before its children."""
+    table = CHILDREN_OF_CLASS
+    stack: list[ASTNode] = as_roots(roots)
+    stack.reverse()
+    while stack:
+        node = stack.pop()
+        yield node
+        nested = table[type(node)](node)
+        if nested:
+            stack.extend(reversed(nested))
+
+
+def postorder(roots: ASTNode | Iterable[ASTNode]) -> Iterator[ASTNode]:
+    """Yields every node, each after its children."""
+    table = CHILDREN_OF_CLASS
+    stack: list[Any] = as_roots(roots)
+    stack.reverse()
+    while stack:
+        node = stack.pop()
+        if node is LEAVE:
+            yield stack.pop()
+            continue
+        nested = table[type(node)](node)
+        if nested:
+            stack.append(node)
+            stack.append(LEAVE)
+            stack.extend(reversed(nested))
+        else:
+            yield node
+
+
+def walk(
+    roots: ASTNode | Iterable[ASTNode],
+    enter: Optional[Callable[[ASTNode], Any]] = None,
+    leave: Optional[Callable[[ASTNode], Any]] = None
+) -> None:
+    """Walks the trees depth first without recursing.
+
+    Args:
+        roots: Node or nodes to walk, in order.
+        enter: Called with each node before its children. Returning False
+            skips the children.
+        leave: Called with each entered node after its children.
+    """
+    table = CHILDREN_OF_CLASS
+    stack: list[Any] = as_roots(roots)
+    stack.reverse()
+    while stack:
+        node = stack.pop()
+        if node is LEAVE:
+            leave(stack.pop()) # type: ignore
+            continue
+        if enter != None and enter(node) == False:
+            nested = NO_CHILDREN
+        else:
+            nested = table[type(node)](node)
+        if leave != None:
+            stack.append(node)
+            stack.append(LEAVE)
+        if nested:
+            stack.extend(reversed(nested))
@@ -0,0 +1,417 @@
+"""Compiles programs to nested Python closures."""
+
+from __future__ import annotations
+import sys
+from typing import Any, Callable, Iterable, Optional, TextIO
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    Expr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.nodevisitor import NodeVisitor
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, WhileStmt
+from backend.compileerror import CompileError
+from backend.evalerror import EvalError
+from backend.slotlayout import SlotLayout
+from core.ops import BinaryOp, UnaryOp, divide
+from sema.resolution import Resolution
+from sema.resolver import Resolver
+from sema.semaerror import SemaError
+
+
+# Compiled code takes the local slots of the running function. Expressions
+# return their value; statements return None, or a 1-tuple of the value
+# when they executed a `return`.
+Frame = list[Any]
+Code = Callable[[Frame], Any]
+
+
+class CompiledFunction:
+    """A function value: the closure of its body and its frame size."""
+
+    __slots__ = ('name', 'arity', 'padding', 'body')
+
+    def __init__(self, name: str, arity: int, nlocals: int, body: Code) -> None:
+        self.name = name
+        self.arity = arity
+        # Zeroes for the local slots after the parameters.
+        self.padding: list[int] = [0] * (nlocals - arity)
+        self.body = body
+
+    def __str__(self) -> str:
+        return f"<func {self.name}>"
+
+
+def invoke(function: Any, args: list[Any]) -> Any:
+    """Calls a function value with evaluated arguments, which become the
+    start of its frame.
+    """
+    if type(function) is CompiledFunction:
+        if len(args) != function.arity:
+            raise EvalError(f"{function.name} takes {function.arity} arguments "
+                            f"but {len(args)} were given.")
+        args += function.padding
+        result = function.body(args)
+        return result[0] if result is not None else 0
+    if callable(function):
+        return function(args)
+    raise EvalError("Can only call functions.")
+
+
+def make_binary(op: BinaryOp, lhs: Code, rhs: Code) -> Code:
+    if op is BinaryOp.Add:
+        return lambda frame: lhs(frame) + rhs(frame)
+    elif op is BinaryOp.Sub:
+        return lambda frame: lhs(frame) - rhs(frame)
+    elif op is BinaryOp.Mul:
+        return lambda frame: lhs(frame) * rhs(frame)
+    elif op is BinaryOp.Div:
+        def div(frame: Frame) -> Any:
+            left = lhs(frame)
+            right = rhs(frame)
+            if right == 0:
+                raise EvalError("Division by zero.")
+            return divide(left, right)
+        return div
+    elif op is BinaryOp.Less:
+        return lambda frame: 1 if lhs(frame) < rhs(frame) else 0
+    elif op is BinaryOp.Greater:
+        return lambda frame: 1 if lhs(frame) > rhs(frame) else 0
+    elif op is BinaryOp.LessEq:
+        return lambda frame: 1 if lhs(frame) <= rhs(frame) else 0
+    elif op is BinaryOp.GreaterEq:
+        return lambda frame: 1 if lhs(frame) >= rhs(frame) else 0
+    elif op is BinaryOp.EqEq:
+        return lambda frame: 1 if lhs(frame) == rhs(frame) else 0
+    elif op is BinaryOp.NotEq:
+        return lambda frame: 1 if lhs(frame) != rhs(frame) else 0
+    elif op is BinaryOp.And:
+        return lambda frame: 1 if lhs(frame) != 0 and rhs(frame) != 0 else 0
+    elif op is BinaryOp.Or:
+        return lambda frame: 1 if lhs(frame) != 0 or rhs(frame) != 0 else 0
+    raise ValueError(f"Cannot compile {op}.")
+
+
+def make_local_const(op: BinaryOp, slot: int, value: int) -> Optional[Code]:
+    """Specializations of `local op constant`, the usual loop counter
+    arithmetic and tests.
+    """
+    if op is BinaryOp.Add:
+        return lambda frame: frame[slot] + value
+    elif op is BinaryOp.Sub:
+        return lambda frame: frame[slot] - value
+    elif op is BinaryOp.Less:
+        return lambda frame: 1 if frame[slot] < value else 0
+    elif op is BinaryOp.Greater:
+        return lambda frame: 1 if frame[slot] > value else 0
+    elif op is BinaryOp.LessEq:
+        return lambda frame: 1 if frame[slot] <= value else 0
+    elif op is BinaryOp.GreaterEq:
+        return lambda frame: 1 if frame[slot] >= value else 0
+    return None
+
+
+def make_local_local(op: BinaryOp, left: int, right: int) -> Optional[Code]:
+    """Specializations of `local op local`."""
+    if op is BinaryOp.Add:
+        return lambda frame: frame[left] + frame[right]
+    elif op is BinaryOp.Sub:
+        return lambda frame: frame[left] - frame[right]
+    elif op is BinaryOp.Mul:
+        return lambda frame: frame[left] * frame[right]
+    elif op is BinaryOp.Less:
+        return lambda frame: 1 if frame[left] < frame[right] else 0
+    elif op is BinaryOp.Greater:
+        return lambda frame: 1 if frame[left] > frame[right] else 0
+    return None
+
+
+class ClosureCompiler(NodeVisitor[Code]):
+    """Compiles every expression and statement once into a closure that
+    calls the closures of its children directly, with operators, variable
+    slots and constants bound at compile time.
+
+    Variables are laid out like in the bytecode `Compiler`, see
+    `SlotLayout`, semantics follow `Evaluator`. Compiled functions are
+    cached per `FuncDecl`, unless they had errors, and reused by later
+    compilations with the same global slots, e.g. of a tree that an
+    incremental reparse shares with the previous one. Programs compiled by
+    one compiler share its global slots, so only one of them can run at a
+    time.
+
+    Calls recurse in Python, several frames per call, so deep recursion in
+    the program runs into the Python recursion limit.
+
+    Args:
+        out: Stream `print` writes to.
+    """
+
+    def __init__(self, out: TextIO = sys.stdout) -> None:
+        super().__init__()
+        self.out = out
+        self.globals: list[Any] = []
+        # Compiled functions by declaration, with the global slots they
+        # were compiled for.
+        self.functions: dict[FuncDecl, tuple[tuple[str, ...], CompiledFunction]] = {}
+        self.compiled: int = 0
+        self.reused: int = 0
+
+    def builtin_print(self, args: list[Any]) -> int:
+        print(*args, file=self.out)
+        return 0
+
+    def compile(self, decls: Iterable[ASTNode]) -> Callable[[], None]:
+        """Returns a function that runs the program. Raises CompileError
+        when it has undefined names or constructs that cannot be compiled.
+        """
+        decls = list(decls)
+        self.resolution: Resolution = Resolver().resolve(decls)
+        self.errors: list[SemaError] = list(self.resolution.errors)
+        self.global_names: tuple[str, ...] = tuple(self.resolution.global_names)
+        self.layout = SlotLayout(self.resolution)
+        body = self.compile_block(decls)
+        if self.errors:
+            raise CompileError(self.errors)
+
+        global_names = self.global_names
+        globals_ = self.globals
+        builtins: dict[str, Any] = {'print': self.builtin_print}
+        nlocals: int = self.layout.nlocals
+
+        def run() -> None:
+            globals_[:] = [builtins.get(name) for name in global_names]
+            body([0] * nlocals)
+        return run
+
+    def error(self, message: str, node: Optional[ASTNode] = None) -> None:
+        token = getattr(node, 'name', None)
+        self.errors.append(SemaError(message, token))
+
+    def compile_block(self, elems: list[ASTNode]) -> Code:
+        visit = self.visit
+        stmts: tuple[Code, ...] = tuple(visit(elem) for elem in elems)
+        if not stmts:
+            return lambda frame: None
+        if len(stmts) == 1:
+            return stmts[0]
+        if len(stmts) == 2:
+            first, second = stmts
+            def block2(frame: Frame) -> Any:
+                result = first(frame)
+                if result is not None:
+                    return result
+                return second(frame)
+            return block2
+
+        def block(frame: Frame) -> Any:
+            for stmt in stmts:
+                result = stmt(frame)
+                if result is not None:
+                    return result
+        return block
+
+    def function(self, func_decl: FuncDecl) -> CompiledFunction:
+        """Returns the compiled function of `func_decl`, compiling it on
+        the first request.
+        """
+        cached = self.functions.get(func_decl)
+        if cached != None and cached[0] == self.global_names:
+            self.reused += 1
+            return cached[1]
+
+        outer: SlotLayout = self.layout
+        self.layout = SlotLayout(self.resolution)
+        self.layout.open_scope(func_decl)
+        errors: int = len(self.errors)
+        body: Code = self.visit(func_decl.body)
+        function = CompiledFunction(func_decl.name.get_identifier_data(), # type: ignore
+                                    len(func_decl.params), self.layout.nlocals, body)
+        self.layout = outer
+        # A body that failed to compile must report its errors again.
+        if len(self.errors) == errors:
+            self.functions[func_decl] = (self.global_names, function)
+        self.compiled += 1
+        return function
+
+    def store(self, location: Optional[tuple[bool, int]], value: Code) -> Code:
+        """Returns a statement storing `value` to `location`."""
+        if location == None:
+            return lambda frame: None # reported by the resolver
+        is_local, slot = location
+        if is_local:
+            def store_local(frame: Frame) -> None:
+                frame[slot] = value(frame)
+            return store_local
+
+        globals_ = self.globals
+        def store_global(frame: Frame) -> None:
+            globals_[slot] = value(frame)
+        return store_global
+
+    # ------------------------------ Expressions ------------------------------
+    def visit_invalid_expr(self, invalid_expr: InvalidExpr) -> Code:
+        self.error("Cannot compile an invalid expression.")
+        return lambda frame: 0
+
+    def visit_assign_expr(self, assign_expr: AssignExpr) -> Code:
+        value: Code = self.visit(assign_expr.value)
+        location = self.layout.use(assign_expr)
+        if location == None:
+            return value # reported by the resolver
+        is_local, slot = location
+        if is_local:
+            def assign_local(frame: Frame) -> Any:
+                frame[slot] = result = value(frame)
+                return result
+            return assign_local
+
+        globals_ = self.globals
+        def assign_global(frame: Frame) -> Any:
+            globals_[slot] = result = value(frame)
+            return result
+        return assign_global
+
+    def visit_call_expr(self, call_expr: CallExpr) -> Code:
+        callee: Code = self.visit(call_expr.callee)
+        args: tuple[Code, ...] = tuple(self.visit(arg) for arg in call_expr.args)
+        if len(args) == 1:
+            arg0 = args[0]
+            return lambda frame: invoke(callee(frame), [arg0(frame)])
+        if len(args) == 2:
+            arg0, arg1 = args
+            return lambda frame: invoke(callee(frame), [arg0(frame), arg1(frame)])
+        return lambda frame: invoke(callee(frame), [arg(frame) for arg in args])
+
+    def visit_unary_expr(self, unary_expr: UnaryExpr) -> Code:
+        expr: Code = self.visit(unary_expr.expr)
+        if unary_expr.op is UnaryOp.Negate:
+            return lambda frame: -expr(frame)
+        return lambda frame: 1 if expr(frame) == 0 else 0
+
+    def visit_binary_expr(self, binary_expr: BinaryExpr) -> Code:
+        op: BinaryOp = binary_expr.op
+        left = self.local_slot(binary_expr.lhs)
+        if left != None:
+            if type(binary_expr.rhs) is LiteralExpr:
+                code = make_local_const(op, left, binary_expr.rhs.value) # type: ignore
+                if code != None:
+                    return code
+            right = self.local_slot(binary_expr.rhs)
+            if right != None:
+                code = make_local_local(op, left, right)
+                if code != None:
+                    return code
+        return make_binary(op, self.visit(binary_expr.lhs), self.visit(binary_expr.rhs))
+
+    def local_slot(self, expr: Expr) -> Optional[int]:
+        """Returns the local slot `expr` reads if it is a local variable."""
+        if type(expr) is not VariableExpr:
+            return None
+        location = self.layout.use(expr)
+        return location[1] if location != None and location[0] else None
+
+    def visit_literal_expr(self, literal_expr: LiteralExpr) -> Code:
+        value: int = literal_expr.value
+        return lambda frame: value
+
+    def visit_group_expr(self, group_expr: GroupExpr) -> Code:
+        return self.visit(group_expr.expr)
+
+    def visit_variable_expr(self, variable_expr: VariableExpr) -> Code:
+        location = self.layout.use(variable_expr)
+        if location == None:
+            return lambda frame: 0 # reported by the resolver
+        is_local, slot = location
+        if is_local:
+            return lambda frame: frame[slot]
+
+        globals_ = self.globals
+        name: str = self.global_names[slot]
+        def load_global(frame: Frame) -> Any:
+            value = globals_[slot]
+            if value is None:
+                raise EvalError(f"Undefined variable '{name}'.")
+            return value
+        return load_global
+
+    # ------------------------------ Statements ------------------------------
+    def visit_block_stmt(self, block_stmt: BlockStmt) -> Code:
+        self.layout.open_scope(block_stmt)
+        code = self.compile_block(block_stmt.elems)
+        self.layout.close_scope()
+        return code
+
+    def visit_expr_stmt(self, expr_stmt: ExprStmt) -> Code:
+        if type(expr_stmt.expr) is AssignExpr:
+            assign: AssignExpr = expr_stmt.expr # type: ignore
+            return self.store(self.layout.use(assign), self.visit(assign.value))
+        expr: Code = self.visit(expr_stmt.expr)
+        def discard(frame: Frame) -> None:
+            expr(frame)
+        return discard
+
+    def visit_if_stmt(self, if_stmt: IfStmt) -> Code:
+        cond: Code = self.visit(if_stmt.cond)
+        thenbranch: Code = self.visit(if_stmt.thenbranch)
+        if if_stmt.elsebranch == None:
+            def if_then(frame: Frame) -> Any:
+                if cond(frame) != 0:
+                    return thenbranch(frame)
+            return if_then
+
+        elsebranch: Code = self.visit(if_stmt.elsebranch)
+        def if_else(frame: Frame) -> Any:
+            if cond(frame) != 0:
+                return thenbranch(frame)
+            return elsebranch(frame)
+        return if_else
+
+    def visit_while_stmt(self, while_stmt: WhileStmt) -> Code:
+        cond: Code = self.visit(while_stmt.cond)
+        body: Code = self.visit(while_stmt.body)
+        def loop(frame: Frame) -> Any:
+            while cond(frame) != 0:
+                result = body(frame)
+                if result is not None:
+                    return result
+        return loop
+
+    def visit_return_stmt(self, return_stmt: ReturnStmt) -> Code:
+        if not self.layout.in_function():
+            self.error("Cannot return from top-level code.")
+        expr: Code = self.visit(return_stmt.expr) if return_stmt.expr != None else lambda frame: 0
+        if return_stmt.cond == None:
+            return lambda frame: (expr(frame),)
+
+        cond: Code = self.visit(return_stmt.cond)
+        def return_if(frame: Frame) -> Any:
+            if cond(frame) != 0:
+                return (expr(frame),)
+        return return_if
+
+    # ------------------------------ Declarations ------------------------------
+    def visit_invalid_decl(self, invalid_decl: InvalidDecl) -> Code:
+        self.error("Cannot compile an invalid declaration.")
+        return lambda frame: None
+
+    def visit_let(self, let_decl: LetDecl) -> Code:
+        value: Code = (self.visit(let_decl.initializer) if let_decl.initializer != None
+                       else lambda frame: 0)
+        return self.store(self.layout.declaration(let_decl), value)
+
+    def visit_func(self, func_decl: FuncDecl) -> Code:
+        function = self.function(func_decl)
+        return self.store(self.layout.declaration(func_decl), lambda frame: function)
+
+    def visit_class(self, class_decl: ClassDecl) -> Code:
+        self.error("Classes cannot be compiled.", class_decl)
+        return lambda frame: None
@@ -0,0 +1,58 @@
+"""Persistent cache of transpiled programs keyed by their source."""
+
+import marshal
+import sys
+from types import CodeType
+from typing import Any, BinaryIO
+
+from backend.transpiler import compile_source
+from driver.parsecache import FINGERPRINT_MODULES, ParseCache, fingerprint
+from lexer.token import Source
+
+
+# Bump when lowering changes without any change to the modules listed below.
+TRANSPILER_VERSION = 1
+
+# Modules that shape the lowered code on top of those shaping the parse.
+TRANSPILER_MODULES = FINGERPRINT_MODULES + [
+    'asttypes.nodevisitor',
+    'asttypes.walker',
+    'backend.slotlayout',
+    'backend.transpiler',
+    'sema.resolution',
+    'sema.resolver',
+    'sema.scope',
+]
+
+
+class CodeCache(ParseCache):
+    """Code objects of transpiled programs, stored with `marshal` under a
+    hash of the source, so running an unchanged program again skips
+    lexing, parsing and lowering.
+
+    Code objects only load into the Python version that wrote them, which
+    is part of the fingerprint.
+    """
+
+    suffix = '.marshal'
+
+    def fingerprint(self) -> bytes:
+        return fingerprint(TRANSPILER_MODULES, f"{TRANSPILER_VERSION} {marshal.version} "
+                                               f"{sys.implementation.cache_tag}")
+
+    def load(self, file: BinaryIO) -> Any:
+        return marshal.load(file)
+
+    def dump(self, value: Any, file: BinaryIO) -> None:
+        marshal.dump(value, file)
+
+    def compile(self, source: Source) -> CodeType:
+        """Returns the code object of the program in `source`, see
+        `backend.transpiler.run`. Raises CompileError like `compile_source`,
+        programs that fail to compile are not cached.
+        """
+        code = self.get(source)
+        if code == None:
+            code = compile_source(source)
+            self.put(source, code)
+        return code
@@ -0,0 +1,62 @@
+from __future__ import annotations
+from array import array
+from typing import Any
+
+from backend.opcodes import NO_ARG, OPCODE_BITS, OPCODE_COUNT, OPCODE_MASK, OPCODE_NAMES
+
+
+class CodeObject:
+    """Bytecode of one function, or of the top-level code of a program.
+
+    `words` holds the instructions, see `opcodes`, `constants` the values
+    too large for an instruction argument and the code of nested functions.
+    Parameters take the first `arity` of the `nlocals` local slots.
+    `global_names` names the global slots and is shared by all code of a
+    program. `counts` is filled by a profiling `VM`, executions per opcode.
+    """
+
+    __slots__ = ('name', 'arity', 'nlocals', 'words', 'constants', 'global_names', 'counts')
+
+    def __init__(self, name: str, arity: int, global_names: list[str]) -> None:
+        self.name = name
+        self.arity = arity
+        self.nlocals: int = arity
+        self.words: array = array('q')
+        self.constants: list[Any] = []
+        self.global_names = global_names
+        self.counts: list[int] = [0] * OPCODE_COUNT
+
+    def __str__(self) -> str:
+        return f"<func {self.name}>"
+
+    def emit(self, opcode: int, arg: int = 0) -> int:
+        """Appends an instruction, returns its index."""
+        self.words.append(opcode | arg << OPCODE_BITS)
+        return len(self.words) - 1
+
+    def patch(self, index: int, arg: int) -> None:
+        """Replaces the argument of the instruction at `index`."""
+        self.words[index] = self.words[index] & OPCODE_MASK | arg << OPCODE_BITS
+
+    def add_constant(self, value: Any) -> int:
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def functions(self) -> list[CodeObject]:
+        """Returns this code and the code of all functions nested in it."""
+        found: list[CodeObject] = []
+        pending: list[CodeObject] = [self]
+        while pending:
+            code = pending.pop()
+            found.append(code)
+            pending.extend(value for value in code.constants if type(value) is CodeObject)
+        return found
+
+    def disassemble(self) -> str:
+        lines: list[str] = [f"{self.name} (arity {self.arity}, {self.nlocals} locals)"]
+        for index, word in enumerate(self.words):
+            opcode: int = word & OPCODE_MASK
+            arg: int = word >> OPCODE_BITS
+            name: str = OPCODE_NAMES[opcode]
+            lines.append(f"{index:6d}  {name:14} {'' if opcode in NO_ARG else arg}".rstrip())
+        return '\n'.join(lines)
@@ -0,0 +1,17 @@
+from typing import Sequence
+
+from parser.parseerror import ParseError
+from sema.semaerror import SemaError
+
+
+class CompileError(Exception):
+    """A program that cannot be compiled, with every error found in it:
+    syntax errors, or those of the semantic passes.
+    """
+
+    def __init__(self, errors: Sequence[SemaError | ParseError]) -> None:
+        super().__init__(errors)
+        self.errors = errors
+
+    def __str__(self) -> str:
+        return '\n'.join(str(error) for error in self.errors)
@@ -0,0 +1,231 @@
+"""Compiles programs to bytecode for `VM`."""
+
+from __future__ import annotations
+from typing import Iterable, Optional
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.nodevisitor import NodeVisitor
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, WhileStmt
+from backend import opcodes as op
+from backend.codeobject import CodeObject
+from backend.compileerror import CompileError
+from backend.slotlayout import SlotLayout
+from core.ops import BinaryOp, UnaryOp
+from lexer.token import Token
+from sema.resolution import Resolution
+from sema.resolver import Resolver
+from sema.semaerror import SemaError
+
+
+BINARY_OPCODES: dict[BinaryOp, int] = {
+    BinaryOp.Add:       op.ADD,
+    BinaryOp.Sub:       op.SUB,
+    BinaryOp.Mul:       op.MUL,
+    BinaryOp.Div:       op.DIV,
+    BinaryOp.Less:      op.LESS,
+    BinaryOp.Greater:   op.GREATER,
+    BinaryOp.LessEq:    op.LESS_EQ,
+    BinaryOp.GreaterEq: op.GREATER_EQ,
+    BinaryOp.EqEq:      op.EQ,
+    BinaryOp.NotEq:     op.NOT_EQ,
+}
+
+UNARY_OPCODES: dict[UnaryOp, int] = {
+    UnaryOp.Negate:     op.NEGATE,
+    UnaryOp.Not:        op.NOT,
+}
+
+
+class Compiler(NodeVisitor[None]):
+    """Compiles a program to a `CodeObject` for its top-level code, which
+    holds the code of its functions among its constants.
+
+    Variables get the addresses `Resolver` assigns them. Top-level `let`s
+    and functions live in global slots, everything else in the local slots
+    of its function, see `SlotLayout`. Semantics follow `Evaluator`.
+    """
+
+    def compile(self, decls: Iterable[ASTNode]) -> CodeObject:
+        """Raises CompileError when the program has undefined names or
+        constructs the VM cannot run.
+        """
+        decls = list(decls)
+        self.resolution: Resolution = Resolver().resolve(decls)
+        self.errors: list[SemaError] = list(self.resolution.errors)
+
+        self.code = CodeObject('<main>', 0, self.resolution.global_names)
+        self.layout = SlotLayout(self.resolution)
+        for decl in decls:
+            self.visit(decl)
+        self.code.emit(op.PUSH_INT, 0)
+        self.code.emit(op.RETURN)
+        self.code.nlocals = self.layout.nlocals
+
+        if self.errors:
+            raise CompileError(self.errors)
+        return self.code
+
+    def error(self, message: str, token: Optional[Token]) -> None:
+        self.errors.append(SemaError(message, token))
+
+    # ------------------------------ Variables ------------------------------
+    def emit_load(self, node: ASTNode) -> None:
+        location = self.layout.use(node)
+        if location == None:
+            return # reported by the resolver
+        self.code.emit(op.LOAD_LOCAL if location[0] else op.LOAD_GLOBAL, location[1])
+
+    def emit_store(self, location: Optional[tuple[bool, int]]) -> None:
+        """Pops the top of the stack into the variable at `location`, see
+        `SlotLayout`.
+        """
+        if location == None:
+            return # reported by the resolver
+        self.code.emit(op.STORE_LOCAL if location[0] else op.STORE_GLOBAL, location[1])
+
+    def emit_int(self, value: int) -> None:
+        if -op.MAX_ARG <= value <= op.MAX_ARG:
+            self.code.emit(op.PUSH_INT, value)
+        else:
+            self.code.emit(op.LOAD_CONST, self.code.add_constant(value))
+
+    # ------------------------------ Expressions ------------------------------
+    def visit_invalid_expr(self, invalid_expr: InvalidExpr) -> None:
+        self.error("Cannot compile an invalid expression.", None)
+
+    def visit_assign_expr(self, assign_expr: AssignExpr) -> None:
+        # Stores pop, an assignment whose value is used reloads it.
+        self.emit_assign(assign_expr)
+        self.emit_load(assign_expr)
+
+    def emit_assign(self, assign_expr: AssignExpr) -> None:
+        self.visit(assign_expr.value)
+        self.emit_store(self.layout.use(assign_expr))
+
+    def visit_call_expr(self, call_expr: CallExpr) -> None:
+        self.visit(call_expr.callee)
+        for arg in call_expr.args:
+            self.visit(arg)
+        self.code.emit(op.CALL, len(call_expr.args))
+
+    def visit_unary_expr(self, unary_expr: UnaryExpr) -> None:
+        self.visit(unary_expr.expr)
+        self.code.emit(UNARY_OPCODES[unary_expr.op])
+
+    def visit_binary_expr(self, binary_expr: BinaryExpr) -> None:
+        code = self.code
+        self.visit(binary_expr.lhs)
+        if binary_expr.op is BinaryOp.And or binary_expr.op is BinaryOp.Or:
+            # lhs; JUMP_IF_x short; rhs; BOOL; JUMP end; short: PUSH_INT; end:
+            is_and: bool = binary_expr.op is BinaryOp.And
+            short = code.emit(op.JUMP_IF_FALSE if is_and else op.JUMP_IF_TRUE)
+            self.visit(binary_expr.rhs)
+            code.emit(op.BOOL)
+            end = code.emit(op.JUMP)
+            code.patch(short, code.emit(op.PUSH_INT, 0 if is_and else 1))
+            code.patch(end, len(code.words))
+            return
+        self.visit(binary_expr.rhs)
+        code.emit(BINARY_OPCODES[binary_expr.op])
+
+    def visit_literal_expr(self, literal_expr: LiteralExpr) -> None:
+        self.emit_int(literal_expr.value)
+
+    def visit_group_expr(self, group_expr: GroupExpr) -> None:
+        self.visit(group_expr.expr)
+
+    def visit_variable_expr(self, variable_expr: VariableExpr) -> None:
+        self.emit_load(variable_expr)
+
+    # ------------------------------ Statements ------------------------------
+    def visit_block_stmt(self, block_stmt: BlockStmt) -> None:
+        self.layout.open_scope(block_stmt)
+        for elem in block_stmt.elems:
+            self.visit(elem)
+        self.layout.close_scope()
+
+    def visit_expr_stmt(self, expr_stmt: ExprStmt) -> None:
+        if type(expr_stmt.expr) is AssignExpr:
+            self.emit_assign(expr_stmt.expr) # type: ignore
+            return
+        self.visit(expr_stmt.expr)
+        self.code.emit(op.POP)
+
+    def visit_if_stmt(self, if_stmt: IfStmt) -> None:
+        code = self.code
+        self.visit(if_stmt.cond)
+        skip = code.emit(op.JUMP_IF_FALSE)
+        self.visit(if_stmt.thenbranch)
+        if if_stmt.elsebranch != None:
+            end = code.emit(op.JUMP)
+            code.patch(skip, len(code.words))
+            self.visit(if_stmt.elsebranch)
+            code.patch(end, len(code.words))
+        else:
+            code.patch(skip, len(code.words))
+
+    def visit_while_stmt(self, while_stmt: WhileStmt) -> None:
+        code = self.code
+        start: int = len(code.words)
+        self.visit(while_stmt.cond)
+        end = code.emit(op.JUMP_IF_FALSE)
+        self.visit(while_stmt.body)
+        code.emit(op.JUMP, start)
+        code.patch(end, len(code.words))
+
+    def visit_return_stmt(self, return_stmt: ReturnStmt) -> None:
+        code = self.code
+        if not self.layout.in_function():
+            self.error("Cannot return from top-level code.", None)
+        skip: Optional[int] = None
+        if return_stmt.cond != None:
+            self.visit(return_stmt.cond)
+            skip = code.emit(op.JUMP_IF_FALSE)
+        if return_stmt.expr != None:
+            self.visit(return_stmt.expr)
+        else:
+            code.emit(op.PUSH_INT, 0)
+        code.emit(op.RETURN)
+        if skip != None:
+            code.patch(skip, len(code.words))
+
+    # ------------------------------ Declarations ------------------------------
+    def visit_invalid_decl(self, invalid_decl: InvalidDecl) -> None:
+        self.error("Cannot compile an invalid declaration.", None)
+
+    def visit_let(self, let_decl: LetDecl) -> None:
+        if let_decl.initializer != None:
+            self.visit(let_decl.initializer)
+        else:
+            self.code.emit(op.PUSH_INT, 0)
+        self.emit_store(self.layout.declaration(let_decl))
+
+    def visit_func(self, func_decl: FuncDecl) -> None:
+        outer = (self.code, self.layout)
+        self.code = CodeObject(func_decl.name.get_identifier_data(), # type: ignore
+                               len(func_decl.params), outer[0].global_names)
+        self.layout = SlotLayout(self.resolution)
+        self.layout.open_scope(func_decl)
+        self.visit(func_decl.body)
+        self.code.emit(op.PUSH_INT, 0)
+        self.code.emit(op.RETURN)
+        self.code.nlocals = self.layout.nlocals
+        function = self.code
+        self.code, self.layout = outer
+
+        self.code.emit(op.LOAD_CONST, self.code.add_constant(function))
+        self.emit_store(self.layout.declaration(func_decl))
+
+    def visit_class(self, class_decl: ClassDecl) -> None:
+        self.error("Classes cannot be compiled.", class_decl.name)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+from typing import Any, Optional
+
+
+class Environment:
+    """Variables of one scope, chained to the enclosing scope."""
+
+    __slots__ = ('values', 'enclosing')
+
+    def __init__(self, enclosing: Optional[Environment] = None) -> None:
+        self.values: dict[str, Any] = {}
+        self.enclosing = enclosing
+
+    def define(self, name: str, value: Any) -> None:
+        self.values[name] = value
+
+    def find(self, name: str) -> Optional[Environment]:
+        """Returns the innermost scope that defines `name`."""
+        env: Optional[Environment] = self
+        while env != None:
+            if name in env.values:
+                return env
+            env = env.enclosing
+        return None
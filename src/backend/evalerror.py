@@ -0,0 +1,17 @@
+from typing import Optional
+
+from asttypes.astnode import ASTNode
+
+
+class EvalError(Exception):
+    """A runtime error of the evaluated program, e.g. an undefined name or a
+    division by zero.
+    """
+
+    def __init__(self, message: str, node: Optional[ASTNode] = None) -> None:
+        super().__init__(message, node)
+        self.message = message
+        self.node = node
+
+    def __str__(self) -> str:
+        return self.message
@@ -0,0 +1,196 @@
+"""Tree-walking evaluator of programs.
+
+Values are integers and functions. `/` truncates toward zero, comparisons,
+`and`, `or` and `!` yield 1 or 0 and `and`/`or` short-circuit, see
+`core.ops`. `return e if c` returns `e` only when `c` is not 0. Functions
+see their parameters, their own locals and the globals, not the locals of
+the function they are declared in. `print` is built in.
+"""
+
+from __future__ import annotations
+import sys
+from typing import Any, Callable, Iterable, TextIO
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.nodevisitor import NodeVisitor
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, WhileStmt
+from backend.environment import Environment
+from backend.evalerror import EvalError
+from core.ops import BinaryOp, apply_binary, apply_unary
+
+
+class Function:
+    """A function value."""
+
+    __slots__ = ('decl', 'name', 'params')
+
+    def __init__(self, decl: FuncDecl) -> None:
+        self.decl = decl
+        self.name: str = decl.name.get_identifier_data() # type: ignore
+        self.params: list[str] = []
+        for param in decl.params:
+            # The parser takes any expression as a parameter.
+            if type(param) is not VariableExpr:
+                raise EvalError("Expected a parameter name.", decl)
+            self.params.append(param.name.get_identifier_data()) # type: ignore
+
+    def __str__(self) -> str:
+        return f"<func {self.name}>"
+
+
+class ReturnValue(Exception):
+    """Unwinds a function body to its call on `return`."""
+
+    def __init__(self, value: Any) -> None:
+        super().__init__()
+        self.value = value
+
+
+class Evaluator(NodeVisitor[Any]):
+    """Evaluates programs by walking their tree recursively.
+
+    Args:
+        out: Stream `print` writes to.
+    """
+
+    def __init__(self, out: TextIO = sys.stdout) -> None:
+        super().__init__()
+        self.out = out
+        self.globals = Environment()
+        self.globals.define('print', self.builtin_print)
+        self.env = self.globals
+
+    def run(self, decls: Iterable[ASTNode]) -> None:
+        """Executes top level declarations and statements in order."""
+        try:
+            for decl in decls:
+                self.visit(decl)
+        except ReturnValue:
+            raise EvalError("Cannot return from top-level code.")
+
+    def builtin_print(self, args: list[Any]) -> int:
+        print(*args, file=self.out)
+        return 0
+
+    def call(self, callee: Any, args: list[Any], node: CallExpr) -> Any:
+        if type(callee) is Function:
+            if len(args) != len(callee.params):
+                raise EvalError(f"{callee.name} takes {len(callee.params)} arguments "
+                                f"but {len(args)} were given.", node)
+            env = Environment(self.globals)
+            env.values.update(zip(callee.params, args))
+            previous: Environment = self.env
+            self.env = env
+            try:
+                self.visit(callee.decl.body)
+            except ReturnValue as returned:
+                return returned.value
+            finally:
+                self.env = previous
+            return 0
+        if callable(callee):
+            return callee(args)
+        raise EvalError("Can only call functions.", node)
+
+    # ------------------------------ Expressions ------------------------------
+    def visit_invalid_expr(self, invalid_expr: InvalidExpr) -> Any:
+        raise EvalError("Cannot evaluate an invalid expression.", invalid_expr)
+
+    def visit_assign_expr(self, assign_expr: AssignExpr) -> Any:
+        name: str = assign_expr.name.get_identifier_data() # type: ignore
+        env = self.env.find(name)
+        if env == None:
+            raise EvalError(f"Undefined variable '{name}'.", assign_expr)
+        value = self.visit(assign_expr.value)
+        env.values[name] = value
+        return value
+
+    def visit_call_expr(self, call_expr: CallExpr) -> Any:
+        callee = self.visit(call_expr.callee)
+        visit = self.visit
+        return self.call(callee, [visit(arg) for arg in call_expr.args], call_expr)
+
+    def visit_unary_expr(self, unary_expr: UnaryExpr) -> Any:
+        return apply_unary(unary_expr.op, self.visit(unary_expr.expr))
+
+    def visit_binary_expr(self, binary_expr: BinaryExpr) -> Any:
+        op: BinaryOp = binary_expr.op
+        lhs = self.visit(binary_expr.lhs)
+        if op is BinaryOp.And:
+            return 1 if lhs != 0 and self.visit(binary_expr.rhs) != 0 else 0
+        if op is BinaryOp.Or:
+            return 1 if lhs != 0 or self.visit(binary_expr.rhs) != 0 else 0
+        rhs = self.visit(binary_expr.rhs)
+        try:
+            return apply_binary(op, lhs, rhs)
+        except ZeroDivisionError:
+            raise EvalError("Division by zero.", binary_expr)
+
+    def visit_literal_expr(self, literal_expr: LiteralExpr) -> Any:
+        return literal_expr.value
+
+    def visit_group_expr(self, group_expr: GroupExpr) -> Any:
+        return self.visit(group_expr.expr)
+
+    def visit_variable_expr(self, variable_expr: VariableExpr) -> Any:
+        name: str = variable_expr.name.get_identifier_data() # type: ignore
+        env = self.env.find(name)
+        if env == None:
+            raise EvalError(f"Undefined variable '{name}'.", variable_expr)
+        return env.values[name]
+
+    # ------------------------------ Statements ------------------------------
+    def visit_block_stmt(self, block_stmt: BlockStmt) -> None:
+        previous: Environment = self.env
+        self.env = Environment(previous)
+        try:
+            visit: Callable[[ASTNode], Any] = self.visit
+            for elem in block_stmt.elems:
+                visit(elem)
+        finally:
+            self.env = previous
+
+    def visit_expr_stmt(self, expr_stmt: ExprStmt) -> None:
+        self.visit(expr_stmt.expr)
+
+    def visit_if_stmt(self, if_stmt: IfStmt) -> None:
+        if self.visit(if_stmt.cond) != 0:
+            self.visit(if_stmt.thenbranch)
+        elif if_stmt.elsebranch != None:
+            self.visit(if_stmt.elsebranch)
+
+    def visit_while_stmt(self, while_stmt: WhileStmt) -> None:
+        visit = self.visit
+        while visit(while_stmt.cond) != 0:
+            visit(while_stmt.body)
+
+    def visit_return_stmt(self, return_stmt: ReturnStmt) -> None:
+        if return_stmt.cond != None and self.visit(return_stmt.cond) == 0:
+            return
+        raise ReturnValue(self.visit(return_stmt.expr) if return_stmt.expr != None else 0)
+
+    # ------------------------------ Declarations ------------------------------
+    def visit_invalid_decl(self, invalid_decl: InvalidDecl) -> None:
+        raise EvalError("Cannot evaluate an invalid declaration.", invalid_decl)
+
+    def visit_let(self, let_decl: LetDecl) -> None:
+        value = self.visit(let_decl.initializer) if let_decl.initializer != None else 0
+        self.env.define(let_decl.name.get_identifier_data(), value) # type: ignore
+
+    def visit_func(self, func_decl: FuncDecl) -> None:
+        function = Function(func_decl)
+        self.env.define(function.name, function)
+
+    def visit_class(self, class_decl: ClassDecl) -> None:
+        raise EvalError("Classes cannot be evaluated.", class_decl)
@@ -0,0 +1,60 @@
+"""Instructions of the bytecode run by `VM`.
+
+Every instruction is one word of a `CodeObject`: the opcode in the low
+`OPCODE_BITS` bits and a signed argument above them. Jump targets are
+instruction indices.
+"""
+
+OPCODE_BITS = 8
+OPCODE_MASK = (1 << OPCODE_BITS) - 1
+
+# Largest argument that fits in a word next to the opcode.
+MAX_ARG = (1 << (63 - OPCODE_BITS)) - 1
+
+LOAD_LOCAL      = 0     # push locals[arg]
+STORE_LOCAL     = 1     # pop into locals[arg]
+LOAD_GLOBAL     = 2     # push globals[arg]
+STORE_GLOBAL    = 3     # pop into globals[arg]
+PUSH_INT        = 4     # push arg
+LOAD_CONST      = 5     # push constants[arg]
+POP             = 6     # drop top
+
+ADD             = 7     # replace the two top values by the result
+SUB             = 8
+MUL             = 9
+DIV             = 10
+LESS            = 11
+GREATER         = 12
+LESS_EQ         = 13
+GREATER_EQ      = 14
+EQ              = 15
+NOT_EQ          = 16
+
+NEGATE          = 17    # replace top by the result
+NOT             = 18
+BOOL            = 19    # replace top by 1 if it is not 0, else 0
+
+JUMP            = 20    # continue at arg
+JUMP_IF_FALSE   = 21    # pop, continue at arg if it was 0
+JUMP_IF_TRUE    = 22    # pop, continue at arg if it was not 0
+
+CALL            = 23    # call the function below arg arguments with them
+RETURN          = 24    # pop the result and return it to the caller
+
+OPCODE_COUNT    = 25
+
+OPCODE_NAMES: list[str] = [
+    'LOAD_LOCAL', 'STORE_LOCAL', 'LOAD_GLOBAL', 'STORE_GLOBAL', 'PUSH_INT', 'LOAD_CONST',
+    'POP', 'ADD', 'SUB', 'MUL', 'DIV', 'LESS', 'GREATER', 'LESS_EQ', 'GREATER_EQ', 'EQ',
+    'NOT_EQ', 'NEGATE', 'NOT', 'BOOL', 'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE', 'CALL',
+    'RETURN',
+]
+
+# Instructions whose argument is a jump target.
+JUMPS = frozenset({JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE})
+
+# Instructions that ignore their argument.
+NO_ARG = frozenset({
+    POP, ADD, SUB, MUL, DIV, LESS, GREATER, LESS_EQ, GREATER_EQ, EQ, NOT_EQ,
+    NEGATE, NOT, BOOL, RETURN,
+})
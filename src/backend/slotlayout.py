@@ -0,0 +1,56 @@
+from typing import Optional
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import FuncDecl
+from sema.resolution import Resolution
+
+
+class SlotLayout:
+    """Places the variables of one function, or of the top-level code, in
+    one flat array of local slots.
+
+    The scopes of the function are laid out one after the other as they
+    are opened, and a block's slots are reused once it is closed.
+    Variables outside of them are globals, addressed by their global slot.
+    """
+
+    def __init__(self, resolution: Resolution) -> None:
+        self.resolution = resolution
+        # (scope node, first slot) of the open scopes.
+        self.scopes: list[tuple[ASTNode, int]] = []
+        self.next_slot: int = 0
+        self.nlocals: int = 0
+
+    def open_scope(self, node: ASTNode) -> None:
+        self.scopes.append((node, self.next_slot))
+        self.next_slot += self.resolution.frame_sizes[node]
+        self.nlocals = max(self.nlocals, self.next_slot)
+
+    def close_scope(self) -> None:
+        self.next_slot = self.scopes.pop()[1]
+
+    def in_function(self) -> bool:
+        return bool(self.scopes) and type(self.scopes[0][0]) is FuncDecl
+
+    def use(self, node: ASTNode) -> Optional[tuple[bool, int]]:
+        """Returns (is local, slot) of the variable `node` reads or writes,
+        None if it did not resolve.
+        """
+        address = self.resolution.addresses.get(node)
+        if address == None:
+            return None
+        depth, slot = address
+        if depth < len(self.scopes):
+            return True, self.scopes[-1 - depth][1] + slot
+        return False, slot
+
+    def declaration(self, node: ASTNode) -> Optional[tuple[bool, int]]:
+        """Returns (is local, slot) of the variable `node` declares in the
+        innermost open scope.
+        """
+        slot: Optional[int] = self.resolution.slots.get(node)
+        if slot == None:
+            return None
+        if self.scopes:
+            return True, self.scopes[-1][1] + slot
+        return False, slot
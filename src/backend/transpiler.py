@@ -0,0 +1,339 @@
+"""Lowers programs to Python code objects."""
+
+from __future__ import annotations
+import ast
+import sys
+import warnings
+from types import CodeType
+from typing import Any, Iterable, Optional, TextIO
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    Expr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.nodevisitor import NodeVisitor
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, WhileStmt
+from backend.compileerror import CompileError
+from backend.evalerror import EvalError
+from backend.slotlayout import SlotLayout
+from core.ops import COMPARISON_OPS, BinaryOp, UnaryOp, divide
+from lexer.lexer import Lexer
+from lexer.token import Source
+from parser.parser import Parser
+from sema.resolution import Resolution
+from sema.resolver import Resolver
+from sema.semaerror import SemaError
+
+
+PROGRAM_FILENAME = '<program>'
+
+# Reported for programs nesting deeper than the recursion limit allows to
+# parse, lower or compile.
+NESTED_TOO_DEEPLY = "Program is nested too deeply to compile."
+
+# Names of the generated module. Globals of the program are prefixed with
+# GLOBAL_PREFIX, locals are named by slot, neither can collide with these.
+MAIN_NAME = '_main'
+DIVIDE_NAME = '_divide'
+GLOBAL_PREFIX = 'g_'
+LOCAL_PREFIX = 'l'
+
+PYTHON_OPS: dict[BinaryOp, Any] = {
+    BinaryOp.Add:       ast.Add,
+    BinaryOp.Sub:       ast.Sub,
+    BinaryOp.Mul:       ast.Mult,
+    BinaryOp.Less:      ast.Lt,
+    BinaryOp.Greater:   ast.Gt,
+    BinaryOp.LessEq:    ast.LtE,
+    BinaryOp.GreaterEq: ast.GtE,
+    BinaryOp.EqEq:      ast.Eq,
+    BinaryOp.NotEq:     ast.NotEq,
+}
+
+
+def constant(value: int) -> ast.expr:
+    return ast.Constant(value)
+
+
+def name(identifier: str, store: bool = False) -> ast.expr:
+    return ast.Name(identifier, ast.Store() if store else ast.Load())
+
+
+def as_int(test: ast.expr) -> ast.expr:
+    """Turns a condition into 1 or 0."""
+    return ast.IfExp(test, constant(1), constant(0))
+
+
+def function_def(identifier: str, params: list[str], body: list[ast.stmt]) -> ast.stmt:
+    args = ast.arguments(posonlyargs=[], args=[ast.arg(param) for param in params],
+                         kwonlyargs=[], kw_defaults=[], defaults=[])
+    fields: dict[str, Any] = {}
+    if 'type_params' in ast.FunctionDef._fields:
+        fields['type_params'] = []
+    return ast.FunctionDef(identifier, args, body, [], None, **fields)
+
+
+class Transpiler(NodeVisitor[Any]):
+    """Lowers a program to a Python module, so that CPython runs its loops,
+    branches and calls itself.
+
+    The top-level code becomes the function `_main`, each function a Python
+    function. Variables are laid out like in the bytecode `Compiler`, see
+    `SlotLayout`: locals become Python locals named by their slot and
+    globals module globals named after the variable. Conditions of `if`,
+    `while`, `and`, `or`, `!` and `return ... if` are lowered to Python
+    truth tests and only turned into 1 or 0 where their value is used, so
+    `and` and `or` keep short-circuiting. Division calls `divide`.
+
+    Semantics follow `Evaluator`, except that errors Python detects itself,
+    like wrong argument counts, are reported with Python's messages.
+    """
+
+    def transpile(self, decls: Iterable[ASTNode]) -> ast.Module:
+        """Returns the module of the program. Raises CompileError when it
+        has undefined names or constructs that cannot be lowered.
+        """
+        decls = list(decls)
+        self.resolution: Resolution = Resolver().resolve(decls)
+        self.errors: list[SemaError] = list(self.resolution.errors)
+        self.layout = SlotLayout(self.resolution)
+        # Globals the current function stores to.
+        self.stored: set[str] = set()
+
+        body: list[ast.stmt] = self.lower_block(decls)
+        if self.stored:
+            body.insert(0, ast.Global(sorted(self.stored)))
+        if self.errors:
+            raise CompileError(self.errors)
+
+        module = ast.Module([
+            function_def(MAIN_NAME, [], body or [ast.Pass()]),
+            ast.Expr(ast.Call(name(MAIN_NAME), [], [])),
+        ], [])
+        return ast.fix_missing_locations(module)
+
+    def compile(self, decls: Iterable[ASTNode]) -> CodeType:
+        """Returns the code object of the program, see `run`. Raises
+        CompileError as `transpile` does, and for programs nested deeper
+        than CPython compiles, e.g. more than 20 nested loops.
+        """
+        try:
+            module: ast.Module = self.transpile(decls)
+            with warnings.catch_warnings():
+                # CPython warns about calls of literals, e.g. `4(1)`, which
+                # are errors only once they run.
+                warnings.simplefilter('ignore', SyntaxWarning)
+                return compile(module, PROGRAM_FILENAME, 'exec')
+        except SyntaxError as e:
+            raise CompileError([SemaError(f"Cannot compile: {e.msg}.", None)])
+        except RecursionError:
+            raise CompileError([SemaError(NESTED_TOO_DEEPLY, None)])
+
+    def error(self, message: str, node: Optional[ASTNode] = None) -> None:
+        token = getattr(node, 'name', None)
+        self.errors.append(SemaError(message, token))
+
+    def lower_block(self, elems: list[ASTNode]) -> list[ast.stmt]:
+        body: list[ast.stmt] = []
+        for elem in elems:
+            body.extend(self.visit(elem))
+        return body
+
+    def variable(self, location: Optional[tuple[bool, int]], store: bool = False) -> Optional[str]:
+        """Returns the Python name of a variable location, None if it did
+        not resolve.
+        """
+        if location == None:
+            return None
+        is_local, slot = location
+        if is_local:
+            return f"{LOCAL_PREFIX}{slot}"
+        identifier = GLOBAL_PREFIX + self.resolution.global_names[slot]
+        if store:
+            self.stored.add(identifier)
+        return identifier
+
+    def store(self, location: Optional[tuple[bool, int]], value: ast.expr) -> list[ast.stmt]:
+        target: Optional[str] = self.variable(location, True)
+        if target == None:
+            return [] # reported by the resolver
+        return [ast.Assign([name(target, True)], value)]
+
+    def test(self, expr: Expr) -> ast.expr:
+        """Lowers `expr` as a condition: any value Python considers true
+        where the language considers it not 0.
+        """
+        if type(expr) is GroupExpr:
+            return self.test(expr.expr) # type: ignore
+        if type(expr) is UnaryExpr and expr.op is UnaryOp.Not: # type: ignore
+            return ast.UnaryOp(ast.Not(), self.test(expr.expr)) # type: ignore
+        if type(expr) is BinaryExpr:
+            op: BinaryOp = expr.op # type: ignore
+            if op in COMPARISON_OPS:
+                return ast.Compare(self.visit(expr.lhs), [PYTHON_OPS[op]()], # type: ignore
+                                   [self.visit(expr.rhs)]) # type: ignore
+            if op is BinaryOp.And or op is BinaryOp.Or:
+                return ast.BoolOp(ast.And() if op is BinaryOp.And else ast.Or(),
+                                  [self.test(expr.lhs), self.test(expr.rhs)]) # type: ignore
+        return self.visit(expr)
+
+    # ------------------------------ Expressions ------------------------------
+    def visit_invalid_expr(self, invalid_expr: InvalidExpr) -> ast.expr:
+        self.error("Cannot compile an invalid expression.")
+        return constant(0)
+
+    def visit_assign_expr(self, assign_expr: AssignExpr) -> ast.expr:
+        value: ast.expr = self.visit(assign_expr.value)
+        target: Optional[str] = self.variable(self.layout.use(assign_expr), True)
+        if target == None:
+            return value # reported by the resolver
+        return ast.NamedExpr(name(target, True), value)
+
+    def visit_call_expr(self, call_expr: CallExpr) -> ast.expr:
+        return ast.Call(self.visit(call_expr.callee),
+                        [self.visit(arg) for arg in call_expr.args], [])
+
+    def visit_unary_expr(self, unary_expr: UnaryExpr) -> ast.expr:
+        if unary_expr.op is UnaryOp.Negate:
+            return ast.UnaryOp(ast.USub(), self.visit(unary_expr.expr))
+        return ast.IfExp(self.test(unary_expr.expr), constant(0), constant(1))
+
+    def visit_binary_expr(self, binary_expr: BinaryExpr) -> ast.expr:
+        op: BinaryOp = binary_expr.op
+        if op in COMPARISON_OPS or op is BinaryOp.And or op is BinaryOp.Or:
+            return as_int(self.test(binary_expr))
+        lhs: ast.expr = self.visit(binary_expr.lhs)
+        rhs: ast.expr = self.visit(binary_expr.rhs)
+        if op is BinaryOp.Div:
+            return ast.Call(name(DIVIDE_NAME), [lhs, rhs], [])
+        if op is BinaryOp.Xor:
+            return as_int(ast.Compare(ast.Compare(lhs, [ast.NotEq()], [constant(0)]), [ast.NotEq()],
+                                      [ast.Compare(rhs, [ast.NotEq()], [constant(0)])]))
+        return ast.BinOp(lhs, PYTHON_OPS[op](), rhs)
+
+    def visit_literal_expr(self, literal_expr: LiteralExpr) -> ast.expr:
+        return constant(literal_expr.value)
+
+    def visit_group_expr(self, group_expr: GroupExpr) -> ast.expr:
+        return self.visit(group_expr.expr)
+
+    def visit_variable_expr(self, variable_expr: VariableExpr) -> ast.expr:
+        identifier: Optional[str] = self.variable(self.layout.use(variable_expr))
+        if identifier == None:
+            return constant(0) # reported by the resolver
+        return name(identifier)
+
+    # ------------------------------ Statements ------------------------------
+    def visit_block_stmt(self, block_stmt: BlockStmt) -> list[ast.stmt]:
+        self.layout.open_scope(block_stmt)
+        body: list[ast.stmt] = self.lower_block(block_stmt.elems)
+        self.layout.close_scope()
+        return body
+
+    def visit_expr_stmt(self, expr_stmt: ExprStmt) -> list[ast.stmt]:
+        if type(expr_stmt.expr) is AssignExpr:
+            assign: AssignExpr = expr_stmt.expr # type: ignore
+            return self.store(self.layout.use(assign), self.visit(assign.value))
+        return [ast.Expr(self.visit(expr_stmt.expr))]
+
+    def visit_if_stmt(self, if_stmt: IfStmt) -> list[ast.stmt]:
+        thenbranch: list[ast.stmt] = self.visit(if_stmt.thenbranch)
+        elsebranch: list[ast.stmt] = (self.visit(if_stmt.elsebranch)
+                                      if if_stmt.elsebranch != None else [])
+        return [ast.If(self.test(if_stmt.cond), thenbranch or [ast.Pass()], elsebranch)]
+
+    def visit_while_stmt(self, while_stmt: WhileStmt) -> list[ast.stmt]:
+        body: list[ast.stmt] = self.visit(while_stmt.body)
+        return [ast.While(self.test(while_stmt.cond), body or [ast.Pass()], [])]
+
+    def visit_return_stmt(self, return_stmt: ReturnStmt) -> list[ast.stmt]:
+        if not self.layout.in_function():
+            self.error("Cannot return from top-level code.")
+        value: ast.expr = (self.visit(return_stmt.expr) if return_stmt.expr != None
+                           else constant(0))
+        if return_stmt.cond == None:
+            return [ast.Return(value)]
+        return [ast.If(self.test(return_stmt.cond), [ast.Return(value)], [])]
+
+    # ------------------------------ Declarations ------------------------------
+    def visit_invalid_decl(self, invalid_decl: InvalidDecl) -> list[ast.stmt]:
+        self.error("Cannot compile an invalid declaration.")
+        return []
+
+    def visit_let(self, let_decl: LetDecl) -> list[ast.stmt]:
+        value: ast.expr = (self.visit(let_decl.initializer) if let_decl.initializer != None
+                           else constant(0))
+        return self.store(self.layout.declaration(let_decl), value)
+
+    def visit_func(self, func_decl: FuncDecl) -> list[ast.stmt]:
+        outer = (self.layout, self.stored)
+        self.layout = SlotLayout(self.resolution)
+        self.stored = set()
+        self.layout.open_scope(func_decl)
+        body: list[ast.stmt] = self.visit(func_decl.body)
+        body.append(ast.Return(constant(0)))
+        if self.stored:
+            body.insert(0, ast.Global(sorted(self.stored)))
+        self.layout, self.stored = outer
+
+        target: Optional[str] = self.variable(self.layout.declaration(func_decl), True)
+        if target == None:
+            return [] # reported by the resolver
+        params: list[str] = [f"{LOCAL_PREFIX}{slot}" for slot in range(len(func_decl.params))]
+        # Python reports wrong argument counts with the qualified name.
+        qualname = ast.Attribute(name(target), '__qualname__', ast.Store())
+        return [
+            function_def(target, params, body),
+            ast.Assign([qualname], ast.Constant(func_decl.name.get_identifier_data())),
+        ]
+
+    def visit_class(self, class_decl: ClassDecl) -> list[ast.stmt]:
+        self.error("Classes cannot be compiled.", class_decl)
+        return []
+
+
+def compile_source(source: Source) -> CodeType:
+    """Lexes, parses and lowers the program in `source`. Raises CompileError
+    with its syntax errors, or as `Transpiler.transpile` does.
+    """
+    try:
+        result = Parser(Lexer(source).lex_buffer()).parse()
+    except RecursionError:
+        raise CompileError([SemaError(NESTED_TOO_DEEPLY, None)])
+    if result.iserror:
+        raise CompileError(result.errors)
+    return Transpiler().compile(result.data) # type: ignore
+
+
+def run(code: CodeType, out: TextIO = sys.stdout) -> None:
+    """Runs a program compiled by `Transpiler.compile`. Raises EvalError on
+    errors at run time.
+    """
+    def builtin_print(*args: Any) -> int:
+        print(*args, file=out)
+        return 0
+
+    namespace: dict[str, Any] = {
+        '__builtins__': {},
+        DIVIDE_NAME: divide,
+        GLOBAL_PREFIX + 'print': builtin_print,
+    }
+    try:
+        exec(code, namespace)
+    except ZeroDivisionError:
+        raise EvalError("Division by zero.")
+    except NameError as e:
+        raise EvalError(f"Undefined variable '{e.name[len(GLOBAL_PREFIX):]}'.")
+    except TypeError as e:
+        raise EvalError(str(e))
+    except RecursionError:
+        raise EvalError("Maximum recursion depth exceeded.")
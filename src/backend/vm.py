@@ -0,0 +1,157 @@
+"""Stack machine running the bytecode of `Compiler`."""
+
+from __future__ import annotations
+import sys
+from typing import Any, Callable, Optional, TextIO
+
+from backend import opcodes as op
+from backend.codeobject import CodeObject
+from backend.evalerror import EvalError
+from core.ops import divide
+
+
+class VM:
+    """Runs compiled programs.
+
+    One loop executes all code: calls push the caller's state on a frame
+    stack instead of recursing, so recursion depth is only limited by
+    memory. Values live on one operand stack shared by all frames. With
+    `profile` every executed instruction is counted in the `counts` of its
+    `CodeObject`, see `vmprofile`.
+
+    Args:
+        out: Stream `print` writes to.
+        profile: Count executed instructions.
+    """
+
+    def __init__(self, out: TextIO = sys.stdout, profile: bool = False) -> None:
+        self.out = out
+        self.profile = profile
+        self.builtins: dict[str, Callable[[list[Any]], Any]] = {'print': self.builtin_print}
+
+    def builtin_print(self, args: list[Any]) -> int:
+        print(*args, file=self.out)
+        return 0
+
+    def run(self, main: CodeObject) -> None:
+        # Globals that were never assigned hold None.
+        globals_: list[Any] = [self.builtins.get(name) for name in main.global_names]
+
+        current: CodeObject = main
+        code = main.words
+        constants: list[Any] = main.constants
+        locals_: list[Any] = [0] * main.nlocals
+        counts: Optional[list[int]] = main.counts if self.profile else None
+        pc: int = 0
+        stack: list[Any] = []
+        push = stack.append
+        pop = stack.pop
+        # (code object, locals, return pc) of the callers.
+        frames: list[tuple[CodeObject, list[Any], int]] = []
+
+        while True:
+            word: int = code[pc]
+            pc += 1
+            opcode: int = word & 255
+            if counts != None:
+                counts[opcode] += 1
+
+            if opcode == op.LOAD_LOCAL:
+                push(locals_[word >> 8])
+            elif opcode == op.PUSH_INT:
+                push(word >> 8)
+            elif opcode == op.STORE_LOCAL:
+                locals_[word >> 8] = pop()
+            elif opcode == op.JUMP_IF_FALSE:
+                if pop() == 0:
+                    pc = word >> 8
+            elif opcode == op.LOAD_GLOBAL:
+                value = globals_[word >> 8]
+                if value is None:
+                    raise EvalError(f"Undefined variable '{current.global_names[word >> 8]}'.")
+                push(value)
+            elif opcode == op.ADD:
+                rhs = pop()
+                stack[-1] += rhs
+            elif opcode == op.SUB:
+                rhs = pop()
+                stack[-1] -= rhs
+            elif opcode == op.POP:
+                pop()
+            elif opcode == op.JUMP:
+                pc = word >> 8
+            elif opcode == op.LESS:
+                rhs = pop()
+                stack[-1] = 1 if stack[-1] < rhs else 0
+            elif opcode == op.GREATER:
+                rhs = pop()
+                stack[-1] = 1 if stack[-1] > rhs else 0
+            elif opcode == op.LESS_EQ:
+                rhs = pop()
+                stack[-1] = 1 if stack[-1] <= rhs else 0
+            elif opcode == op.GREATER_EQ:
+                rhs = pop()
+                stack[-1] = 1 if stack[-1] >= rhs else 0
+            elif opcode == op.EQ:
+                rhs = pop()
+                stack[-1] = 1 if stack[-1] == rhs else 0
+            elif opcode == op.NOT_EQ:
+                rhs = pop()
+                stack[-1] = 1 if stack[-1] != rhs else 0
+            elif opcode == op.MUL:
+                rhs = pop()
+                stack[-1] *= rhs
+            elif opcode == op.DIV:
+                rhs = pop()
+                if rhs == 0:
+                    raise EvalError("Division by zero.")
+                stack[-1] = divide(stack[-1], rhs)
+            elif opcode == op.CALL:
+                argc: int = word >> 8
+                base: int = len(stack) - argc
+                callee = stack[base - 1]
+                if type(callee) is CodeObject:
+                    if argc != callee.arity:
+                        raise EvalError(f"{callee.name} takes {callee.arity} arguments "
+                                        f"but {argc} were given.")
+                    frames.append((current, locals_, pc))
+                    locals_ = stack[base:]
+                    if callee.nlocals > argc:
+                        locals_.extend([0] * (callee.nlocals - argc))
+                    del stack[base - 1:]
+                    current = callee
+                    code = callee.words
+                    constants = callee.constants
+                    if counts != None:
+                        counts = callee.counts
+                    pc = 0
+                elif callable(callee):
+                    args = stack[base:]
+                    del stack[base - 1:]
+                    push(callee(args))
+                else:
+                    raise EvalError("Can only call functions.")
+            elif opcode == op.RETURN:
+                if not frames:
+                    pop()
+                    return
+                current, locals_, pc = frames.pop()
+                code = current.words
+                constants = current.constants
+                if counts != None:
+                    counts = current.counts
+            elif opcode == op.JUMP_IF_TRUE:
+                if pop() != 0:
+                    pc = word >> 8
+            elif opcode == op.STORE_GLOBAL:
+                globals_[word >> 8] = pop()
+            elif opcode == op.LOAD_CONST:
+                push(constants[word >> 8])
+            elif opcode == op.NEGATE:
+                stack[-1] = -stack[-1]
+            elif opcode == op.NOT:
+                stack[-1] = 1 if stack[-1] == 0 else 0
+            elif opcode == op.BOOL:
+                stack[-1] = 1 if stack[-1] != 0 else 0
+            else:
+                raise EvalError(f"Invalid opcode {opcode}.")
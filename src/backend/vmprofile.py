@@ -0,0 +1,39 @@
+"""Reports of the instruction counts gathered by a profiling `VM`."""
+
+from backend.codeobject import CodeObject
+from backend.opcodes import OPCODE_COUNT, OPCODE_NAMES
+
+
+def reset_counts(main: CodeObject) -> None:
+    for code in main.functions():
+        code.counts = [0] * OPCODE_COUNT
+
+
+def opcode_counts(main: CodeObject) -> list[tuple[str, int]]:
+    """Returns (opcode name, executions) over all code of a program, most
+    executed first.
+    """
+    totals: list[int] = [0] * OPCODE_COUNT
+    for code in main.functions():
+        for opcode, count in enumerate(code.counts):
+            totals[opcode] += count
+    return sorted(((OPCODE_NAMES[opcode], count) for opcode, count in enumerate(totals)
+                   if count), key=lambda entry: -entry[1])
+
+
+def function_counts(main: CodeObject) -> list[tuple[str, int]]:
+    """Returns (function name, executed instructions), most first."""
+    return sorted(((code.name, sum(code.counts)) for code in main.functions()
+                   if any(code.counts)), key=lambda entry: -entry[1])
+
+
+def format_profile(main: CodeObject, top: int = 10) -> str:
+    """Formats the `top` opcodes and functions by executed instructions."""
+    by_opcode = opcode_counts(main)
+    total: int = sum(count for _, count in by_opcode) or 1
+    lines: list[str] = [f"{total} instructions"]
+    for name, count in by_opcode[:top]:
+        lines.append(f"  {name:14} {count:12d} {100 * count / total:5.1f}%")
+    for name, count in function_counts(main)[:top]:
+        lines.append(f"  {name:14} {count:12d} {100 * count / total:5.1f}%")
+    return '\n'.join(lines)
@@ -0,0 +1,40 @@
+"""Batch parse throughput across worker processes.
+
+Run from `src/` with `python -m bench.batch [files] [jobs ...]`, e.g.
+`python -m bench.batch 10000 1 2 4 8`. The files are generated into a
+temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from bench.corpus import generate_program
+from driver.batch import collect_files, parse_files
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    jobs_list = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4, 8]
+
+    with tempfile.TemporaryDirectory() as root:
+        for index in range(count):
+            directory = os.path.join(root, f"pkg{index % 16}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"mod{index}.ar"), 'w') as file:
+                file.write(generate_program(2000, seed=index))
+
+        files = collect_files([root])
+        baseline = 0.0
+        for jobs in jobs_list:
+            start = time.perf_counter()
+            tokens = sum(result.tokens for result in parse_files(files, jobs))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"jobs {jobs:2d}: {len(files)} files {tokens} tokens {elapsed:7.3f}s "
+                  f"{tokens / elapsed:10.0f} tok/s speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
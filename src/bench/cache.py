@@ -0,0 +1,52 @@
+"""Parse cache: cold versus warm runs over a tree of files, and eviction
+under a small size cap.
+
+Run from `src/` with `python -m bench.cache [files]`.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from bench.corpus import generate_program
+from driver import batch
+from driver.batch import collect_files, parse_files
+from driver.parsecache import ParseCache
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    with tempfile.TemporaryDirectory() as root:
+        sources = os.path.join(root, 'src')
+        cache_dir = os.path.join(root, 'cache')
+        os.makedirs(sources)
+        for index in range(count):
+            with open(os.path.join(sources, f"mod{index}.ar"), 'w') as file:
+                file.write(generate_program(4000, seed=index))
+        files = collect_files([sources])
+
+        for name, directory in (('no cache', None), ('cold', cache_dir), ('warm', cache_dir)):
+            start = time.perf_counter()
+            hits = sum(result.cached for result in parse_files(files, 1, cache_dir=directory))
+            print(f"{name:8}: {time.perf_counter() - start:7.3f}s {hits} hits")
+
+        cache: ParseCache = batch.CACHES[cache_dir]
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"entries {len(entries)}, {total / 1e6:.2f} MB, "
+              f"{total / len(entries) / 1024:.1f} KB each")
+
+        small = ParseCache(os.path.join(root, 'small'), max_bytes=total // 4)
+        for path in files:
+            with open(path, 'rb') as file:
+                data = file.read()
+            if small.get(data) == None:
+                small.put(data, cache.get(data))
+        print(f"capped at {small.max_bytes / 1e6:.2f} MB: "
+              f"{small.scan_size() / 1e6:.2f} MB in {len(small.entries())} entries")
+
+
+if __name__ == '__main__':
+    main()
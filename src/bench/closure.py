@@ -0,0 +1,55 @@
+"""Closure compilation against the tree-walking evaluator and the bytecode
+VM on the programs of `bench.vm`, mostly while loops.
+
+Run from `src/` with `python -m bench.closure [scale]`.
+"""
+
+import gc
+import io
+import sys
+
+from backend.closure import ClosureCompiler
+from backend.compiler import Compiler
+from backend.evaluator import Evaluator
+from backend.vm import VM
+from bench.vm import programs, timed
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def best(function, repeat: int = 3) -> float:
+    return min(timed(function) for _ in range(repeat))
+
+
+def main() -> None:
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+
+    for name, data in programs(scale):
+        decls = Parser(Lexer(data).lex_buffer()).parse().data
+        closures = ClosureCompiler(io.StringIO())
+        compile_time = timed(lambda: closures.compile(decls))
+        # Every function is reused from the first compilation.
+        recompile_time = timed(lambda: closures.compile(decls))
+        compiled, reused = closures.compiled, closures.reused
+        main_code = Compiler().compile(decls)
+
+        gc.disable()
+        evaluated = io.StringIO()
+        eval_time = best(lambda: Evaluator(evaluated).run(decls))
+        vm_time = best(lambda: VM(io.StringIO()).run(main_code))
+        closures.out = io.StringIO()
+        run = closures.compile(decls)
+        closure_time = best(run)
+        gc.enable()
+
+        # Each of the repeated runs printed once.
+        same = evaluated.getvalue() == closures.out.getvalue()
+        print(f"{name}: {'same output' if same else 'OUTPUT DIFFERS'}")
+        print(f"  evaluator {eval_time:7.3f}s  closures {closure_time:7.3f}s  "
+              f"{eval_time / closure_time:5.2f}x  (vm {vm_time:.3f}s)")
+        print(f"  compile {compile_time:.4f}s, {compiled} functions  "
+              f"recompile {recompile_time:.4f}s, {reused} reused")
+
+
+if __name__ == '__main__':
+    main()
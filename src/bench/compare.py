@@ -0,0 +1,27 @@
+"""Structural comparison of parse trees for the benchmarks."""
+
+import enum
+from typing import Any
+
+from asttypes.astnode import ASTNode
+from asttypes.structural import node_fields
+from lexer.token import Token
+
+
+def describe(node: Any) -> Any:
+    """Returns a hashable description of `node` that ignores object identity
+    and token offsets, so trees built by different parser modes compare
+    equal when they have the same shape and contents. Lazy bodies are
+    parsed.
+    """
+    if isinstance(node, ASTNode):
+        fields = [(name, getattr(node, name)) for name in node_fields(type(node))]
+        return (type(node).__name__,) + tuple(
+            (name, describe(value)) for name, value in fields)
+    if isinstance(node, Token):
+        return str(node)
+    if isinstance(node, (list, tuple)):
+        return tuple(describe(elem) for elem in node)
+    if isinstance(node, enum.Enum):
+        return str(node)
+    return node
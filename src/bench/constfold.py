@@ -0,0 +1,91 @@
+"""Constant folding: node count reduction and evaluation time before and
+after folding.
+
+Run from `src/` with `python -m bench.constfold [kilobytes]`.
+"""
+
+import gc
+import io
+import sys
+import time
+
+from asttypes.walker import preorder
+from backend.evalerror import EvalError
+from backend.evaluator import Evaluator
+from bench.corpus import generate_control_program, generate_expr_program
+from lexer.lexer import Lexer
+from opt.constfold import ConstantFolder
+from parser.parser import Parser
+
+
+# Definitions of the names used by the generated expressions.
+PRELUDE = """
+let a = 7
+let b = -3
+let c = 12
+let count = 5
+let total = 100
+func f(x, y) { return x * 2 - y }
+func g(x, y, z) { return x + y - z }
+"""
+
+def parse(data: str) -> list:
+    return Parser(Lexer(data).lex_buffer()).parse().data
+
+
+def evaluate(decls: list) -> tuple[dict, int, float]:
+    """Evaluates each declaration on its own, returns the globals, the
+    number of declarations that failed and the time taken.
+    """
+    evaluator = Evaluator(io.StringIO())
+    evaluator.run(parse(PRELUDE))
+    failed = 0
+    start = time.perf_counter()
+    for decl in decls:
+        try:
+            evaluator.run([decl])
+        except EvalError:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    return {name: str(value) for name, value in evaluator.globals.values.items()
+            if name != 'print'}, failed, elapsed
+
+
+def control_program(size: int) -> str:
+    """Control flow heavy functions with a call of each one that is not in
+    a class.
+    """
+    data = generate_control_program(size)
+    calls = [f"h{index}(20, 1)\n" for index in range(0, data.count('\n'), 2)
+             if index % 10 != 0 and f"func h{index}(" in data]
+    return data + ''.join(calls)
+
+
+def main() -> None:
+    kilobytes = float(sys.argv[1]) if len(sys.argv) > 1 else 256.0
+    size = int(kilobytes * 1024)
+
+    for name, data in [('expressions', generate_expr_program(size)),
+                       ('control', control_program(size))]:
+        decls = parse(data)
+        gc.disable()
+        start = time.perf_counter()
+        folded = ConstantFolder().fold(decls)
+        fold_time = time.perf_counter() - start
+        gc.enable()
+
+        before = sum(1 for _ in preorder(decls))
+        after = sum(1 for _ in preorder(folded))
+        values, failed, plain_time = evaluate(decls)
+        folded_values, folded_failed, folded_time = evaluate(folded)
+        same = values == folded_values and failed == folded_failed
+
+        print(f"{name}: {len(decls)} decls, {before} -> {after} nodes "
+              f"({100 * (before - after) / before:.1f}% fewer), fold {fold_time:.3f}s, "
+              f"{'same results' if same else 'RESULTS DIFFER'}")
+        print(f"  evaluate {plain_time:7.3f}s  folded {folded_time:7.3f}s  "
+              f"{plain_time / folded_time:5.2f}x  ({failed} failed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Synthetic `.ar` sources used by the benchmarks."""
+
+import random
+
+
+def generate_func(rng: random.Random, index: int) -> str:
+    """Generates one expression heavy function declaration."""
+    a, b, c = 'a', 'b', 'c'
+    n = rng.randint(1, 999)
+    return (
+        f"func f{index}({a}, {b}, {c}) {{\n"
+        f"    let x{index} = ({a} + {n}) * {b} - {c} / {n % 7 + 1}\n"
+        f"    let y{index} = x{index} <= {n} and {b} != {c} or {a} == {n % 5}\n"
+        f"    let z{index} = g(x{index}, y{index}, -{a}) >= !{b}\n"
+        f"}}\n"
+    )
+
+
+def generate_program(size: int, seed: int = 0) -> str:
+    """Generates a program of at least `size` characters."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    length = 0
+    index = 0
+    while length < size:
+        part = generate_func(rng, index)
+        parts.append(part)
+        length += len(part)
+        index += 1
+    return ''.join(parts)
+
+
+def generate_expr(rng: random.Random, depth: int) -> str:
+    """Generates a random expression using every operator level."""
+    if depth <= 0 or rng.random() < 0.2:
+        choice = rng.random()
+        if choice < 0.4 or depth <= 0:
+            return str(rng.randint(0, 99))
+        if choice < 0.8:
+            return rng.choice(['a', 'b', 'c', 'count', 'total'])
+        return f"f({generate_expr(rng, depth - 1)}, {generate_expr(rng, depth - 1)})"
+
+    ops = ['or', 'and', '==', '!=', '<', '<=', '>', '>=', '+', '-', '*', '/']
+    choice = rng.random()
+    if choice < 0.1:
+        return f"-{generate_expr(rng, depth - 1)}"
+    if choice < 0.2:
+        return f"({generate_expr(rng, depth - 1)})"
+    return f"{generate_expr(rng, depth - 1)} {rng.choice(ops)} {generate_expr(rng, depth - 1)}"
+
+
+def generate_expr_program(size: int, seed: int = 0) -> str:
+    """Generates `let` declarations with expression heavy initializers."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    length = 0
+    index = 0
+    while length < size:
+        part = f"let v{index} = {generate_expr(rng, 4)}\n"
+        parts.append(part)
+        length += len(part)
+        index += 1
+    return ''.join(parts)
+
+
+def generate_control_func(rng: random.Random, index: int) -> str:
+    """Generates a function with loops, branches and returns, and now and
+    then a class around it."""
+    n = rng.randint(1, 99)
+    func = (
+        f"func h{index}(a, b) {{\n"
+        f"    let n = a\n"
+        f"    while (n > 0) {{\n"
+        f"        if (n / 2 * 2 == n) n = n - 1 else {{\n"
+        f"            b = b + n * {n}\n"
+        f"        }}\n"
+        f"        n = n - 1\n"
+        f"    }}\n"
+        f"    return b if b > {n}\n"
+        f"    return -b\n"
+        f"}}\n"
+    )
+    if index % 10 == 0:
+        return f"class C{index} : Base {{\n{func}}}\n"
+    return func
+
+
+def generate_control_program(size: int, seed: int = 0) -> str:
+    """Generates a program of at least `size` characters mixing expression
+    heavy and control flow heavy functions."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    length = 0
+    index = 0
+    while length < size:
+        part = generate_func(rng, index) if index % 2 else generate_control_func(rng, index)
+        parts.append(part)
+        length += len(part)
+        index += 1
+    return ''.join(parts)
+
+
+def generate_runnable_program(size: int, seed: int = 0) -> str:
+    """Generates a program of at least `size` characters that the
+    evaluators can run: functions as in `generate_control_program`
+    without classes, the `g` they call, and a call of each with its result
+    printed.
+    """
+    rng = random.Random(seed)
+    parts: list[str] = ["func g(x, y, z) {\n    return x + y - z\n}\n"]
+    length = 0
+    index = 0
+    while length < size:
+        if index % 2:
+            part = generate_func(rng, index)
+        else:
+            part = generate_control_func(rng, index + 1)
+        parts.append(part)
+        length += len(part)
+        index += 1
+    for call in range(index):
+        name = f"f{call}" if call % 2 else f"h{call + 1}"
+        parts.append(f"print({name}({call % 13}, {call % 5 + 1}, {call % 3}))\n" if call % 2
+                     else f"print({name}({call % 17 + 5}, 1))\n")
+    return ''.join(parts)
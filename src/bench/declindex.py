@@ -0,0 +1,74 @@
+"""Declaration index: building, incremental updates and query latency
+compared with parsing every file per query.
+
+Run from `src/` with `python -m bench.declindex [files]`. The files are
+generated into a temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from asttypes.decl import Decl
+from bench.corpus import generate_control_program
+from driver.batch import collect_files
+from driver.declindex import DeclIndex, top_level_decls
+
+
+def timed(function) -> tuple:
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    with tempfile.TemporaryDirectory() as root:
+        for index in range(count):
+            directory = os.path.join(root, f"pkg{index % 16}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"mod{index}.ar"), 'w') as file:
+                file.write(generate_control_program(2000, seed=index)
+                           .replace('func ', f"func m{index}_")
+                           .replace('class ', f"class K{index}_"))
+        files = collect_files([root])
+        database = os.path.join(root, 'index.db')
+
+        with DeclIndex(database) as index:
+            counts, build = timed(lambda: index.update(files))
+            print(f"build          {build:7.3f}s  {counts[0]} files parsed")
+            counts, noop = timed(lambda: index.update(files))
+            print(f"no changes     {noop:7.3f}s  {counts[1]} unchanged")
+
+            os.utime(files[0])
+            with open(files[1], 'a') as file:
+                file.write("func appended(a, b, c) { return a }\n")
+            counts, edit = timed(lambda: index.update(files))
+            print(f"touch + edit   {edit:7.3f}s  {counts[0]} parsed, {counts[1]} unchanged")
+
+        def scan() -> list:
+            found = []
+            for path in files:
+                with open(path, 'rb') as file:
+                    found += [(path, decl) for decl in top_level_decls(file.read())
+                              if decl[0] == 'appended']
+            return found
+
+        found, scan_time = timed(scan)
+        print(f"query by parsing {scan_time:7.3f}s  {len(found)} found")
+
+        names = [f"m{index}_f{index % 2 * 2 + 1}" for index in range(0, count, max(1, count // 1000))]
+        opened, open_time = timed(lambda: DeclIndex(database))
+        with opened as index:
+            found, query_time = timed(lambda: [index.find(name, Decl.Type.Func) for name in names])
+            hits = sum(1 for entries in found if entries)
+            assert index.find('appended')[0].arity == 3
+        print(f"open index       {open_time * 1e3:7.3f}ms")
+        print(f"query by index   {query_time / len(names) * 1e6:7.1f}us per query, "
+              f"{hits}/{len(names)} found")
+
+
+if __name__ == '__main__':
+    main()
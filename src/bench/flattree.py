@@ -0,0 +1,118 @@
+"""Flat arena AST compared with the object AST: memory, collector pauses,
+a whole-tree pass and pickling.
+
+Run from `src/` with `python -m bench.flattree [megabytes]`.
+"""
+
+import gc
+import pickle
+import sys
+import time
+import tracemalloc
+
+from asttypes import decl, expr, stmt
+from asttypes.astformat import TAG_BINARY_EXPR
+from asttypes.flattree import FlatTree
+from bench.compare import describe
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from parser.stackparser import StackParser
+
+
+# Child fields of the object nodes.
+FIELDS = {
+    expr.AssignExpr: ('value',), expr.CallExpr: ('callee', 'args'),
+    expr.BinaryExpr: ('lhs', 'rhs'), expr.UnaryExpr: ('expr',), expr.GroupExpr: ('expr',),
+    stmt.BlockStmt: ('elems',), stmt.ExprStmt: ('expr',),
+    stmt.IfStmt: ('cond', 'thenbranch', 'elsebranch'), stmt.WhileStmt: ('cond', 'body'),
+    stmt.ReturnStmt: ('expr', 'cond'), decl.LetDecl: ('initializer',),
+    decl.FuncDecl: ('params', 'body'), decl.ClassDecl: ('body',),
+}
+
+
+def count_binary_objects(decls) -> int:
+    """Counts binary expressions by walking the object tree."""
+    count = 0
+    stack = list(decls)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if type(node) is expr.BinaryExpr:
+            count += 1
+        for name in FIELDS.get(type(node), ()):
+            child = getattr(node, name)
+            if child != None:
+                stack.append(child)
+    return count
+
+
+def count_binary_views(tree: FlatTree) -> int:
+    """Counts binary expressions by walking views."""
+    count = 0
+    stack = tree.root_views()
+    while stack:
+        view = stack.pop()
+        if view.kind == TAG_BINARY_EXPR:
+            count += 1
+        stack.extend(view.children())
+    return count
+
+
+def count_binary_flat(tree: FlatTree) -> int:
+    """Counts binary expressions with one pass over the kinds array."""
+    return tree.kinds.count(TAG_BINARY_EXPR)
+
+
+def timed(func):
+    start = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - start
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    tokens = Lexer(generate_program(int(megabytes * 1024 * 1024))).lex_buffer()
+
+    tracemalloc.start()
+    decls = StackParser(tokens).parse().data
+    objects = tracemalloc.get_traced_memory()[0]
+    tree = FlatTree.from_nodes(decls)
+    flat = tracemalloc.get_traced_memory()[0] - objects
+    tracemalloc.stop()
+    print(f"{len(tree)} nodes: objects {objects / 1e6:.1f} MB, flat {flat / 1e6:.1f} MB "
+          f"({tree.nbytes() / 1e6:.1f} MB of arrays)")
+
+    _, collect_objects = timed(gc.collect)
+    data = pickle.dumps(decls, pickle.HIGHEST_PROTOCOL)
+    del decls
+    gc.collect()
+    _, collect_flat = timed(gc.collect)
+    print(f"full collection: with objects {collect_objects * 1000:.1f}ms, "
+          f"flat only {collect_flat * 1000:.1f}ms")
+
+    decls = pickle.loads(data)
+    a, walk_objects = timed(lambda: count_binary_objects(decls))
+    b, walk_views = timed(lambda: count_binary_views(tree))
+    c, walk_flat = timed(lambda: count_binary_flat(tree))
+    print(f"count {a}/{b}/{c} binary exprs: objects {walk_objects * 1000:.1f}ms, "
+          f"views {walk_views * 1000:.1f}ms, kinds array {walk_flat * 1000:.2f}ms")
+
+    flat_data, dump_flat = timed(lambda: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+    _, load_flat = timed(lambda: pickle.loads(flat_data))
+    _, load_objects = timed(lambda: pickle.loads(data))
+    print(f"pickle: objects {len(data) / 1e6:.1f} MB load {load_objects * 1000:.0f}ms, "
+          f"flat {len(flat_data) / 1e6:.1f} MB dump {dump_flat * 1000:.0f}ms "
+          f"load {load_flat * 1000:.0f}ms")
+
+    _, to_nodes = timed(tree.to_nodes)
+    _, from_nodes = timed(lambda: FlatTree.from_nodes(decls))
+    same = describe(tree.to_nodes()) == describe(decls)
+    print(f"convert: from objects {from_nodes:.2f}s, to objects {to_nodes:.2f}s, "
+          f"{'identical' if same else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
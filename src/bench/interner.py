@@ -0,0 +1,77 @@
+"""Identifier interning: token memory and symbol lookup speed.
+
+Run from `src/` with `python -m bench.interner [megabytes]`.
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from core.interner import Interner
+from core.symboltable import Node, SymbolTable
+from lexer.lexer import Lexer
+
+
+def generate_source(size: int, vocabulary: int = 500) -> str:
+    """Generates identifier heavy `let` declarations drawing names from a
+    fixed vocabulary, the way real programs reuse names.
+    """
+    rng = random.Random(0)
+    names = [f"value_{i}_{'x' * rng.randint(0, 10)}" for i in range(vocabulary)]
+    parts: list[str] = []
+    length = 0
+    while length < size:
+        a, b, c = rng.choice(names), rng.choice(names), rng.choice(names)
+        part = f"let {a} = {b} + {c} * {a}\n"
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)
+
+
+def lex_memory(data: str, interner: Interner | None) -> tuple[Lexer, int]:
+    tracemalloc.start()
+    lexer = Lexer(data, interner=interner)
+    lexer.lex()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return lexer, size
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    data = generate_source(int(megabytes * 1024 * 1024))
+
+    plain, plain_bytes = lex_memory(data, None)
+    del plain
+    interner = Interner()
+    lexer, interned_bytes = lex_memory(data, interner)
+    print(f"plain     {plain_bytes / 1e6:8.1f} MB")
+    print(f"interned  {interned_bytes / 1e6:8.1f} MB ({len(interner)} distinct names)")
+
+    idents = [tok for tok in lexer.tokens if tok.is_identifier()]
+    names = [tok.get_identifier_data() for tok in idents]
+    ids = [tok.ident_id for tok in idents]
+
+    table = SymbolTable()
+    node = Node()
+    for name, ident_id in zip(interner.names, range(len(interner))):
+        table.insert(name, node)
+        table.insert_id(ident_id, node)
+
+    start = time.perf_counter()
+    for name in names:
+        table.lookup(name)
+    by_name = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ident_id in ids:
+        table.lookup_id(ident_id)
+    by_id = time.perf_counter() - start
+
+    print(f"lookup by name {len(names) / by_name:12.0f} lookups/s")
+    print(f"lookup by id   {len(ids) / by_id:12.0f} lookups/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Declaration-only queries with lazily parsed bodies compared with a full
+parse and with a bare scan over the tokens.
+
+Run from `src/` with `python -m bench.lazy [megabytes]`.
+"""
+
+import gc
+import sys
+import time
+
+from bench.compare import describe
+from bench.corpus import generate_program
+from core.tokenkind import TokenKind
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def signatures(decls) -> list[tuple[str, int]]:
+    return [(decl.name.get_identifier_data(), len(decl.params)) for decl in decls]
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+    tokens = Lexer(generate_program(int(megabytes * 1024 * 1024))).lex_buffer()
+    gc.disable()
+
+    start = time.perf_counter()
+    lbrace = TokenKind.Op_LBrace.value
+    braces = sum(1 for kind in tokens.kinds if kind == lbrace)
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    eager = Parser(tokens).parse()
+    eager_signatures = signatures(eager.data)
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lazy = Parser(tokens, lazy=True).parse()
+    lazy_signatures = signatures(lazy.data)
+    skipped = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for decl in lazy.data:
+        decl.body
+    load = time.perf_counter() - start
+
+    gc.enable()
+    same = lazy_signatures == eager_signatures and describe(lazy.data) == describe(eager.data)
+    print(f"{len(tokens)} tokens, {len(eager.data)} functions, {braces} blocks, "
+          f"{'identical' if same else 'MISMATCH'}")
+    print(f"token scan      {scan:7.3f}s")
+    print(f"full parse      {full:7.3f}s")
+    print(f"lazy parse      {skipped:7.3f}s  {full / skipped:6.1f}x faster")
+    print(f"load all bodies {load:7.3f}s")
+
+
+if __name__ == '__main__':
+    main()
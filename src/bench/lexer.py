@@ -0,0 +1,39 @@
+"""Throughput comparison of the lexer engines.
+
+Run from `src/` with `python -m bench.lexer [megabytes]`.
+"""
+
+import sys
+import time
+
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+
+
+def run(data: str, engine: Lexer.Engine) -> tuple[Lexer, float]:
+    lexer = Lexer(data, engine)
+    start = time.perf_counter()
+    lexer.lex()
+    return lexer, time.perf_counter() - start
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+    data = generate_program(int(megabytes * 1024 * 1024))
+    size_mb = len(data) / (1024 * 1024)
+
+    results: dict[Lexer.Engine, Lexer] = {}
+    for engine in (Lexer.Engine.Scalar, Lexer.Engine.Table):
+        lexer, elapsed = run(data, engine)
+        results[engine] = lexer
+        count = len(lexer.tokens)
+        print(f"{engine.name:8} {count:10d} tokens {elapsed:8.3f}s "
+              f"{count / elapsed:12.0f} tok/s {size_mb / elapsed:8.2f} MB/s")
+
+    scalar = [str(tok) for tok in results[Lexer.Engine.Scalar].tokens]
+    table = [str(tok) for tok in results[Lexer.Engine.Table].tokens]
+    print("token streams identical:", scalar == table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Memory used by AST nodes and tokens, measured with tracemalloc.
+
+Run from `src/` with `python -m bench.memory [megabytes]`. Reports the
+bytes per instance of every node type and of tokens, and the memory held by
+a whole parsed program and its token list.
+"""
+
+import copy
+import sys
+import tracemalloc
+
+from asttypes.astnode import ASTNode
+from bench.corpus import generate_expr_program, generate_program
+from lexer.lexer import Lexer
+from lexer.token import Token
+from parser.parser import Parser
+
+
+COPIES = 10000
+
+
+def walk(node, samples: dict[type, object]) -> None:
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (list, tuple)):
+            stack.extend(node)
+        elif isinstance(node, (ASTNode, Token)):
+            samples.setdefault(type(node), node)
+            if isinstance(node, ASTNode):
+                stack.extend(getattr(node, name) for name in dir(node)
+                             if not name.startswith('_') and not callable(getattr(node, name)))
+
+
+def bytes_per_instance(sample: object) -> float:
+    """Traced memory of `COPIES` shallow copies of `sample`, per copy. The
+    copies share their children, so only the instance itself is counted
+    (plus the 8 byte slot of the list holding it).
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copies = [copy.copy(sample) for _ in range(COPIES)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del copies
+    return size / COPIES
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    source = (generate_program(int(megabytes * 1024 * 1024) // 2)
+              + generate_expr_program(int(megabytes * 1024 * 1024) // 2)
+              + "class C : B { let field = 1 }\nif (x) return 1 if x else while (y) y = y - 1\n")
+
+    lexer = Lexer(source)
+    lexer.lex()
+    decls = Parser(lexer.tokens).parse().data
+
+    samples: dict[type, object] = {}
+    walk(decls, samples)
+    for kind in sorted(samples, key=lambda kind: kind.__name__):
+        print(f"{kind.__name__:12} {bytes_per_instance(samples[kind]):7.1f} B")
+
+    tracemalloc.start()
+    lexer = Lexer(source)
+    lexer.lex()
+    tokens = tracemalloc.get_traced_memory()[0]
+    decls = Parser(lexer.tokens).parse().data
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"tokens {len(lexer.tokens)}: {tokens / 1e6:.1f} MB, "
+          f"{tokens / len(lexer.tokens):.1f} B each")
+    print(f"tree: {(total - tokens) / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
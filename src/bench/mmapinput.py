@@ -0,0 +1,74 @@
+"""Peak RSS and time to first token for `read()` versus `mmap` input.
+
+Run from `src/` with `python -m bench.mmapinput [megabytes]`. Each mode
+runs in its own process so peak RSS is measured independently.
+"""
+
+import mmap
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+
+
+def run_mode(mode: str, filename: str) -> None:
+    start = time.perf_counter()
+    with open(filename, 'rb') as file:
+        if mode == 'mmap':
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = file.read().decode()
+
+        tokens = Lexer(data).iter_tokens()
+        next(tokens)
+        first = time.perf_counter() - start
+        count = 1 + sum(1 for _ in tokens)
+        total = time.perf_counter() - start
+        anon = rss_anon()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:5} first token {first * 1000:8.2f}ms total {total:7.2f}s "
+          f"{count:10d} tokens peak RSS {rss:8.1f} MB private {anon:8.1f} MB")
+
+
+def rss_anon() -> float:
+    """Private (non file-backed) resident memory in MB, Linux only.
+
+    Pages of a read-only mapping are counted in RSS but belong to the page
+    cache and can be dropped at any time, so this is the number that
+    matters for memory pressure.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('RssAnon:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float('nan')
+
+
+def main() -> None:
+    if len(sys.argv) > 2 and sys.argv[1] in ('read', 'mmap'):
+        run_mode(sys.argv[1], sys.argv[2])
+        return
+
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 64.0
+    fd, filename = tempfile.mkstemp(suffix='.ar')
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.write(generate_program(int(megabytes * 1024 * 1024)))
+
+        for mode in ('read', 'mmap'):
+            subprocess.run([sys.executable, '-m', 'bench.mmapinput', mode, filename], check=True)
+    finally:
+        os.remove(filename)
+
+
+if __name__ == '__main__':
+    main()
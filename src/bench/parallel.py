@@ -0,0 +1,48 @@
+"""Speedup of parsing one big file with its declarations spread over
+worker processes.
+
+Run from `src/` with `python -m bench.parallel [megabytes] [jobs ...]`, e.g.
+`python -m bench.parallel 10 1 2 4 8 16`. Lexing is not included, every
+parallel result is checked against the serial parse.
+"""
+
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench.compare import describe
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+from parser.parallel import parse_parallel
+from parser.parser import Parser
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    jobs_list = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4, 8, 16]
+    tokens = Lexer(generate_program(int(megabytes * 1024 * 1024))).lex_buffer()
+
+    start = time.perf_counter()
+    serial = Parser(tokens).parse()
+    baseline = time.perf_counter() - start
+    expected = describe(serial.data)
+    print(f"serial  : {len(tokens)} tokens {baseline:7.3f}s")
+
+    for jobs in jobs_list:
+        # Spawn rather than fork, forked workers would inherit the serial
+        # tree above and the collector would walk it in each of them.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+            # Start the workers before timing.
+            list(executor.map(abs, range(jobs)))
+            start = time.perf_counter()
+            result = parse_parallel(tokens, jobs, executor)
+            elapsed = time.perf_counter() - start
+        same = describe(result.data) == expected and result.spans == serial.spans
+        print(f"jobs {jobs:2d} : {elapsed:7.3f}s speedup {baseline / elapsed:5.2f}x "
+              f"{'identical' if same else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
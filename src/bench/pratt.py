@@ -0,0 +1,206 @@
+"""Precedence climbing compared with the recursive precedence cascade.
+
+Run from `src/` with `python -m bench.pratt [megabytes]`.
+"""
+
+import gc
+import sys
+import time
+
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    Expr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from bench.compare import describe
+from bench.corpus import generate_expr_program
+from core.ops import BinaryOp, UnaryOp, token_to_binaryop, token_to_unaryop
+from core.tokenkind import TokenKind
+from lexer.lexer import Lexer
+from lexer.token import Token
+from parser.parseerror import ParseError
+from parser.parser import Parser
+
+
+class CascadeParser(Parser):
+    """Parses expressions with the recursive precedence cascade `Parser`
+    used before precedence climbing, one method per precedence level.
+    """
+
+    def parse_expr(self) -> Expr:
+        expr = self.parse_logical_or()
+
+        if self.match(TokenKind.Op_Equal):
+            value: Expr = self.parse_expr()
+
+            # Check if the left hand expression is a valid l-value
+            # i.e., left hand should be a variable expression
+            if isinstance(expr, VariableExpr):
+                name: Token = expr.name
+                return AssignExpr(name, value)
+            else:
+                raise ParseError("Invalid assignment expression.", self.previous())
+
+        return expr
+
+    def parse_logical_or(self) -> Expr:
+        expr = self.parse_logical_and()
+
+        while self.match(TokenKind.Kw_or):
+            right: Expr = self.parse_logical_and()
+            expr = BinaryExpr(expr, BinaryOp.Or, right)
+
+        return expr
+
+    def parse_logical_and(self) -> Expr:
+        expr = self.parse_equality_expr()
+
+        while self.match(TokenKind.Kw_and):
+            right: Expr = self.parse_equality_expr()
+            expr = BinaryExpr(expr, BinaryOp.And, right)
+
+        return expr
+
+    def parse_equality_expr(self) -> Expr:
+        expr = self.parse_comparison_expr()
+
+        while self.match(TokenKind.Op_EqualEqual, TokenKind.Op_ExclaimEqual):
+            op: BinaryOp = token_to_binaryop(self.previous())
+            right: Expr = self.parse_comparison_expr()
+            expr = BinaryExpr(expr, op, right)
+
+        return expr
+
+    def parse_comparison_expr(self) -> Expr:
+        expr = self.parse_term_expr()
+
+        while self.match(TokenKind.Op_Less, TokenKind.Op_LessEqual,
+            TokenKind.Op_Greater, TokenKind.Op_GreaterEqual):
+            op: BinaryOp = token_to_binaryop(self.previous())
+            right: Expr = self.parse_term_expr()
+            expr = BinaryExpr(expr, op, right)
+
+        return expr
+
+    def parse_term_expr(self) -> Expr:
+        expr = self.parse_factor_expr()
+
+        while self.match(TokenKind.Op_Plus, TokenKind.Op_Minus):
+            op: BinaryOp = token_to_binaryop(self.previous())
+            right: Expr = self.parse_factor_expr()
+            expr = BinaryExpr(expr, op, right)
+
+        return expr
+
+    def parse_factor_expr(self) -> Expr:
+        expr = self.parse_unary_expr()
+
+        while self.match(TokenKind.Op_Slash, TokenKind.Op_Star):
+            op: BinaryOp = token_to_binaryop(self.previous())
+            right: Expr = self.parse_unary_expr()
+            expr = BinaryExpr(expr, op, right)
+
+        return expr
+
+    def parse_unary_expr(self) -> Expr:
+        if self.match(TokenKind.Op_Minus, TokenKind.Op_Exclaim):
+            op: UnaryOp = token_to_unaryop(self.previous())
+            expr: Expr = self.parse_unary_expr()
+            return UnaryExpr(op, expr)
+
+        return self.parse_call_expr()
+
+    def parse_call_expr(self) -> Expr:
+        expr = self.parse_primary_expr()
+
+        while self.match(TokenKind.Op_LParen):
+            args: list[Expr] = self.parse_call_expr_args()
+            self.must_consume(TokenKind.Op_RParen, "Expected ')' after arguments.")
+            expr = CallExpr(expr, args)
+
+        return expr
+
+    def parse_primary_expr(self) -> Expr:
+        if self.match(TokenKind.Number):
+            return LiteralExpr(self.previous().get_literal_data()) # type: ignore
+
+        if self.match(TokenKind.Op_LParen):
+            expr: Expr = self.parse_expr()
+            self.must_consume(TokenKind.Op_RParen, "Expected ')' after expression.")
+            return GroupExpr(expr)
+
+        if self.match(TokenKind.Identifier):
+            return VariableExpr(self.previous())
+
+        return InvalidExpr()
+
+
+def make_parser(data: str, cascade: bool) -> Parser:
+    lexer = Lexer(data)
+    lexer.lex()
+    return CascadeParser(lexer.tokens) if cascade else Parser(lexer.tokens)
+
+
+def parse_all(parser: Parser) -> list:
+    decls = []
+    while not parser.is_at_end():
+        decls.append(parser.parse_decl())
+    return decls
+
+
+def count_calls(data: str, cascade: bool) -> int:
+    calls = 0
+
+    def profile(frame, event, arg) -> None:
+        nonlocal calls
+        if event == 'call':
+            calls += 1
+
+    parser = make_parser(data, cascade)
+    sys.setprofile(profile)
+    parse_all(parser)
+    sys.setprofile(None)
+    return calls
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    data = generate_expr_program(int(megabytes * 1024 * 1024))
+    exprs = data.count('\n')
+
+    # Profiling is slow, count calls on a whole-line prefix of the input.
+    sample = data[:data.index('\n', len(data) // 20) + 1]
+    sample_exprs = sample.count('\n')
+
+    trees = {}
+    for name, cascade in (('cascade', True), ('pratt', False)):
+        parser = make_parser(data, cascade)
+        start = time.perf_counter()
+        trees[name] = parse_all(parser)
+        elapsed = time.perf_counter() - start
+
+        # The collector's cost grows with the tree and hides the parser's
+        # own cost, so also time a run with it off.
+        parser = make_parser(data, cascade)
+        gc.disable()
+        start = time.perf_counter()
+        parse_all(parser)
+        nogc = time.perf_counter() - start
+        gc.enable()
+
+        calls = count_calls(sample, cascade)
+        print(f"{name:8} {elapsed:7.3f}s ({nogc:6.3f}s without gc) "
+              f"{exprs / nogc:10.0f} decls/s {calls / sample_exprs:8.1f} calls/decl")
+
+    same = describe(trees['cascade']) == describe(trees['pratt'])
+    print("identical trees:", same)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Parse throughput on error-dense input compared with clean input.
+
+Run from `src/` with `python -m bench.recovery [megabytes] [errors per KB]`.
+"""
+
+import random
+import re
+import sys
+import time
+
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+NOISE = ['(', ')', '{', '}', '=', 'let', 'if', ',', '+', 'x', '5']
+
+
+def inject_errors(data: str, per_kb: float, seed: int = 0) -> str:
+    """Randomly drops or inserts tokens, about `per_kb` times per KB."""
+    rng = random.Random(seed)
+    tokens = re.findall(r'\w+|==|!=|<=|>=|[^\s\w]', data)
+    count = int(len(data) / 1024 * per_kb)
+    for _ in range(count):
+        index = rng.randrange(len(tokens))
+        if rng.random() < 0.5:
+            del tokens[index]
+        else:
+            tokens.insert(index, rng.choice(NOISE))
+    return ' '.join(tokens)
+
+
+def parse(data: str) -> tuple[int, int, float]:
+    lexer = Lexer(data)
+    lexer.lex()
+    parser = Parser(lexer.tokens)
+    start = time.perf_counter()
+    result = parser.parse()
+    return len(lexer.tokens), len(result.errors), time.perf_counter() - start
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    per_kb = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    clean = generate_program(int(megabytes * 1024 * 1024))
+
+    for name, data in (('clean', inject_errors(clean, 0)),
+                       ('errors', inject_errors(clean, per_kb))):
+        tokens, errors, elapsed = parse(data)
+        print(f"{name:7} {tokens:9d} tokens {errors:7d} errors {elapsed:7.3f}s "
+              f"{tokens / elapsed:10.0f} tok/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Incremental re-lexing compared with a full re-lex after random edits.
+
+Run from `src/` with `python -m bench.relex [lines] [edits]`. Every edit
+is checked against a full re-lex of the edited input.
+"""
+
+import random
+import sys
+import time
+
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+from lexer.token import Token
+
+
+SNIPPETS = ['', ' ', '\n', 'a', '1', '=', '==', '!', '<', 'let x = 5', 'func',
+    'foo(bar)', '{', '}', ' + ', '#', 'and', '9z']
+
+
+def describe(tokens: list[Token]) -> list[tuple[str, int, int]]:
+    return [(str(tok), tok.start, tok.end) for tok in tokens]
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(1)
+
+    data = generate_program(lines * 30)
+    print(f"{data.count(chr(10))} lines, {len(data)} chars")
+
+    lexer = Lexer(data)
+    lexer.lex()
+    tokens = lexer.tokens
+
+    incremental = 0.0
+    first = 0.0
+    full = 0.0
+    for i in range(edits):
+        size = len(lexer.str)
+        offset = rng.randint(0, size)
+        removed = rng.randint(0, min(8, size - offset))
+        inserted = rng.choice(SNIPPETS)
+
+        start = time.perf_counter()
+        tokens = lexer.relex(tokens, offset, removed, inserted)
+        if i == 0:
+            # also attaches every token to the runs moved by later edits
+            first = time.perf_counter() - start
+        else:
+            incremental += time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = Lexer(lexer.str)
+        reference.lex()
+        full += time.perf_counter() - start
+
+        assert describe(tokens) == describe(reference.tokens), "relex mismatch"
+
+    print(f"first edit  {first * 1000:8.3f} ms")
+    print(f"incremental {incremental / max(edits - 1, 1) * 1000:8.3f} ms/edit")
+    print(f"full        {full / edits * 1000:8.3f} ms/edit")
+    print(f"{edits} edits identical to a full re-lex")
+
+
+if __name__ == '__main__':
+    main()
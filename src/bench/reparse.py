@@ -0,0 +1,69 @@
+"""Incremental reparse latency after small edits compared with a full parse.
+
+Run from `src/` with `python -m bench.reparse [lines]`. Every reparse is
+checked against a full parse of the edited source.
+"""
+
+import gc
+import sys
+import time
+
+from bench.compare import describe
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def full_parse(data: str):
+    lexer = Lexer(data)
+    return Parser(lexer.iter_tokens()).parse()
+
+
+def edits(data: str) -> list[tuple[str, str]]:
+    """Returns (name, edited source) pairs of one-line edits."""
+    middle = data.index('\nfunc', len(data) // 2) + 1
+    line_end = data.index('\n', middle)
+    number = data.index('+ ', middle) + 2
+    brace = data.index('\n}', middle) + 1
+    return [
+        ('change number', data[:number] + '7' + data[number:]),
+        ('insert decl', data[:middle] + 'let inserted = 1 + 2\n' + data[middle:]),
+        ('delete line', data[:middle] + data[line_end + 1:]),
+        ('extend expr', data[:brace - 1] + ' + 1' + data[brace - 1:]),
+        ('remove brace', data[:brace] + data[brace + 1:]),
+        ('edit first', '   ' + data),
+        ('append decl', data + 'let last = 0\n'),
+    ]
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    data = generate_program(lines * 20)
+    data = ''.join(data.splitlines(keepends=True)[:lines - lines % 5])
+    # A broken declaration behind most edits, whose error has to move.
+    late = data.index('\nfunc', len(data) * 3 // 4) + 1
+    data = data[:late] + 'let = 1\n' + data[late:]
+    previous = full_parse(data)
+
+    gc.disable()
+    for name, edited in edits(data):
+        start = time.perf_counter()
+        full = full_parse(edited)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = Parser.reparse(previous, data, edited)
+        reparse_time = time.perf_counter() - start
+
+        reused = len(set(map(id, result.data)) & set(map(id, previous.data)))
+        same = (describe(result.data) == describe(full.data)
+                and result.spans == full.spans
+                and [(e.offset, e.message) for e in result.errors]
+                    == [(e.offset, e.message) for e in full.errors])
+        print(f"{name:13} full {full_time * 1000:8.2f}ms reparse {reparse_time * 1000:6.2f}ms "
+              f"reused {reused:5d}/{len(full.data)} {'ok' if same else 'MISMATCH'}")
+        gc.collect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Scope resolution throughput, and variable reads through resolved
+(depth, slot) addresses compared with name lookups through a scope chain.
+
+Run from `src/` with `python -m bench.resolver [megabytes]`.
+"""
+
+import collections
+import gc
+import sys
+import time
+
+from backend.environment import Environment
+from bench.corpus import generate_control_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from sema.resolver import Resolver
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    # `g` is called by the generated functions.
+    data = 'func g(x, y, z) { return x }\n' + generate_control_program(int(megabytes * 1024 * 1024))
+    decls = Parser(Lexer(data).lex_buffer()).parse().data
+    gc.disable()
+
+    start = time.perf_counter()
+    resolution = Resolver().resolve(decls)
+    elapsed = time.perf_counter() - start
+    uses = len(resolution.addresses)
+    depths = collections.Counter(depth for depth, _ in resolution.addresses.values())
+    print(f"resolve {elapsed:.3f}s  {uses / elapsed / 1e6:.2f}M uses/s  {uses} uses, "
+          f"{len(resolution.errors)} errors")
+    print("depths  " + "  ".join(f"{depth}: {count}" for depth, count in sorted(depths.items())))
+
+    # Every use read once from scopes shaped like the ones it resolved in:
+    # the innermost scopes hold a few names, the variable is at its depth.
+    reads: list[tuple[Environment, str, list, int, int]] = []
+    for node, (depth, slot) in resolution.addresses.items():
+        name: str = node.name.get_identifier_data() # type: ignore
+        env = Environment()
+        env.define(name, 1)
+        frame: list = [0] * (slot + 1)
+        frames = [frame]
+        for level in range(depth):
+            env = Environment(env)
+            for filler in ('n', 'a', 'b'):
+                env.define(filler + str(level), 0)
+            frames.append([0, 0, 0])
+        frames.reverse()
+        reads.append((env, name, frames, depth, slot))
+
+    start = time.perf_counter()
+    for env, name, _, _, _ in reads:
+        env.find(name).values[name] # type: ignore
+    by_name = time.perf_counter() - start
+    start = time.perf_counter()
+    for _, _, frames, depth, slot in reads:
+        frames[depth][slot]
+    by_address = time.perf_counter() - start
+    gc.enable()
+    print(f"reads   by name {by_name:.3f}s  by address {by_address:.3f}s  "
+          f"{by_name / by_address:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
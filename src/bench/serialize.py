@@ -0,0 +1,51 @@
+"""Binary AST encoding compared with pickle: size, encode and decode
+throughput, and the cost of loading a single declaration lazily.
+
+Run from `src/` with `python -m bench.serialize [megabytes]`.
+"""
+
+import gc
+import pickle
+import sys
+import time
+
+from asttypes.astreader import ASTReader
+from asttypes.astwriter import ASTWriter
+from bench.compare import describe
+from bench.corpus import generate_expr_program, generate_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def timed(func):
+    start = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - start
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    size = int(megabytes * 1024 * 1024)
+
+    for name, source in (('funcs', generate_program(size)), ('exprs', generate_expr_program(size))):
+        decls = Parser(Lexer(source).lex_buffer()).parse().data
+        gc.disable()
+
+        encoded, encode = timed(lambda: ASTWriter().write(decls))
+        decoded, decode = timed(lambda: ASTReader(encoded).read_all())
+        one, lazy = timed(lambda: ASTReader(encoded)[len(decls) // 2])
+        pickled, pickle_encode = timed(lambda: pickle.dumps(decls, pickle.HIGHEST_PROTOCOL))
+        _, pickle_decode = timed(lambda: pickle.loads(pickled))
+
+        gc.enable()
+        same = describe(decoded) == describe(decls) and describe(one) == describe(decls[len(decls) // 2])
+        mb = len(source) / 1e6
+        print(f"{name}: {len(source) / 1e6:.1f} MB source, {'identical' if same else 'MISMATCH'}")
+        print(f"  binary {len(encoded) / 1e6:7.2f} MB  encode {mb / encode:6.2f} MB/s  "
+              f"decode {mb / decode:6.2f} MB/s  one decl {lazy * 1000:.2f}ms")
+        print(f"  pickle {len(pickled) / 1e6:7.2f} MB  encode {mb / pickle_encode:6.2f} MB/s  "
+              f"decode {mb / pickle_decode:6.2f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
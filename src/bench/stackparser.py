@@ -0,0 +1,68 @@
+"""Stress and timing of `StackParser` against the recursive `Parser`.
+
+Run from `src/` with `python -m bench.stackparser [depth]`.
+"""
+
+import sys
+import time
+
+from bench.compare import describe
+from bench.corpus import generate_expr_program, generate_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from parser.stackparser import StackParser
+
+
+def nested_sources(depth: int) -> dict[str, str]:
+    return {
+        'else if': 'if (a) b = 1 ' + 'else if (a) b = 1 ' * depth,
+        'blocks': '{' * depth + 'a' + '}' * depth,
+        'groups': 'let x = ' + '(' * depth + 'a' + ')' * depth,
+        'unary': 'let x = ' + '- ' * depth + 'a',
+        'calls': 'let x = ' + 'f(' * depth + 'a' + ')' * depth,
+    }
+
+
+def parse_all(parser: Parser) -> list:
+    decls = []
+    while not parser.is_at_end():
+        decls.append(parser.parse_decl())
+    return decls
+
+
+def parse(cls: type[Parser], data: str) -> tuple[list, float]:
+    lexer = Lexer(data)
+    lexer.lex()
+    parser = cls(lexer.tokens)
+    start = time.perf_counter()
+    decls = parse_all(parser)
+    return decls, time.perf_counter() - start
+
+
+def main() -> None:
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    # Same trees on shallow nesting the recursive parser can handle.
+    for name, data in nested_sources(200).items():
+        same = describe(parse(Parser, data)[0]) == describe(parse(StackParser, data)[0])
+        print(f"{name:8} depth 200: identical trees {same}")
+
+    for name, data in nested_sources(depth).items():
+        try:
+            parse(Parser, data)
+            recursive = 'ok'
+        except RecursionError:
+            recursive = 'RecursionError'
+        _, elapsed = parse(StackParser, data)
+        print(f"{name:8} depth {depth}: stack parser {elapsed:6.3f}s, recursive {recursive}")
+
+    for name, data in (('let decls', generate_program(1 << 20)),
+                       ('exprs', generate_expr_program(1 << 20))):
+        trees, recursive = parse(Parser, data)
+        stack_trees, stack = parse(StackParser, data)
+        same = describe(trees) == describe(stack_trees)
+        print(f"{name:10} 1 MB: recursive {recursive:6.3f}s stack {stack:6.3f}s identical {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Structural subtree hashes: parse overhead, stability across processes,
+equality checks and memoizing a per-function pass.
+
+Run from `src/` with `python -m bench.structhash [megabytes]`.
+"""
+
+import gc
+import subprocess
+import sys
+import time
+
+from bench.compare import describe
+from bench.corpus import generate_program
+from core.memocache import MemoCache
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from asttypes.structural import structurally_equal
+
+
+def parse(data: str):
+    return Parser(Lexer(data).lex_buffer()).parse().data
+
+
+def root_hashes(megabytes: float) -> list[int]:
+    return [decl.struct_hash for decl in parse(generate_program(int(megabytes * 1024 * 1024)))]
+
+
+def hashes_in_subprocess(megabytes: float) -> list[int]:
+    """Hashes of the same program computed by a fresh interpreter, which
+    gets its own string hash seed.
+    """
+    code = ("import sys; from bench.structhash import root_hashes; "
+            f"sys.stdout.write(' '.join(map(str, root_hashes({megabytes!r}))))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True).stdout
+    return [int(value) for value in output.split()]
+
+
+def edit_one_function(data: str) -> str:
+    middle = data.index('\nfunc', len(data) // 2) + 1
+    number = data.index('+ ', middle) + 2
+    return data[:number] + '7' + data[number:]
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    data = generate_program(int(megabytes * 1024 * 1024))
+    tokens = Lexer(data).lex_buffer()
+    gc.disable()
+
+    start = time.perf_counter()
+    first = Parser(tokens).parse().data
+    parse_time = time.perf_counter() - start
+    second = Parser(tokens).parse().data
+    edited = parse(edit_one_function(data))
+
+    stable = [decl.struct_hash for decl in first] == hashes_in_subprocess(megabytes)
+    print(f"{len(first)} functions, parse {parse_time:.3f}s, "
+          f"hashes {'stable' if stable else 'DIFFER'} across processes")
+
+    start = time.perf_counter()
+    same = all(structurally_equal(a, b) for a, b in zip(first, second))
+    equal_time = time.perf_counter() - start
+    start = time.perf_counter()
+    changed = sum(not structurally_equal(a, b) for a, b in zip(first, edited))
+    differ_time = time.perf_counter() - start
+    start = time.perf_counter()
+    describe_changed = sum(describe(a) != describe(b) for a, b in zip(first, edited))
+    describe_time = time.perf_counter() - start
+    print(f"equal trees     {equal_time:7.3f}s  ({'equal' if same else 'MISMATCH'})")
+    print(f"edited trees    {differ_time:7.3f}s  ({changed} changed)")
+    print(f"full compare    {describe_time:7.3f}s  ({describe_changed} changed)")
+
+    # A per-function pass, memoized across the two versions of the program.
+    cache: MemoCache[int] = MemoCache(max_entries=len(first) * 2)
+    analyse = lambda decl: len(repr(describe(decl)))
+    start = time.perf_counter()
+    results = [cache.memoize(decl, analyse) for decl in first]
+    cold = time.perf_counter() - start
+    cache.hits = cache.misses = 0
+    start = time.perf_counter()
+    edited_results = [cache.memoize(decl, analyse) for decl in edited]
+    warm = time.perf_counter() - start
+    correct = edited_results == [analyse(decl) for decl in edited]
+    gc.enable()
+    print(f"pass cold       {cold:7.3f}s")
+    print(f"pass after edit {warm:7.3f}s  {cache.hits} hits, {cache.misses} misses, "
+          f"{'correct' if correct and len(results) == len(edited_results) else 'WRONG'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Memory and speed of `TokenBuffer` compared with a `list[Token]`.
+
+Run from `src/` with `python -m bench.tokenbuffer [megabytes]`.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from bench.corpus import generate_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def measure_memory(data: str) -> None:
+    tracemalloc.start()
+
+    before = tracemalloc.get_traced_memory()[0]
+    lexer = Lexer(data)
+    lexer.lex()
+    list_bytes = tracemalloc.get_traced_memory()[0] - before
+    count = len(lexer.tokens)
+    del lexer
+    gc.collect()
+
+    before = tracemalloc.get_traced_memory()[0]
+    buf = Lexer(data).lex_buffer()
+    buf_bytes = tracemalloc.get_traced_memory()[0] - before
+    del buf
+
+    tracemalloc.stop()
+    print(f"list[Token]  {list_bytes / 1e6:8.1f} MB {list_bytes / count:6.1f} B/token")
+    print(f"TokenBuffer  {buf_bytes / 1e6:8.1f} MB {buf_bytes / count:6.1f} B/token")
+
+
+def measure_speed(data: str) -> None:
+    start = time.perf_counter()
+    lexer = Lexer(data)
+    lexer.lex()
+    lexed = time.perf_counter()
+    Parser(lexer.tokens).parse()
+    parsed = time.perf_counter()
+    print(f"list[Token]  lex {lexed - start:6.3f}s parse {parsed - lexed:6.3f}s")
+    del lexer
+    gc.collect()
+
+    start = time.perf_counter()
+    buf = Lexer(data).lex_buffer()
+    lexed = time.perf_counter()
+    Parser(buf).parse()
+    parsed = time.perf_counter()
+    print(f"TokenBuffer  lex {lexed - start:6.3f}s parse {parsed - lexed:6.3f}s")
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4.0
+    data = generate_program(int(megabytes * 1024 * 1024))
+    measure_memory(data)
+    measure_speed(data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Programs lowered to Python code objects against the evaluator and the
+closure compiler, and the cost of a run with a warm code cache against
+lexing, parsing and lowering from scratch.
+
+Run from `src/` with `python -m bench.transpile [scale]`.
+"""
+
+import gc
+import io
+import sys
+import tempfile
+
+from backend.closure import ClosureCompiler
+from backend.codecache import CodeCache
+from backend.evaluator import Evaluator
+from backend.transpiler import Transpiler, run
+from bench.closure import best
+from bench.vm import programs, timed
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def main() -> None:
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, data in programs(scale):
+            source: bytes = data.encode()
+            decls = Parser(Lexer(source).lex_buffer()).parse().data
+            lower_time = timed(lambda: Transpiler().compile(decls))
+            code = Transpiler().compile(decls)
+            closures = ClosureCompiler(io.StringIO()).compile(decls)
+
+            gc.disable()
+            evaluated = io.StringIO()
+            eval_time = best(lambda: Evaluator(evaluated).run(decls), 1)
+            executed = io.StringIO()
+            python_time = best(lambda: run(code, executed), 1)
+            closure_time = best(closures)
+            gc.enable()
+
+            # Parse and lower everything, store it, then load it back as a
+            # later run does.
+            cold_time = timed(lambda: CodeCache(directory).compile(source))
+            warm_time = best(lambda: CodeCache(directory).compile(source))
+
+            same = evaluated.getvalue() == executed.getvalue()
+            print(f"{name}: {'same output' if same else 'OUTPUT DIFFERS'}")
+            print(f"  evaluator {eval_time:7.3f}s  python {python_time:7.3f}s  "
+                  f"{eval_time / python_time:6.2f}x  (closures {closure_time:.3f}s)")
+            print(f"  lowering {lower_time:.4f}s  uncached {cold_time:.4f}s  "
+                  f"cached {warm_time:.4f}s  {cold_time / warm_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
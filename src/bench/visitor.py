@@ -0,0 +1,193 @@
+"""Full-program traversals with double dispatch `accept`, the dispatch-table
+`NodeVisitor` and the non-recursive walker, and walks of very deep trees.
+
+Run from `src/` with `python -m bench.visitor [megabytes] [depth]`.
+"""
+
+import gc
+import sys
+import time
+from typing import Any
+
+from asttypes.declvisitor import DeclVisitor
+from asttypes.exprvisitor import ExprVisitor
+from asttypes.nodevisitor import NodeVisitor
+from asttypes.stmtvisitor import StmtVisitor
+from asttypes.walker import postorder, preorder, walk
+from bench.corpus import generate_control_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+from parser.stackparser import StackParser
+
+
+class AcceptCounter(ExprVisitor[int], StmtVisitor[int], DeclVisitor[int]):
+    """Counts nodes through `accept`."""
+
+    def visit_assign_expr(self, assign_expr) -> int:
+        return 1 + assign_expr.value.accept(self)
+
+    def visit_call_expr(self, call_expr) -> int:
+        return 1 + call_expr.callee.accept(self) + sum(arg.accept(self) for arg in call_expr.args)
+
+    def visit_unary_expr(self, unary_expr) -> int:
+        return 1 + unary_expr.expr.accept(self)
+
+    def visit_binary_expr(self, binary_expr) -> int:
+        return 1 + binary_expr.lhs.accept(self) + binary_expr.rhs.accept(self)
+
+    def visit_literal_expr(self, literal_expr) -> int:
+        return 1
+
+    def visit_group_expr(self, group_expr) -> int:
+        return 1 + group_expr.expr.accept(self)
+
+    def visit_variable_expr(self, variable_expr) -> int:
+        return 1
+
+    def visit_block_stmt(self, block_stmt) -> int:
+        return 1 + sum(elem.accept(self) for elem in block_stmt.elems)
+
+    def visit_expr_stmt(self, expr_stmt) -> int:
+        return 1 + expr_stmt.expr.accept(self)
+
+    def visit_if_stmt(self, if_stmt) -> int:
+        count = 1 + if_stmt.cond.accept(self) + if_stmt.thenbranch.accept(self)
+        if if_stmt.elsebranch != None:
+            count += if_stmt.elsebranch.accept(self)
+        return count
+
+    def visit_while_stmt(self, while_stmt) -> int:
+        return 1 + while_stmt.cond.accept(self) + while_stmt.body.accept(self)
+
+    def visit_return_stmt(self, return_stmt) -> int:
+        count = 1
+        if return_stmt.expr != None:
+            count += return_stmt.expr.accept(self)
+        if return_stmt.cond != None:
+            count += return_stmt.cond.accept(self)
+        return count
+
+    def visit_let(self, let_decl) -> int:
+        return 1 + (let_decl.initializer.accept(self) if let_decl.initializer != None else 0)
+
+    def visit_func(self, func_decl) -> int:
+        return 1 + sum(param.accept(self) for param in func_decl.params) + func_decl.body.accept(self)
+
+    def visit_class(self, class_decl) -> int:
+        return 1 + class_decl.body.accept(self)
+
+
+class TableCounter(NodeVisitor[int]):
+    """Counts nodes through the dispatch table."""
+
+    def visit_assign_expr(self, assign_expr) -> int:
+        return 1 + self.visit(assign_expr.value)
+
+    def visit_call_expr(self, call_expr) -> int:
+        visit = self.visit
+        return 1 + visit(call_expr.callee) + sum(visit(arg) for arg in call_expr.args)
+
+    def visit_unary_expr(self, unary_expr) -> int:
+        return 1 + self.visit(unary_expr.expr)
+
+    def visit_binary_expr(self, binary_expr) -> int:
+        return 1 + self.visit(binary_expr.lhs) + self.visit(binary_expr.rhs)
+
+    def visit_literal_expr(self, literal_expr) -> int:
+        return 1
+
+    def visit_group_expr(self, group_expr) -> int:
+        return 1 + self.visit(group_expr.expr)
+
+    def visit_variable_expr(self, variable_expr) -> int:
+        return 1
+
+    def visit_block_stmt(self, block_stmt) -> int:
+        visit = self.visit
+        return 1 + sum(visit(elem) for elem in block_stmt.elems)
+
+    def visit_expr_stmt(self, expr_stmt) -> int:
+        return 1 + self.visit(expr_stmt.expr)
+
+    def visit_if_stmt(self, if_stmt) -> int:
+        count = 1 + self.visit(if_stmt.cond) + self.visit(if_stmt.thenbranch)
+        if if_stmt.elsebranch != None:
+            count += self.visit(if_stmt.elsebranch)
+        return count
+
+    def visit_while_stmt(self, while_stmt) -> int:
+        return 1 + self.visit(while_stmt.cond) + self.visit(while_stmt.body)
+
+    def visit_return_stmt(self, return_stmt) -> int:
+        count = 1
+        if return_stmt.expr != None:
+            count += self.visit(return_stmt.expr)
+        if return_stmt.cond != None:
+            count += self.visit(return_stmt.cond)
+        return count
+
+    def visit_let(self, let_decl) -> int:
+        return 1 + (self.visit(let_decl.initializer) if let_decl.initializer != None else 0)
+
+    def visit_func(self, func_decl) -> int:
+        visit = self.visit
+        return 1 + sum(visit(param) for param in func_decl.params) + visit(func_decl.body)
+
+    def visit_class(self, class_decl) -> int:
+        return 1 + self.visit(class_decl.body)
+
+
+def timed(function, repeat: int = 1) -> tuple[Any, float]:
+    """Returns the result of `function` and its best time of `repeat` runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def walk_count(roots: list) -> int:
+    count = 0
+    def enter(node) -> None:
+        nonlocal count
+        count += 1
+    walk(roots, enter)
+    return count
+
+
+def main() -> None:
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    decls = Parser(Lexer(generate_control_program(int(megabytes * 1024 * 1024))).lex_buffer()).parse().data
+    accept_counter = AcceptCounter()
+    table_counter = TableCounter()
+    gc.disable()
+
+    runs = [
+        ('accept', lambda: sum(decl.accept(accept_counter) for decl in decls)),
+        ('table', lambda: sum(table_counter.visit(decl) for decl in decls)),
+        ('preorder', lambda: sum(1 for _ in preorder(decls))),
+        ('postorder', lambda: sum(1 for _ in postorder(decls))),
+        ('walk', lambda: walk_count(decls)),
+    ]
+    baseline = 0.0
+    for name, run in runs:
+        count, elapsed = timed(run, 3)
+        baseline = baseline or elapsed
+        print(f"{name:10} {elapsed:7.3f}s  {count / elapsed / 1e6:5.2f}M nodes/s  "
+              f"{baseline / elapsed:5.2f}x  ({count} nodes)")
+    gc.enable()
+
+    deep = StackParser(Lexer('let x = ' + '- ' * depth + 'a').lex_buffer()).parse().data
+    try:
+        deep[0].accept(accept_counter)
+        recursive = 'ok'
+    except RecursionError:
+        recursive = 'RecursionError'
+    count, elapsed = timed(lambda: sum(1 for _ in postorder(deep)))
+    print(f"depth {depth}: accept {recursive}, postorder {count} nodes in {elapsed:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Bytecode VM against the tree-walking evaluator on loop and call heavy
+programs, with an instruction profile of each.
+
+Run from `src/` with `python -m bench.vm [scale]`.
+"""
+
+import gc
+import io
+import sys
+import time
+
+from backend.compiler import Compiler
+from backend.evaluator import Evaluator
+from backend.vm import VM
+from backend.vmprofile import format_profile
+from bench.corpus import generate_runnable_program
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+def programs(scale: float) -> list[tuple[str, str]]:
+    loops = int(2000 * scale)
+    return [
+        ('nested loops', f"""
+func run(n) {{
+    let total = 0
+    let i = 0
+    while (i < n) {{
+        let j = 0
+        while (j < 10) {{
+            total = total + i * j - (i / 3)
+            j = j + 1
+        }}
+        i = i + 1
+    }}
+    return total
+}}
+print(run({loops}))
+"""),
+        ('global loop', f"""
+let total = 0
+let i = 0
+while (i < {loops * 10}) {{
+    if (i / 2 * 2 == i and i > 3) total = total + i else total = total - 1
+    i = i + 1
+}}
+print(total)
+"""),
+        ('fib calls', f"""
+func fib(n) {{
+    return n if n < 2
+    return fib(n - 1) + fib(n - 2)
+}}
+print(fib({int(14 + 2 * scale)}))
+"""),
+        ('generated', generate_runnable_program(int(64 * 1024 * scale))),
+    ]
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+
+    for name, data in programs(scale):
+        decls = Parser(Lexer(data).lex_buffer()).parse().data
+        compile_time = timed(lambda: Compiler().compile(decls))
+        main_code = Compiler().compile(decls)
+
+        gc.disable()
+        evaluated = io.StringIO()
+        eval_time = timed(lambda: Evaluator(evaluated).run(decls))
+        executed = io.StringIO()
+        vm_time = timed(lambda: VM(executed).run(main_code))
+        profiled = io.StringIO()
+        profile_time = timed(lambda: VM(profiled, profile=True).run(main_code))
+        gc.enable()
+
+        same = evaluated.getvalue() == executed.getvalue() == profiled.getvalue()
+        print(f"{name}: {'same output' if same else 'OUTPUT DIFFERS'}")
+        print(f"  evaluator {eval_time:7.3f}s  vm {vm_time:7.3f}s  {eval_time / vm_time:5.2f}x  "
+              f"compile {compile_time:.3f}s  profiling {profile_time:.3f}s")
+        print('  ' + format_profile(main_code, 5).replace('\n', '\n  '))
+
+
+if __name__ == '__main__':
+    main()
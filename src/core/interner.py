@@ -0,0 +1,26 @@
+class Interner:
+    """Per-compilation identifier table.
+
+    Maps every distinct identifier to a small integer id, handed out in
+    order of first appearance, and keeps one canonical string per name so
+    all tokens with the same name share it.
+    """
+
+    def __init__(self) -> None:
+        self.ids: dict[str, int] = {}
+        self.names: list[str] = []
+
+    def intern(self, name: str) -> int:
+        """Returns the id of `name`, assigning a new one if it is unseen."""
+        ident_id = self.ids.get(name)
+        if ident_id == None:
+            ident_id = len(self.names)
+            self.ids[name] = ident_id
+            self.names.append(name)
+        return ident_id
+
+    def name(self, ident_id: int) -> str:
+        return self.names[ident_id]
+
+    def __len__(self) -> int:
+        return len(self.names)
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+
+V = TypeVar('V')
+
+class MemoCache(Generic[V]):
+    """Bounded memo of per-subtree results of an analysis pass.
+
+    Results are keyed by the subtree's `struct_hash`, so an unchanged
+    function hits even in a freshly parsed tree. Holds at most
+    `max_entries` results and evicts the least recently used one beyond
+    that. Keys and values are plain, so a pass can pickle its cache and use
+    it in the next run; hashes only stay the same with the same Python
+    version. A hash collision would hand back another subtree's result,
+    passes that cannot accept that should confirm with
+    `structurally_equal`.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[Hashable, V] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Returns the result stored for `key`, None if there is none."""
+        value: Optional[V] = self.entries.get(key)
+        if value == None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def memoize(self, node, compute: Callable[..., V]) -> V:
+        """Returns the result for `node`, from the cache or `compute(node)`.
+        None results are not cached.
+        """
+        key: int = node.struct_hash
+        value: Optional[V] = self.get(key)
+        if value == None:
+            value = compute(node)
+            if value != None:
+                self.put(key, value)
+        return value # type: ignore
+
+    def clear(self) -> None:
+        self.entries.clear()
@@ -66,3 +66,63 @@ def token_to_unaryop(token: Token) -> UnaryOp:
         return UnaryOp.Not
     else:
         return UnaryOp.Invalid
+
+
+# Values are integers. Comparisons and logical operators yield 1 or 0.
+COMPARISON_OPS: frozenset[BinaryOp] = frozenset({
+    BinaryOp.Less, BinaryOp.Greater, BinaryOp.LessEq, BinaryOp.GreaterEq,
+    BinaryOp.EqEq, BinaryOp.NotEq,
+})
+
+LOGICAL_OPS: frozenset[BinaryOp] = frozenset({BinaryOp.And, BinaryOp.Or, BinaryOp.Xor})
+
+
+def divide(lhs: int, rhs: int) -> int:
+    """Integer division truncating toward zero. Raises ZeroDivisionError."""
+    quotient: int = abs(lhs) // abs(rhs)
+    return -quotient if (lhs < 0) != (rhs < 0) else quotient
+
+
+def apply_binary(op: BinaryOp, lhs: int, rhs: int) -> int:
+    """Applies `op` to two evaluated operands.
+
+    Evaluators short-circuit `and` and `or` themselves and only call this
+    once both operands are needed.
+    """
+    if op == BinaryOp.Add:
+        return lhs + rhs
+    elif op == BinaryOp.Sub:
+        return lhs - rhs
+    elif op == BinaryOp.Mul:
+        return lhs * rhs
+    elif op == BinaryOp.Div:
+        return divide(lhs, rhs)
+    elif op == BinaryOp.Less:
+        return 1 if lhs < rhs else 0
+    elif op == BinaryOp.Greater:
+        return 1 if lhs > rhs else 0
+    elif op == BinaryOp.LessEq:
+        return 1 if lhs <= rhs else 0
+    elif op == BinaryOp.GreaterEq:
+        return 1 if lhs >= rhs else 0
+    elif op == BinaryOp.EqEq:
+        return 1 if lhs == rhs else 0
+    elif op == BinaryOp.NotEq:
+        return 1 if lhs != rhs else 0
+    elif op == BinaryOp.And:
+        return 1 if lhs != 0 and rhs != 0 else 0
+    elif op == BinaryOp.Or:
+        return 1 if lhs != 0 or rhs != 0 else 0
+    elif op == BinaryOp.Xor:
+        return 1 if (lhs != 0) != (rhs != 0) else 0
+    else:
+        raise ValueError(f"Cannot apply {op}.")
+
+
+def apply_unary(op: UnaryOp, operand: int) -> int:
+    if op == UnaryOp.Negate:
+        return -operand
+    elif op == UnaryOp.Not:
+        return 1 if operand == 0 else 0
+    else:
+        raise ValueError(f"Cannot apply {op}.")
@@ -7,7 +7,17 @@ class Node:
 
 
 class SymbolTable(dict[str, list[Node]]):
-    """Table for indentifier lookup. Maps a string to `Node`."""
+    """Table for indentifier lookup. Maps a string to `Node`.
+
+    Names interned by an `Interner` can use the `*_id` methods instead. They
+    keep the innermost node of every id in a list indexed by the id, so a
+    lookup never hashes, and park shadowed nodes in per-id stacks.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.top: list[Optional[Node]] = []
+        self.shadowed: list[list[Node]] = []
 
     def insert(self, name: str, node: Node) -> None:
         self.setdefault(name, []).append(node)
@@ -20,3 +30,25 @@ class SymbolTable(dict[str, list[Node]]):
         if nodes:
             return nodes[-1]
         return None
+
+    def insert_id(self, ident_id: int, node: Node) -> None:
+        top = self.top
+        if ident_id >= len(top):
+            grow: int = ident_id + 1 - len(top)
+            top.extend([None] * grow)
+            self.shadowed.extend([] for _ in range(grow))
+
+        previous = top[ident_id]
+        if previous != None:
+            self.shadowed[ident_id].append(previous)
+        top[ident_id] = node
+
+    def delete_id(self, ident_id: int):
+        node = self.top[ident_id]
+        shadowed = self.shadowed[ident_id]
+        self.top[ident_id] = shadowed.pop() if shadowed else None
+        return node
+
+    def lookup_id(self, ident_id: int) -> Optional[Node]:
+        top = self.top
+        return top[ident_id] if ident_id < len(top) else None
@@ -0,0 +1,161 @@
+"""Parses many files at once, optionally across worker processes."""
+
+import contextlib
+import functools
+import glob
+import mmap
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import ContextManager, Iterable, Iterator, Optional
+
+from asttypes.decl import Decl
+from asttypes.stmt import Stmt
+from driver.fileresult import FileResult
+from driver.parsecache import ParseCache
+from lexer.lexer import Lexer
+from lexer.token import Source
+from parser.parallel import parse_parallel
+from parser.parser import Parser
+from parser.parserresult import ParserResult
+
+
+# Extension of source files picked up from directories.
+SOURCE_SUFFIX = '.ar'
+
+# Work items handed to a worker at once per worker, keeps the pipe busy
+# without making the last batches uneven.
+CHUNKS_PER_JOB = 8
+
+# Caches opened by this process, by directory.
+CACHES: dict[str, ParseCache] = {}
+
+
+def collect_files(paths: Iterable[str]) -> list[str]:
+    """Expands files, directories and glob patterns into a sorted list of
+    files without duplicates. Directories are searched recursively for
+    `.ar` files.
+    """
+    files: set[str] = set()
+    for path in paths:
+        matches: list[str] = glob.glob(path, recursive=True) if glob.has_magic(path) else [path]
+        for match in matches:
+            if os.path.isdir(match):
+                for root, _, names in os.walk(match):
+                    files.update(os.path.join(root, name) for name in names
+                                 if name.endswith(SOURCE_SUFFIX))
+            else:
+                files.add(match)
+    return sorted(files)
+
+
+def open_cache(directory: str) -> ParseCache:
+    """Returns this process's cache for `directory`, so workers keep their
+    size bookkeeping across files.
+    """
+    cache: Optional[ParseCache] = CACHES.get(directory)
+    if cache == None:
+        cache = ParseCache(directory)
+        CACHES[directory] = cache
+    return cache
+
+
+def parse_source(
+    data: Source,
+    executor: Optional[Executor] = None,
+    jobs: int = 1
+) -> tuple[int, ParserResult[list[Decl | Stmt]]]:
+    """Lexes and parses `data`, returning the number of tokens and the
+    result.
+
+    With an `executor` the top-level declarations are parsed on `jobs`
+    workers of it, see `parse_parallel`.
+    """
+    if executor != None:
+        tokens = Lexer(data).lex_buffer()
+        return len(tokens) - 1, parse_parallel(tokens, jobs, executor)
+
+    lexer: Lexer = Lexer(data)
+    parser: Parser = Parser(lexer.iter_tokens())
+    result = parser.parse()
+
+    # Token indices are absolute, so the index of the `End` token is the
+    # number of tokens in the file.
+    return parser.current, result
+
+
+def parse_file(
+    path: str,
+    executor: Optional[Executor] = None,
+    jobs: int = 1,
+    cache_dir: Optional[str] = None
+) -> FileResult:
+    """Lexes and parses one file, returning only its summary.
+
+    With a `cache_dir` the result is looked up in and stored to the
+    `ParseCache` there, a hit skips lexing and parsing. See `parse_source`
+    for `executor` and `jobs`.
+    """
+    try:
+        file = open(path, 'rb')
+    except OSError as e:
+        return FileResult(path, failure=e.strerror)
+
+    with file:
+        # Tokens decode their text from the mapping lazily, see `Lexer` and
+        # `Token`.
+        mapping: ContextManager[Source]
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            mapping = contextlib.nullcontext(b'')
+
+        with mapping as data:
+            cache: Optional[ParseCache] = open_cache(cache_dir) if cache_dir != None else None
+            entry = cache.get(data) if cache != None else None
+            cached: bool = entry != None
+            if entry == None:
+                entry = parse_source(data, executor, jobs)
+                if cache != None:
+                    # Stored while the mapping is open, tokens still holding
+                    # on to it decode their text when pickled.
+                    cache.put(data, entry)
+
+            tokens, result = entry
+            return FileResult(
+                path,
+                len(data),
+                tokens,
+                len(result.data), # type: ignore
+                [(error.offset, error.message) for error in result.errors],
+                cached=cached
+            )
+
+
+def parse_files(
+    files: list[str],
+    jobs: int = 1,
+    split: bool = False,
+    cache_dir: Optional[str] = None
+) -> Iterator[FileResult]:
+    """Parses `files` with `jobs` worker processes, yielding results in
+    the order of `files`. A single job parses in this process.
+
+    Files are handed to the workers whole, or with `split` one after the
+    other with the declarations of each spread over the workers, which
+    suits a few huge files. See `parse_file` for `cache_dir`.
+    """
+    if split and jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for path in files:
+                yield parse_file(path, executor, jobs, cache_dir)
+        return
+
+    work = functools.partial(parse_file, cache_dir=cache_dir)
+    if jobs <= 1 or len(files) <= 1:
+        yield from map(work, files)
+        return
+
+    chunksize: int = max(1, len(files) // (jobs * CHUNKS_PER_JOB))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(work, files, chunksize=chunksize)
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from asttypes.decl import Decl
+
+
+class DeclEntry:
+    """A top-level declaration recorded in a `DeclIndex`.
+
+    `offset` is the offset of the declared name in the file, `arity` the
+    number of parameters of a function and None for other declarations.
+    """
+
+    __slots__ = ('name', 'kind', 'path', 'offset', 'arity')
+
+    def __init__(
+        self,
+        name: str,
+        kind: Decl.Type,
+        path: str,
+        offset: int,
+        arity: Optional[int] = None
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.path = path
+        self.offset = offset
+        self.arity = arity
+
+    def __repr__(self) -> str:
+        return f"DeclEntry({self.name!r}, {self.kind}, {self.path!r}, {self.offset}, {self.arity})"
@@ -0,0 +1,190 @@
+"""Persistent index of the top-level declarations of many files."""
+
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+from typing import Iterable, Optional
+
+from asttypes.decl import ClassDecl, Decl, FuncDecl, LetDecl
+from driver.declentry import DeclEntry
+from driver.parsecache import fingerprint
+from lexer.lexer import Lexer
+from parser.parser import Parser
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   BLOB
+);
+CREATE TABLE IF NOT EXISTS files (
+    id      INTEGER PRIMARY KEY,
+    path    TEXT UNIQUE NOT NULL,
+    mtime   INTEGER NOT NULL,
+    size    INTEGER NOT NULL,
+    hash    BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS decls (
+    name    TEXT NOT NULL,
+    kind    INTEGER NOT NULL,
+    file    INTEGER NOT NULL,
+    start   INTEGER NOT NULL,
+    arity   INTEGER
+);
+CREATE INDEX IF NOT EXISTS decls_by_name ON decls (name);
+CREATE INDEX IF NOT EXISTS decls_by_file ON decls (file);
+"""
+
+
+def top_level_decls(data: bytes) -> list[tuple[str, int, int, Optional[int]]]:
+    """Returns (name, kind, offset, arity) of the top-level declarations in
+    `data`. Bodies are skipped, not parsed.
+    """
+    decls: list[tuple[str, int, int, Optional[int]]] = []
+    for decl in Parser(Lexer(data).lex_buffer(), lazy=True).parse().data:
+        kind = type(decl)
+        if kind is FuncDecl:
+            decls.append((decl.name.get_identifier_data(), Decl.Type.Func.value, # type: ignore
+                          decl.name.start, len(decl.params))) # type: ignore
+        elif kind is ClassDecl or kind is LetDecl:
+            decls.append((decl.name.get_identifier_data(), decl.type.value, # type: ignore
+                          decl.name.start, None)) # type: ignore
+    return decls
+
+
+class DeclIndex:
+    """Names, kinds, offsets and arities of the top-level `FuncDecl`,
+    `ClassDecl` and `LetDecl` of a set of files, kept in an SQLite database
+    so queries need neither parsing nor loading the whole index.
+
+    `update` only reads files whose modification time or size changed
+    since they were indexed, and only parses those whose content hash
+    changed. The index is emptied when the parser's `fingerprint()`
+    changes. Paths are stored absolute.
+
+    Args:
+        path: File of the database, created if missing.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        with self.connection:
+            prefix: bytes = fingerprint()
+            row = self.connection.execute(
+                "SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            if row == None or row[0] != prefix:
+                self.connection.execute("DELETE FROM decls")
+                self.connection.execute("DELETE FROM files")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (prefix,))
+
+    def __enter__(self) -> DeclIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def update(self, files: Iterable[str], prune: bool = True) -> tuple[int, int, int]:
+        """Brings the index up to date with `files`.
+
+        Args:
+            files: Files to index.
+            prune: Also drop indexed files that are not in `files`.
+
+        Returns:
+            The number of files parsed, found unchanged, and dropped.
+        """
+        parsed: int = 0
+        unchanged: int = 0
+        removed: int = 0
+        connection = self.connection
+        known: dict[str, tuple[int, int, int, bytes]] = {
+            path: (file_id, mtime, size, digest) for file_id, path, mtime, size, digest
+            in connection.execute("SELECT id, path, mtime, size, hash FROM files")
+        }
+        seen: set[str] = set()
+
+        with connection:
+            for path in files:
+                path = os.path.abspath(path)
+                seen.add(path)
+                row = known.get(path)
+                try:
+                    stat = os.stat(path)
+                    if row != None and row[1] == stat.st_mtime_ns and row[2] == stat.st_size:
+                        unchanged += 1
+                        continue
+                    with open(path, 'rb') as file:
+                        data: bytes = file.read()
+                except OSError:
+                    if row != None:
+                        self.drop(row[0])
+                        removed += 1
+                    continue
+
+                digest: bytes = hashlib.sha256(data).digest()
+                if row != None and row[3] == digest:
+                    connection.execute("UPDATE files SET mtime = ?, size = ? WHERE id = ?",
+                                       (stat.st_mtime_ns, stat.st_size, row[0]))
+                    unchanged += 1
+                    continue
+
+                if row != None:
+                    self.drop(row[0])
+                file_id = connection.execute(
+                    "INSERT INTO files (path, mtime, size, hash) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_mtime_ns, stat.st_size, digest)).lastrowid
+                connection.executemany(
+                    "INSERT INTO decls VALUES (?, ?, ?, ?, ?)",
+                    [(name, kind, file_id, start, arity)
+                     for name, kind, start, arity in top_level_decls(data)])
+                parsed += 1
+
+            if prune:
+                for path, row in known.items():
+                    if path not in seen:
+                        self.drop(row[0])
+                        removed += 1
+
+        return parsed, unchanged, removed
+
+    def drop(self, file_id: int) -> None:
+        self.connection.execute("DELETE FROM decls WHERE file = ?", (file_id,))
+        self.connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def find(self, name: str, kind: Optional[Decl.Type] = None) -> list[DeclEntry]:
+        """Returns the declarations of `name`, of any kind or of `kind`,
+        ordered by file and offset.
+        """
+        query = ("SELECT decls.name, kind, path, start, arity FROM decls "
+                 "JOIN files ON files.id = decls.file WHERE name = ?")
+        params: tuple = (name,)
+        if kind != None:
+            query += " AND kind = ?"
+            params = (name, kind.value)
+        return [DeclEntry(name, Decl.Type(kind), path, start, arity)
+                for name, kind, path, start, arity
+                in self.connection.execute(query + " ORDER BY path, start", params)]
+
+    def files_declaring(self, name: str, kind: Optional[Decl.Type] = None) -> list[str]:
+        """Returns the files that declare `name` at the top level."""
+        paths: list[str] = []
+        for entry in self.find(name, kind):
+            if not paths or paths[-1] != entry.path:
+                paths.append(entry.path)
+        return paths
+
+    def declarations(self, path: str) -> list[DeclEntry]:
+        """Returns the indexed declarations of the file at `path`."""
+        path = os.path.abspath(path)
+        return [DeclEntry(name, Decl.Type(kind), path, start, arity)
+                for name, kind, start, arity in self.connection.execute(
+                    "SELECT decls.name, kind, start, arity FROM decls "
+                    "JOIN files ON files.id = decls.file WHERE path = ? ORDER BY start",
+                    (path,))]
@@ -0,0 +1,28 @@
+from typing import Optional
+
+
+class FileResult:
+    """Outcome of parsing one file in a batch.
+
+    Only plain values are kept so results cross process boundaries cheaply,
+    the parse tree itself stays in the worker. `diagnostics` holds
+    (offset, message) pairs, `failure` is set instead when the file could
+    not be read. `cached` tells if the result came from the parse cache.
+    """
+    def __init__(
+        self,
+        path: str,
+        size: int = 0,
+        tokens: int = 0,
+        decls: int = 0,
+        diagnostics: Optional[list[tuple[int, str]]] = None,
+        failure: Optional[str] = None,
+        cached: bool = False
+    ) -> None:
+        self.path = path
+        self.size = size
+        self.tokens = tokens
+        self.decls = decls
+        self.diagnostics: list[tuple[int, str]] = diagnostics if diagnostics != None else []
+        self.failure = failure
+        self.cached = cached
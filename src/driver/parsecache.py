@@ -0,0 +1,201 @@
+"""Persistent cache of parse results keyed by file contents."""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, BinaryIO, Optional
+
+from lexer.token import Source
+
+
+# Bump when results change without any change to the modules listed below.
+PARSER_VERSION = 1
+
+# Modules whose source decides what a parse produces: the lexer, the
+# grammar, the token containers and drivers `driver.batch` parses through,
+# and the AST classes, including the tags their `struct_hash` is built
+# from. Editing any of them invalidates the cache.
+FINGERPRINT_MODULES = [
+    'asttypes.astformat',
+    'asttypes.astnode',
+    'asttypes.decl',
+    'asttypes.expr',
+    'asttypes.paramlist',
+    'asttypes.stmt',
+    'core.interner',
+    'core.ops',
+    'core.tokenkind',
+    'lexer.keywords',
+    'lexer.lexer',
+    'lexer.operators',
+    'lexer.token',
+    'lexer.tokenbuffer',
+    'parser.parallel',
+    'parser.parseerror',
+    'parser.parser',
+    'parser.parserresult',
+    'parser.tokenwindow',
+]
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Eviction removes the least recently used entries until the cache is this
+# fraction of its cap, so not every store has to scan the directory.
+LOW_WATER = 0.9
+
+ENTRY_SUFFIX = '.pickle'
+
+
+def fingerprint(
+    modules: list[str] = FINGERPRINT_MODULES,
+    version: str = f"{PARSER_VERSION} {pickle.HIGHEST_PROTOCOL}"
+) -> bytes:
+    """Returns a digest of `version` and the source of `modules`, by default
+    of the parser version and the modules that shape parse results.
+    """
+    digest = hashlib.sha256(version.encode())
+    for name in modules:
+        __import__(name)
+        path: Optional[str] = sys.modules[name].__file__
+        if path != None:
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+    return digest.digest()
+
+
+class ParseCache:
+    """Parse results stored on disk under a hash of the source and the
+    parser's `fingerprint()`, so unchanged files are not parsed again
+    across runs.
+
+    Entries are written to a temporary file and renamed into place, so
+    concurrent processes only ever see complete entries. Hits refresh the
+    entry's modification time and when the cache grows beyond `max_bytes`
+    the entries used least recently are removed.
+
+    Subclasses store other values by overriding `fingerprint`, `load`,
+    `dump` and `suffix`.
+    """
+
+    suffix: str = ENTRY_SUFFIX
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.prefix: bytes = self.fingerprint()
+        # Size of the cache as of the last scan plus what was stored since,
+        # None until the first store scans the directory.
+        self.size: Optional[int] = None
+
+    def fingerprint(self) -> bytes:
+        return fingerprint()
+
+    def load(self, file: BinaryIO) -> Any:
+        return pickle.load(file)
+
+    def dump(self, value: Any, file: BinaryIO) -> None:
+        pickle.dump(value, file, pickle.HIGHEST_PROTOCOL)
+
+    def key(self, source: Source) -> str:
+        """Returns the hex digest `source` is stored under."""
+        digest = hashlib.sha256(self.prefix)
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:] + self.suffix)
+
+    def get(self, source: Source) -> Any:
+        """Returns the value stored for `source`, or None on a miss."""
+        path: str = self.path(self.key(source))
+        try:
+            with open(path, 'rb') as file:
+                value = self.load(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Unreadable entry, e.g. a version of the AST classes that no
+            # longer loads. Drop it and parse again.
+            self.misses += 1
+            self.remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, source: Source, value: Any) -> None:
+        """Stores `value`, e.g. a `ParserResult`, as the result for `source`."""
+        path: str = self.path(self.key(source))
+        directory: str = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                self.dump(value, file)
+                written: int = file.tell()
+            os.replace(temp, path)
+        except BaseException:
+            self.remove(temp)
+            raise
+
+        if self.size == None:
+            self.size = self.scan_size()
+        else:
+            self.size += written
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        """Returns (modification time, size, path) of every entry."""
+        entries: list[tuple[float, int, str]] = []
+        try:
+            shards = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    # removed by another process meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def scan_size(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the cache is below its
+        low water mark.
+        """
+        entries = self.entries()
+        size: int = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, entry_size, path in entries:
+            if size <= self.max_bytes * LOW_WATER:
+                break
+            self.remove(path)
+            size -= entry_size
+        self.size = size
+
+    def remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+
+from asttypes.decl import Decl
+from driver.batch import collect_files
+from driver.declindex import DeclIndex
+
+
+KINDS = {'func': Decl.Type.Func, 'class': Decl.Type.Class, 'let': Decl.Type.Let}
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Find top-level declarations of a name across .ar files.")
+    argparser.add_argument('name', help="declared name to look up")
+    argparser.add_argument('paths', nargs='*',
+                           help="files, directories or glob patterns to index first; "
+                                "without any the index is queried as it is")
+    argparser.add_argument('--kind', choices=sorted(KINDS), help="only declarations of this kind")
+    argparser.add_argument('--prune', action='store_true',
+                           help="drop indexed files that are not among the given paths")
+    argparser.add_argument('--index', default=os.environ.get('ARINDEX', '.arindex'),
+                           help="file of the declaration index (default: $ARINDEX or .arindex)")
+    args = argparser.parse_args()
+
+    with DeclIndex(args.index) as index:
+        if args.paths:
+            index.update(collect_files(args.paths), prune=args.prune)
+        entries = index.find(args.name, KINDS[args.kind] if args.kind != None else None)
+
+    for entry in entries:
+        arity: str = f", arity {entry.arity}" if entry.arity != None else ""
+        print(f"{entry.path}:{entry.offset}: {entry.kind.name.lower()} {entry.name}{arity}")
+    if not entries:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,93 @@
+from bisect import bisect_left, bisect_right
 from curses import ascii
+import enum
+import re
+from typing import Any, Iterator, TextIO
 
+from core.interner import Interner
 from core.tokenkind import TokenKind
 from lexer.keywords import KEYWORDS
-from lexer.token import Token
+from lexer.operators import OPERATORS
+from lexer.token import Source, Token, TokenShift
+from lexer.tokenbuffer import TokenBuffer
+
+
+# Master pattern used by the table-driven engine. Leading whitespace is
+# folded into every match so a whitespace run never costs a loop iteration
+# of its own. Numbers are tried before identifiers so that `12ab` lexes as
+# `12` followed by `ab`, same as the scalar engine.
+TOKEN_PATTERN = re.compile(r"""
+    [ \t\n\r\f\v]*
+    (?:
+        (?P<number>[0-9]+)
+      | (?P<ident>[A-Za-z0-9_]+)
+      | (?P<op>==|!=|<=|>=|[-+*/{}()=!<>,:])
+      | (?P<invalid>[^ \t\n\r\f\v])
+    )
+""", re.VERBOSE)
+
+# Group indices of `TOKEN_PATTERN`, compared against `Match.lastindex`.
+GROUP_NUMBER    = 1
+GROUP_IDENT     = 2
+GROUP_OP        = 3
+GROUP_INVALID   = 4
+
+# Byte versions of the tables for `bytes`, `memoryview` and `mmap` inputs.
+TOKEN_PATTERN_BYTES = re.compile(TOKEN_PATTERN.pattern.encode(), re.VERBOSE)
+KEYWORDS_BYTES = {name.encode(): kind for name, kind in KEYWORDS.items()}
+OPERATORS_BYTES = {op.encode(): kind for op, kind in OPERATORS.items()}
+
+# Number of characters `Lexer.iter_tokens` reads from a file per step.
+CHUNK_SIZE = 1 << 16
+
+# Tokens moved together by `Lexer.relex`, see `TokenShift`. An edit copies
+# the runs it touches and updates every later run once.
+RUN_SIZE = 256
+
+
+def tables_for(
+    source: Source
+) -> tuple[re.Pattern, dict[Any, TokenKind], dict[Any, TokenKind]]:
+    """Returns the master pattern, keyword and operator tables matching the
+    type of `source`.
+    """
+    if isinstance(source, str):
+        return TOKEN_PATTERN, KEYWORDS, OPERATORS
+    return TOKEN_PATTERN_BYTES, KEYWORDS_BYTES, OPERATORS_BYTES
 
 
 class Lexer:
-    def __init__(self, str: str) -> None:
+    class Engine(enum.Enum):
+        Scalar  = enum.auto()   # character at a time if/elif loop
+        Table   = enum.auto()   # precompiled master pattern
+
+    def __init__(
+        self,
+        str: Source,
+        engine: Engine = Engine.Table,
+        interner: Interner | None = None
+    ) -> None:
+        """Creates a lexer.
+
+        Args:
+            str: Input text. The table engine also accepts UTF-8 `bytes`,
+                `memoryview` or `mmap` input, which it scans in place; the
+                scalar engine only handles `str`.
+            engine: Tokenizer loop used by `lex()`.
+            interner: Identifier table shared by the whole compilation. When
+                given, identifier tokens get an `ident_id` and share one
+                string per distinct name.
+        """
         self.str = str
         self.tokens: list[Token] = []
         self.current: int = 0
+        self.engine = engine
+        self.interner = interner
+        # Runs of `relex`: the token list they split, the index of the
+        # first token of each run and the shift its tokens are attached to.
+        self.run_tokens: list[Token] | None = None
+        self.run_starts: list[int] = []
+        self.run_shifts: list[TokenShift] = []
 
     def peek(self) -> str:
         if self.current == len(self.str):
@@ -56,6 +134,9 @@ class Lexer:
 
         if kind == None:
             tok: Token = Token(TokenKind.Identifier)
+            if self.interner != None:
+                tok.ident_id = self.interner.intern(ident)
+                ident = self.interner.names[tok.ident_id]
             tok.set_identifier_data(ident)
         else:
             tok: Token = Token(kind)
@@ -63,7 +144,294 @@ class Lexer:
         self.tokens.append(tok)
 
     def lex(self) -> None:
-        """Main lexer loop."""
+        """Lex the whole input into `self.tokens` using the selected engine."""
+        if self.engine == Lexer.Engine.Table:
+            self.lex_table()
+        else:
+            self.lex_scalar()
+
+    def lex_table(self) -> None:
+        """Table-driven lexer loop.
+
+        Each step matches a whole whitespace run plus the following number,
+        identifier or operator with `TOKEN_PATTERN` and maps it to a kind
+        through the `KEYWORDS`/`OPERATORS` tables. Characters that cannot
+        start a token are emitted as `TokenKind.Invalid`.
+        """
+        self.tokens.extend(self.scan(self.str, self.current, len(self.str)))
+        self.current = len(self.str)
+        self.tokens.append(Token(TokenKind.End, None, self.current, self.current))
+
+    def lex_buffer(self) -> TokenBuffer:
+        """Lex the whole input into a compact `TokenBuffer`.
+
+        Uses the table-driven engine regardless of `self.engine`. The buffer
+        ends with a zero-length `End` token at the end of the input.
+        """
+        buf: TokenBuffer = TokenBuffer(self.str)
+        kinds = buf.kinds.append
+        starts = buf.starts.append
+        lengths = buf.lengths.append
+        pattern, keywords, operators = tables_for(self.str)
+        identifier = TokenKind.Identifier.value
+        number = TokenKind.Number.value
+        invalid = TokenKind.Invalid.value
+
+        for m in pattern.finditer(self.str, self.current):
+            group = m.lastindex
+            start: int = m.start(group)
+
+            if group == GROUP_IDENT:
+                kind = keywords.get(m.group(group))
+                kinds(identifier if kind == None else kind.value)
+            elif group == GROUP_OP:
+                kinds(operators[m.group(group)].value)
+            elif group == GROUP_NUMBER:
+                kinds(number)
+            else:
+                kinds(invalid)
+
+            starts(start)
+            lengths(m.end() - start)
+
+        self.current = len(self.str)
+        buf.append(TokenKind.End, self.current, 0)
+        return buf
+
+    def scan(
+        self,
+        source: Source,
+        pos: int,
+        endpos: int,
+        base: int = 0
+    ) -> Iterator[Token]:
+        """Yields the tokens of `source[pos:endpos]` without the `End` token.
+
+        Token offsets are relative to `source` plus `base`. Tokens scanned
+        from byte input keep a reference to it and decode their text only
+        when it is asked for, so for those `base` must be 0.
+
+        With an interner, identifier text is always decoded and interned.
+        """
+        identifier = TokenKind.Identifier
+        number = TokenKind.Number
+        invalid = TokenKind.Invalid
+        interner = self.interner
+
+        if not isinstance(source, str):
+            pattern, keywords, operators = tables_for(source)
+            for m in pattern.finditer(source, pos, endpos):
+                group = m.lastindex
+                start: int = m.start(group)
+
+                if group == GROUP_IDENT:
+                    kind = keywords.get(m.group(group))
+                    if kind == None and interner != None:
+                        ident_id: int = interner.intern(str(m.group(group), 'utf-8'))
+                        yield Token(identifier, interner.names[ident_id],
+                            start, m.end(), None, ident_id)
+                    elif kind == None:
+                        yield Token(identifier, None, start, m.end(), source)
+                    else:
+                        yield Token(kind, None, start, m.end())
+                elif group == GROUP_OP:
+                    yield Token(operators[m.group(group)], None, start, m.end())
+                elif group == GROUP_NUMBER:
+                    yield Token(number, None, start, m.end(), source)
+                else:
+                    yield Token(invalid, None, start, m.end())
+            return
+
+        keywords = KEYWORDS
+        operators = OPERATORS
+
+        for m in TOKEN_PATTERN.finditer(source, pos, endpos):
+            group = m.lastindex
+            text: str = m.group(group)
+            start: int = m.start(group) + base
+            end: int = m.end() + base
+
+            if group == GROUP_IDENT:
+                kind = keywords.get(text)
+                if kind == None and interner != None:
+                    ident_id: int = interner.intern(text)
+                    yield Token(identifier, interner.names[ident_id], start, end,
+                        None, ident_id)
+                elif kind == None:
+                    yield Token(identifier, text, start, end)
+                else:
+                    yield Token(kind, None, start, end)
+            elif group == GROUP_OP:
+                yield Token(operators[text], None, start, end)
+            elif group == GROUP_NUMBER:
+                yield Token(number, text, start, end)
+            else:
+                yield Token(invalid, None, start, end)
+
+    def relex(
+        self,
+        old_tokens: list[Token],
+        edit_offset: int,
+        removed_len: int,
+        inserted_text: str
+    ) -> list[Token]:
+        """Updates a token list after an edit of the lexer's input.
+
+        Replaces `removed_len` characters at `edit_offset` with
+        `inserted_text` and re-scans only from the first token the edit can
+        touch. As soon as a fresh token starts at the same place as an old
+        token past the edit, the rest of the old tokens are known to be
+        unchanged and are reused.
+
+        Reused tokens are not rewritten one by one. The list is split into
+        runs of tokens attached to one `TokenShift`, and moving the tokens
+        behind the edit adds the edit's length difference to the shift of
+        each later run. Only the runs the edit falls into are rebuilt, from
+        fresh tokens and copies of their old ones. The first edit of a list
+        attaches all of its tokens to runs.
+
+        `old_tokens` must come from the table engine (so that tokens carry
+        offsets) for the current `str` input, including the `End` token. It
+        is spliced in place and also returned, and its tokens report their
+        offsets in the edited input. `self.str` and `self.tokens` are
+        updated to the edited input and the new token list.
+        """
+        assert isinstance(self.str, str), "Cannot relex non-str input!"
+
+        old_source: str = self.str
+        source: str = (old_source[:edit_offset] + inserted_text
+            + old_source[edit_offset + removed_len:])
+        delta: int = len(inserted_text) - removed_len
+        damage_end: int = edit_offset + len(inserted_text)
+
+        if self.run_tokens is not old_tokens:
+            self.attach_runs(old_tokens)
+
+        # The first token ending at or after the edit may grow or shrink,
+        # everything before it is untouched.
+        first: int = bisect_left(old_tokens, edit_offset, key=lambda tok: tok.end)
+        end_index: int = len(old_tokens) - 1
+        pos: int = min(old_tokens[first].start, edit_offset)
+
+        fresh: list[Token] = []
+        resync: int = end_index
+        j: int = first
+        for tok in self.scan(source, pos, len(source)):
+            if tok.start >= damage_end:
+                # Scanning is context free from a token start, so a token
+                # boundary shared with the old stream past the edit means
+                # the old tokens from there on are still valid.
+                old_start: int = tok.start - delta
+                while j < end_index and old_tokens[j].start < old_start:
+                    j += 1
+                if j < end_index and old_tokens[j].start == old_start:
+                    resync = j
+                    break
+            fresh.append(tok)
+
+        runs: list[int] = self.run_starts
+        shifts: list[TokenShift] = self.run_shifts
+        # Rebuild the runs holding the first replaced and the first reused
+        # token, and following ones while that would leave a small run.
+        p: int = bisect_right(runs, first) - 1
+        later: int = bisect_right(runs, resync)
+        region_start: int = runs[p]
+        region_end: int = runs[later] if later < len(runs) else len(old_tokens)
+        while (later < len(runs) and
+               region_end - region_start + len(fresh) - (resync - first) < RUN_SIZE // 2):
+            later += 1
+            region_end = runs[later] if later < len(runs) else len(old_tokens)
+
+        region: list[Token] = [tok.moved(0) for tok in old_tokens[region_start:first]]
+        region.extend(fresh)
+        region.extend(tok.moved(delta) for tok in old_tokens[resync:region_end])
+
+        new_runs: list[int] = []
+        new_shifts: list[TokenShift] = []
+        count: int = max(len(region) // RUN_SIZE, 1)
+        for i in range(count):
+            run_start: int = len(region) * i // count
+            shift = TokenShift()
+            for tok in region[run_start:len(region) * (i + 1) // count]:
+                tok.attach(shift)
+            new_runs.append(region_start + run_start)
+            new_shifts.append(shift)
+
+        growth: int = len(region) - (region_end - region_start)
+        if delta:
+            for shift in shifts[later:]:
+                shift.delta += delta
+        self.run_starts = runs[:p] + new_runs + [start + growth for start in runs[later:]]
+        self.run_shifts = shifts[:p] + new_shifts + shifts[later:]
+
+        old_tokens[region_start:region_end] = region
+
+        self.str = source
+        self.current = len(source)
+        self.tokens = old_tokens
+        return old_tokens
+
+    def attach_runs(self, tokens: list[Token]) -> None:
+        """Splits `tokens`, which must not be attached yet, into runs of
+        `RUN_SIZE` tokens for `relex`.
+        """
+        self.run_tokens = tokens
+        self.run_starts = list(range(0, len(tokens), RUN_SIZE))
+        self.run_shifts = []
+        for start in self.run_starts:
+            shift = TokenShift()
+            for tok in tokens[start:start + RUN_SIZE]:
+                tok.attach(shift)
+            self.run_shifts.append(shift)
+
+    def iter_tokens(
+        self,
+        file: TextIO | None = None,
+        chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[Token]:
+        """Lazily yields tokens, ending with a `TokenKind.End` token.
+
+        Without a `file` the lexer's own string is scanned. With a `file`
+        the input is read `chunk_size` characters at a time and only the
+        current chunk plus the unfinished tail of the previous one is held
+        in memory.
+
+        A token can only be split by a chunk boundary if no whitespace
+        follows it inside the chunk, so each chunk is scanned up to its
+        last whitespace character and the rest is carried over. This also
+        keeps two-char operators like `==` and `<=` together.
+        """
+        if file is None:
+            yield from self.scan(self.str, self.current, len(self.str))
+            self.current = len(self.str)
+            yield Token(TokenKind.End, None, self.current, self.current)
+            return
+
+        # Offset of `tail` in the whole input.
+        base: int = 0
+        tail: str = ''
+        while True:
+            chunk: str = file.read(chunk_size)
+            if not chunk:
+                break
+
+            buf: str = tail + chunk
+            cut: int = max(buf.rfind(' '), buf.rfind('\n'), buf.rfind('\t'))
+            if cut < 0:
+                # No safe split point yet, keep accumulating.
+                tail = buf
+                continue
+
+            yield from self.scan(buf, 0, cut, base)
+            tail = buf[cut:]
+            base += cut
+
+        yield from self.scan(tail, 0, len(tail), base)
+        base += len(tail)
+        yield Token(TokenKind.End, None, base, base)
+
+    def lex_scalar(self) -> None:
+        """Character at a time lexer loop."""
         str_len: int = len(self.str)
 
         while (self.current < str_len):
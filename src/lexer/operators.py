@@ -0,0 +1,23 @@
+from core.tokenkind import TokenKind
+
+
+OPERATORS: dict[str, TokenKind] = {
+    '+':    TokenKind.Op_Plus,
+    '-':    TokenKind.Op_Minus,
+    '*':    TokenKind.Op_Star,
+    '/':    TokenKind.Op_Slash,
+    '{':    TokenKind.Op_LBrace,
+    '}':    TokenKind.Op_RBrace,
+    '(':    TokenKind.Op_LParen,
+    ')':    TokenKind.Op_RParen,
+    '=':    TokenKind.Op_Equal,
+    '==':   TokenKind.Op_EqualEqual,
+    '!':    TokenKind.Op_Exclaim,
+    '!=':   TokenKind.Op_ExclaimEqual,
+    '>':    TokenKind.Op_Greater,
+    '>=':   TokenKind.Op_GreaterEqual,
+    '<':    TokenKind.Op_Less,
+    '<=':   TokenKind.Op_LessEqual,
+    ',':    TokenKind.Op_Comma,
+    ':':    TokenKind.Op_Colon,
+}
@@ -1,10 +1,83 @@
+from __future__ import annotations
+from mmap import mmap
+
 from core.tokenkind import TokenKind
 
 
+# Input the lexer can scan. Byte sources are expected to be UTF-8.
+Source = str | bytes | memoryview | mmap
+
+
+class TokenShift:
+    """Distance the tokens attached to it moved by since they were
+    attached, so that `Lexer.relex` moves a whole run of tokens at once.
+    """
+
+    __slots__ = ('delta',)
+
+    def __init__(self) -> None:
+        self.delta: int = 0
+
+
 class Token:
-    def __init__(self, kind: TokenKind) -> None:
+    __slots__ = ('__kind', '__data', '__source', '__start', '__end', '__shift', 'ident_id')
+
+    def __init__(
+        self,
+        kind: TokenKind,
+        data: str | None = None,
+        start: int = -1,
+        end: int = -1,
+        source: Source | None = None,
+        ident_id: int = -1
+    ) -> None:
+        """Creates a token.
+
+        Args:
+            kind: Kind of the token.
+            data: Identifier name or literal text.
+            start: Offset of the first character in the source, -1 if unknown.
+            end: Offset one past the last character, -1 if unknown.
+            source: Input to decode `data` from on first access, when `data`
+                is not given. Lets byte and mmap inputs skip copying text for
+                tokens whose text is never asked for.
+            ident_id: Id of the identifier in the lexer's `Interner`, -1 if
+                the token is not an identifier or was not interned.
+        """
         self.__kind = kind
-        self.__data: str | None = None
+        self.__data: str | None = data
+        self.__source = source
+        self.__start = start
+        self.__end = end
+        self.__shift: TokenShift | None = None
+        self.ident_id = ident_id
+
+    @property
+    def kind(self) -> TokenKind:
+        return self.__kind
+
+    @property
+    def start(self) -> int:
+        if self.__shift == None:
+            return self.__start
+        return self.__start + self.__shift.delta
+
+    @property
+    def end(self) -> int:
+        if self.__shift == None:
+            return self.__end
+        return self.__end + self.__shift.delta
+
+    def attach(self, shift: TokenShift) -> None:
+        """Makes the offsets relative to `shift` from now on. The token must
+        not be attached yet and `shift` must not have moved.
+        """
+        self.__shift = shift
+
+    def moved(self, delta: int) -> Token:
+        """Returns a copy of the token `delta` characters further."""
+        return Token(self.__kind, self.__load_data(), self.start + delta, self.end + delta,
+            None, self.ident_id)
 
     def is_identifier(self) -> bool:
         return self.is_kind(TokenKind.Identifier)
@@ -22,13 +95,25 @@ class Token:
 
     def get_literal_data(self) -> str | None:
         assert self.is_literal(), "Cannot get literal data for non-literal!"
-        return self.__data
+        return self.__load_data()
 
     def get_identifier_data(self) -> str | None:
         if self.is_literal():
             return None
+        return self.__load_data()
+
+    def __load_data(self) -> str | None:
+        if self.__data == None and self.__source != None:
+            self.__data = str(self.__source[self.start:self.end], 'utf-8')
+            self.__source = None
         return self.__data
 
+    def __reduce__(self) -> tuple:
+        # Decode lazily held text first, the source may be a mapping that
+        # cannot be pickled and only the token's own text is needed.
+        return (Token, (self.__kind, self.__load_data(), self.start, self.end,
+            None, self.ident_id))
+
     def is_kind(self, tok_kind: TokenKind) -> bool:
         return self.__kind == tok_kind
 
@@ -44,6 +129,7 @@ class Token:
 
     def __str__(self) -> str:
         s = 'kind: ' + str(self.__kind)
-        if self.__data != None:
-            s += ', data: ' + self.__data
+        data = self.__load_data()
+        if data != None:
+            s += ', data: ' + data
         return s
@@ -0,0 +1,78 @@
+from array import array
+
+from core.tokenkind import TokenKind
+from lexer.token import Source, Token
+
+
+# Maps `TokenKind.value` back to the enum member.
+KINDS: list[TokenKind | None] = [None] * (max(k.value for k in TokenKind) + 1)
+for kind in TokenKind:
+    KINDS[kind.value] = kind
+
+
+class TokenBuffer:
+    """Compact struct-of-arrays token storage.
+
+    Instead of one `Token` object per token the buffer keeps three packed
+    arrays: the kind of each token as a byte and its start offset and length
+    in the original source. No substrings are copied while lexing; the text
+    of a token is sliced out of the source only when it is asked for.
+
+    Indexing a buffer materializes a `Token`, so it can be used wherever a
+    token list is expected. The parser avoids that on its hot path by
+    reading kinds through `kind_at()`.
+
+    A buffer may hold only part of a file, then `source` starts at offset
+    `base` of the file and offsets stay those of the whole file.
+    """
+
+    def __init__(self, source: Source, base: int = 0) -> None:
+        self.source = source
+        self.base = base
+        self.kinds: array[int] = array('B')
+        self.starts: array[int] = array('I')
+        self.lengths: array[int] = array('I')
+
+    def append(self, kind: TokenKind, start: int, length: int) -> None:
+        self.kinds.append(kind.value)
+        self.starts.append(start)
+        self.lengths.append(length)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind_at(self, index: int) -> TokenKind:
+        return KINDS[self.kinds[index]] # type: ignore
+
+    def text_at(self, index: int) -> str:
+        start: int = self.starts[index] - self.base
+        text = self.source[start:start + self.lengths[index]]
+        if isinstance(text, str):
+            return text
+        return str(text, 'utf-8')
+
+    def __getitem__(self, index: int) -> Token:
+        kind: TokenKind = self.kind_at(index)
+        start: int = self.starts[index]
+        end: int = start + self.lengths[index]
+        if kind == TokenKind.Identifier or kind == TokenKind.Number:
+            return Token(kind, self.text_at(index), start, end)
+        return Token(kind, None, start, end)
+
+    def slice(self, begin: int, end: int) -> 'TokenBuffer':
+        """Returns a buffer of the tokens `begin` up to `end`, followed by an
+        `End` token where token `end` starts. Only the source those tokens
+        cover is copied.
+        """
+        low: int = self.starts[begin]
+        high: int = self.starts[end] if end < len(self) else self.base + len(self.source)
+        buf: TokenBuffer = TokenBuffer(self.source[low - self.base:high - self.base], low)
+        buf.kinds = self.kinds[begin:end]
+        buf.starts = self.starts[begin:end]
+        buf.lengths = self.lengths[begin:end]
+        buf.append(TokenKind.End, high, 0)
+        return buf
+
+    def nbytes(self) -> int:
+        """Size of the packed arrays in bytes."""
+        return sum(a.itemsize * len(a) for a in (self.kinds, self.starts, self.lengths))
@@ -1,38 +1,63 @@
 #!/usr/bin/env python3
 
+import argparse
+import os
 import sys
-from asttypes.expr import Expr
+import time
 
-from lexer.lexer import Lexer
-from parser.parser import Parser
+from driver.batch import collect_files, parse_files
 
 
 def main():
-    # argc = len(sys.argv)
-    filename: str = 'test/main.ar'
-
-    # if argc >= 2:
-    #     filename = sys.argv[1]
-    # else:
-    #     sys.exit(1)
-
-    # read file
-    data: str = ''
-    try:
-        with open(filename, 'r') as file:
-            data = file.read()
-    except Exception as e:
-        print(f"Failed to open {filename}: {e.args[1]}!")
-        sys.exit(e.args[0])
-
-    # lexer invoking
-    lexer: Lexer = Lexer(data)
-    lexer.lex()
-
-    # parser invoking
-    parser: Parser = Parser(lexer.tokens)
-    expr: Expr | None = parser.parse() # type: ignore
+    argparser = argparse.ArgumentParser(description="Lex and parse .ar files.")
+    argparser.add_argument('paths', nargs='*', default=['test/main.ar'],
+                           help="files, directories or glob patterns")
+    argparser.add_argument('-j', '--jobs', type=int, default=1,
+                           help="number of worker processes (0 for one per core)")
+    argparser.add_argument('--split', action='store_true',
+                           help="spread the declarations of each file over the workers")
+    argparser.add_argument('--cache-dir', default=os.environ.get('ARCACHE', '.arcache'),
+                           help="directory of the parse cache (default: $ARCACHE or .arcache)")
+    argparser.add_argument('--no-cache', action='store_true',
+                           help="always parse, neither read nor write the cache")
+    args = argparser.parse_args()
 
+    jobs: int = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    files: list[str] = collect_files(args.paths)
+    if not files:
+        print("No input files!")
+        sys.exit(1)
+
+    failed: bool = False
+    size: int = 0
+    tokens: int = 0
+    hits: int = 0
+    misses: int = 0
+    start: float = time.perf_counter()
+
+    for result in parse_files(files, jobs, args.split, None if args.no_cache else args.cache_dir):
+        if result.failure != None:
+            print(f"Failed to open {result.path}: {result.failure}!")
+            failed = True
+            continue
+
+        for offset, message in result.diagnostics:
+            print(f"{result.path}:{offset}: error: {message}")
+        size += result.size
+        tokens += result.tokens
+        if result.cached:
+            hits += 1
+        else:
+            misses += 1
+
+    elapsed: float = time.perf_counter() - start
+    if len(files) > 1:
+        print(f"{len(files)} files, {size / 1e6:.2f} MB, {tokens} tokens in {elapsed:.3f}s "
+              f"({size / 1e6 / elapsed:.2f} MB/s, {tokens / elapsed:.0f} tok/s, {jobs} jobs, "
+              f"{hits} cache hits, {misses} misses)")
+
+    if failed:
+        sys.exit(1)
     print("Done")
 
 
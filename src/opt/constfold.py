@@ -0,0 +1,225 @@
+"""Constant folding and algebraic simplification of expressions."""
+
+from __future__ import annotations
+from typing import Iterable, TypeVar
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, InvalidDecl, LetDecl
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    Expr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.nodevisitor import NodeVisitor
+from asttypes.stmt import BlockStmt, ExprStmt, IfStmt, ReturnStmt, Stmt, WhileStmt
+from asttypes.walker import postorder
+from core.ops import COMPARISON_OPS, LOGICAL_OPS, BinaryOp, UnaryOp, apply_binary, apply_unary
+
+
+N = TypeVar('N', bound=ASTNode)
+
+class ConstantFolder(NodeVisitor[ASTNode]):
+    """Rewrites trees with constant subexpressions folded.
+
+    - Operators over literals become literals, except for a division by
+      zero, which is left to fail at run time.
+    - `GroupExpr` wrappers are dropped, the tree already encodes grouping.
+    - `x + 0`, `0 + x`, `x - 0`, `x * 1`, `1 * x`, `x / 1` and `- - x`
+      become `x`.
+    - `and`/`or` with a constant operand are short-circuited. Operands
+      that are kept but may not be 1 or 0 are wrapped in `!!`. Operands
+      are only dropped when they would not be evaluated, so `x and 0`
+      stays, evaluating `x` may fail.
+    - `return e if c` with a constant `c` other than 0 loses the condition.
+
+    Operands are assumed to be integers. The input trees are not modified,
+    unchanged subtrees are shared with the result. The tree is walked
+    without recursing.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Replacements of the nodes visited so far, by id of the original.
+        self.replaced: dict[int, ASTNode] = {}
+
+    def fold(self, roots: Iterable[N]) -> list[N]:
+        """Returns the folded `roots`."""
+        roots = list(roots)
+        replaced = self.replaced
+        visit = self.visit
+        try:
+            for node in postorder(roots):
+                new = visit(node)
+                if new is not node:
+                    replaced[id(node)] = new
+            return [replaced.get(id(root), root) for root in roots] # type: ignore
+        finally:
+            replaced.clear()
+
+    def get(self, node: N) -> N:
+        """Returns the replacement of an already visited `node`."""
+        return self.replaced.get(id(node), node) # type: ignore
+
+    # ------------------------------ Expressions ------------------------------
+    def visit_invalid_expr(self, invalid_expr: InvalidExpr) -> ASTNode:
+        return invalid_expr
+
+    def visit_assign_expr(self, assign_expr: AssignExpr) -> ASTNode:
+        value = self.get(assign_expr.value)
+        if value is assign_expr.value:
+            return assign_expr
+        return AssignExpr(assign_expr.name, value)
+
+    def visit_call_expr(self, call_expr: CallExpr) -> ASTNode:
+        callee = self.get(call_expr.callee)
+        args = [self.get(arg) for arg in call_expr.args]
+        if callee is call_expr.callee and all(new is old for new, old in zip(args, call_expr.args)):
+            return call_expr
+        return CallExpr(callee, args)
+
+    def visit_unary_expr(self, unary_expr: UnaryExpr) -> ASTNode:
+        expr = self.get(unary_expr.expr)
+        if type(expr) is LiteralExpr:
+            return literal(apply_unary(unary_expr.op, expr.value))
+        if (unary_expr.op is UnaryOp.Negate and type(expr) is UnaryExpr
+            and expr.op is UnaryOp.Negate):
+            return expr.expr
+        if expr is unary_expr.expr:
+            return unary_expr
+        return UnaryExpr(unary_expr.op, expr)
+
+    def visit_binary_expr(self, binary_expr: BinaryExpr) -> ASTNode:
+        op: BinaryOp = binary_expr.op
+        lhs = self.get(binary_expr.lhs)
+        rhs = self.get(binary_expr.rhs)
+        left = lhs.value if type(lhs) is LiteralExpr else None
+        right = rhs.value if type(rhs) is LiteralExpr else None
+
+        if left != None and right != None:
+            if op is not BinaryOp.Div or right != 0:
+                return literal(apply_binary(op, left, right))
+        elif op is BinaryOp.And:
+            if left != None:
+                return literal(0) if left == 0 else as_bool(rhs)
+            if right != None:
+                if right != 0:
+                    return as_bool(lhs)
+        elif op is BinaryOp.Or:
+            if left != None:
+                return literal(1) if left != 0 else as_bool(rhs)
+            if right != None:
+                if right == 0:
+                    return as_bool(lhs)
+        elif op is BinaryOp.Add:
+            if left == 0:
+                return rhs
+            if right == 0:
+                return lhs
+        elif op is BinaryOp.Sub:
+            if right == 0:
+                return lhs
+        elif op is BinaryOp.Mul:
+            if left == 1:
+                return rhs
+            if right == 1:
+                return lhs
+        elif op is BinaryOp.Div:
+            if right == 1:
+                return lhs
+
+        if lhs is binary_expr.lhs and rhs is binary_expr.rhs:
+            return binary_expr
+        return BinaryExpr(lhs, op, rhs)
+
+    def visit_literal_expr(self, literal_expr: LiteralExpr) -> ASTNode:
+        return literal_expr
+
+    def visit_group_expr(self, group_expr: GroupExpr) -> ASTNode:
+        return self.get(group_expr.expr)
+
+    def visit_variable_expr(self, variable_expr: VariableExpr) -> ASTNode:
+        return variable_expr
+
+    # ------------------------------ Statements ------------------------------
+    def visit_block_stmt(self, block_stmt: BlockStmt) -> ASTNode:
+        elems = [self.get(elem) for elem in block_stmt.elems]
+        if all(new is old for new, old in zip(elems, block_stmt.elems)):
+            return block_stmt
+        return BlockStmt(elems)
+
+    def visit_expr_stmt(self, expr_stmt: ExprStmt) -> ASTNode:
+        expr = self.get(expr_stmt.expr)
+        return expr_stmt if expr is expr_stmt.expr else ExprStmt(expr)
+
+    def visit_if_stmt(self, if_stmt: IfStmt) -> ASTNode:
+        cond = self.get(if_stmt.cond)
+        thenbranch = self.get(if_stmt.thenbranch)
+        elsebranch = self.get(if_stmt.elsebranch) if if_stmt.elsebranch != None else None
+        if (cond is if_stmt.cond and thenbranch is if_stmt.thenbranch
+            and elsebranch is if_stmt.elsebranch):
+            return if_stmt
+        return IfStmt(cond, thenbranch, elsebranch)
+
+    def visit_while_stmt(self, while_stmt: WhileStmt) -> ASTNode:
+        cond = self.get(while_stmt.cond)
+        body = self.get(while_stmt.body)
+        if cond is while_stmt.cond and body is while_stmt.body:
+            return while_stmt
+        return WhileStmt(cond, body)
+
+    def visit_return_stmt(self, return_stmt: ReturnStmt) -> ASTNode:
+        expr = self.get(return_stmt.expr) if return_stmt.expr != None else None
+        cond = self.get(return_stmt.cond) if return_stmt.cond != None else None
+        if type(cond) is LiteralExpr and cond.value != 0:
+            cond = None
+        if expr is return_stmt.expr and cond is return_stmt.cond:
+            return return_stmt
+        return ReturnStmt(expr, cond)
+
+    # ------------------------------ Declarations ------------------------------
+    def visit_invalid_decl(self, invalid_decl: InvalidDecl) -> ASTNode:
+        return invalid_decl
+
+    def visit_let(self, let_decl: LetDecl) -> ASTNode:
+        if let_decl.initializer == None:
+            return let_decl
+        initializer = self.get(let_decl.initializer)
+        if initializer is let_decl.initializer:
+            return let_decl
+        return LetDecl(let_decl.name, initializer)
+
+    def visit_func(self, func_decl: FuncDecl) -> ASTNode:
+        body = self.get(func_decl.body)
+        if body is func_decl.body:
+            return func_decl
+        return FuncDecl(func_decl.name, func_decl.params, body)
+
+    def visit_class(self, class_decl: ClassDecl) -> ASTNode:
+        body = self.get(class_decl.body)
+        if body is class_decl.body:
+            return class_decl
+        return ClassDecl(class_decl.name, class_decl.inherited, body)
+
+
+def literal(value: int) -> LiteralExpr:
+    return LiteralExpr(str(value))
+
+
+def as_bool(expr: Expr) -> Expr:
+    """Returns an expression that is 1 where `expr` is not 0 and 0 where it
+    is 0.
+    """
+    kind = type(expr)
+    if kind is BinaryExpr and (expr.op in COMPARISON_OPS or expr.op in LOGICAL_OPS): # type: ignore
+        return expr
+    if kind is UnaryExpr and expr.op is UnaryOp.Not: # type: ignore
+        return expr
+    if kind is LiteralExpr:
+        return literal(1 if expr.value != 0 else 0) # type: ignore
+    return UnaryExpr(UnaryOp.Not, UnaryExpr(UnaryOp.Not, expr))
@@ -0,0 +1,127 @@
+"""Parses the top-level declarations of one file in worker processes."""
+
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor
+import gc
+from typing import Optional
+
+from asttypes.decl import Decl
+from asttypes.stmt import Stmt
+
+from core.tokenkind import TokenKind
+
+from lexer.tokenbuffer import TokenBuffer
+
+from parser.parseerror import ParseError
+from parser.parser import Parser
+from parser.parserresult import ParserResult
+
+
+# Chunks per worker, more than one so a slow chunk does not leave the other
+# workers idle at the end.
+CHUNKS_PER_JOB = 4
+
+# Keywords that start a declaration. Outside of any braces none of them can
+# continue the declaration before it, so the stream can be cut in front of
+# them.
+DECL_START: frozenset[int] = frozenset({
+    TokenKind.Kw_let.value,
+    TokenKind.Kw_func.value,
+    TokenKind.Kw_class.value,
+})
+
+
+def split_points(tokens: TokenBuffer, chunks: int) -> list[int]:
+    """Returns the token indices the stream is cut at into about `chunks`
+    pieces of similar size, in one scan over the token kinds.
+
+    The list starts with 0 and ends with the index of the `End` token; every
+    index in between is a top-level `let`, `func` or `class` outside of any
+    braces.
+    """
+    lbrace: int = TokenKind.Op_LBrace.value
+    rbrace: int = TokenKind.Op_RBrace.value
+    last: int = len(tokens) - 1
+    step: int = max(1, last // max(1, chunks))
+
+    points: list[int] = [0]
+    target: int = step
+    depth: int = 0
+    for index, kind in enumerate(tokens.kinds):
+        if kind == lbrace:
+            depth += 1
+        elif kind == rbrace:
+            depth -= 1
+        elif depth == 0 and index >= target and kind in DECL_START and index < last:
+            points.append(index)
+            target = index + step
+    points.append(last)
+    return points
+
+
+def parse_chunk(tokens: TokenBuffer) -> ParserResult[list[Decl | Stmt]]:
+    """Parses the declarations of one chunk, runs in the workers.
+
+    The collector is paused while the tree is built, it is acyclic and
+    collections triggered by its allocations would only walk it in vain.
+    """
+    enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        return Parser(tokens).parse()
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def parse_parallel(
+    tokens: TokenBuffer,
+    jobs: int,
+    executor: Optional[Executor] = None
+) -> ParserResult[list[Decl | Stmt]]:
+    """Parses a lexed program with its top-level declarations spread over
+    `jobs` worker processes. The result is the same as `Parser(tokens).parse()`.
+
+    Chunks are cut where braces are balanced and a declaration starts, so
+    for valid input every chunk parses exactly like that stretch of the
+    serial parse and the results are simply joined in order. If any chunk
+    has errors the cut may not match where the serial parser would have
+    been, so the whole source is parsed again serially instead.
+
+    Args:
+        tokens: The whole program, from `Lexer.lex_buffer()`.
+        jobs: Number of worker processes.
+        executor: Pool to run the chunks on, a new one is created and shut
+            down again if not given.
+    """
+    points: list[int] = split_points(tokens, jobs * CHUNKS_PER_JOB)
+    chunks: list[TokenBuffer] = [tokens.slice(points[i], points[i + 1])
+                                 for i in range(len(points) - 1)]
+
+    # Results are unpickled in a thread of this process, pause the collector
+    # there as well, see `parse_chunk`.
+    enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        if executor == None:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(parse_chunk, chunks))
+        else:
+            results = list(executor.map(parse_chunk, chunks))
+    finally:
+        if enabled:
+            gc.enable()
+
+    decls: list[Decl | Stmt] = []
+    spans: list[tuple[int, int]] = []
+    errors: list[ParseError] = []
+    error_ranges: list[tuple[int, int]] = []
+    for result in results:
+        decls.extend(result.data) # type: ignore
+        spans.extend(result.spans)
+        error_ranges.extend(result.error_ranges)
+        errors.extend(result.errors)
+
+    if errors:
+        return Parser(tokens).parse()
+    return ParserResult(decls, errors, spans, error_ranges)
@@ -0,0 +1,25 @@
+from lexer.token import Token
+
+
+class ParseError(Exception):
+    """A syntax error found by the parser.
+
+    Raised to unwind to the nearest declaration boundary, where the parser
+    records it and resynchronizes; also recorded directly for errors the
+    parser can step over in place.
+    """
+
+    def __init__(self, message: str, token: Token) -> None:
+        # Both arguments go to `args` so errors can be pickled, e.g. when
+        # they come back from worker processes.
+        super().__init__(message, token)
+        self.message = message
+        self.token = token
+
+    @property
+    def offset(self) -> int:
+        """Offset of the offending token in the source, -1 if unknown."""
+        return self.token.start
+
+    def __str__(self) -> str:
+        return self.message
@@ -1,6 +1,10 @@
 """Contains the parser implementation."""
 
 from __future__ import annotations
+from bisect import bisect_left, bisect_right
+import re
+from typing import Callable, Iterable
+
 from asttypes.astnode import ASTNode
 
 from asttypes.expr import (
@@ -31,21 +35,111 @@ from asttypes.decl import (
     LetDecl
 )
 
-from core.ops import BinaryOp, UnaryOp, token_to_binaryop, token_to_unaryop
+from core.interner import Interner
+from core.ops import BinaryOp, UnaryOp
 from core.tokenkind import TokenKind
 
+from lexer.lexer import Lexer
 from lexer.token import Token
+from lexer.tokenbuffer import TokenBuffer
+
+from parser.parseerror import ParseError
+from parser.parserresult import ParserResult
+from parser.tokenwindow import TokenWindow
+
+
+# Binding power and operator of every binary operator token. Higher binds
+# tighter and all binary operators are left associative, matching the
+# logicalOr ... factor levels of the grammar.
+BINARY_OPS: dict[TokenKind, tuple[int, BinaryOp]] = {
+    TokenKind.Kw_or:            (1, BinaryOp.Or),
+    TokenKind.Kw_and:           (2, BinaryOp.And),
+    TokenKind.Op_EqualEqual:    (3, BinaryOp.EqEq),
+    TokenKind.Op_ExclaimEqual:  (3, BinaryOp.NotEq),
+    TokenKind.Op_Less:          (4, BinaryOp.Less),
+    TokenKind.Op_LessEqual:     (4, BinaryOp.LessEq),
+    TokenKind.Op_Greater:       (4, BinaryOp.Greater),
+    TokenKind.Op_GreaterEqual:  (4, BinaryOp.GreaterEq),
+    TokenKind.Op_Plus:          (5, BinaryOp.Add),
+    TokenKind.Op_Minus:         (5, BinaryOp.Sub),
+    TokenKind.Op_Star:          (6, BinaryOp.Mul),
+    TokenKind.Op_Slash:         (6, BinaryOp.Div),
+}
+
+UNARY_OPS: dict[TokenKind, UnaryOp] = {
+    TokenKind.Op_Minus:         UnaryOp.Negate,
+    TokenKind.Op_Exclaim:       UnaryOp.Not,
+}
+
+# Tokens that can start an expression.
+EXPR_START: frozenset[TokenKind] = frozenset({
+    TokenKind.Number,
+    TokenKind.Identifier,
+    TokenKind.Op_LParen,
+    TokenKind.Op_Minus,
+    TokenKind.Op_Exclaim,
+})
+
+# Tokens the parser resynchronizes on after an error, they start or end a
+# declaration or statement.
+SYNC_TOKENS: frozenset[TokenKind] = frozenset({
+    TokenKind.Op_RBrace,
+    TokenKind.Kw_let,
+    TokenKind.Kw_func,
+    TokenKind.Kw_class,
+    TokenKind.Kw_if,
+    TokenKind.Kw_while,
+    TokenKind.Kw_return,
+})
+
+
+# Matches the kind byte of either brace in `TokenBuffer.kinds`.
+BRACE_KINDS = re.compile(b'[' + re.escape(bytes([TokenKind.Op_LBrace.value]))
+    + re.escape(bytes([TokenKind.Op_RBrace.value])) + b']')
 
 
 class Parser:
-    def __init__(self, tokens: list[Token]) -> None:
+    def __init__(
+        self,
+        tokens: list[Token] | TokenBuffer | Iterable[Token],
+        lazy: bool = False
+    ) -> None:
         """Creates a parser object.
 
         Args:
-            tokens: List of tokens from the lexer.
+            tokens: List of tokens from the lexer, a `TokenBuffer`, or any
+                token iterator such as `Lexer.iter_tokens()`. Iterators are
+                read through a small `TokenWindow` so the whole stream is
+                never held in memory.
+            lazy: Skip function and class bodies by brace matching and parse
+                each one on first access to its `body`, see `BodyDecl`.
+                Errors inside a body are added to `errors` only then. Needs
+                a token list or `TokenBuffer`. Trees and errors are those of
+                an eager parse only for input without syntax errors: after
+                an error the eager parser resynchronizes on the next
+                statement and may pass over braces, so where bodies and
+                declarations end, and the errors reported, can differ.
         """
-        self.tokens: list[Token] = tokens
+        if isinstance(tokens, TokenBuffer):
+            # Read kinds straight out of the packed array, tokens are only
+            # materialized when the parser needs their text.
+            self.kind_at = tokens.kind_at
+        elif not isinstance(tokens, list):
+            if lazy:
+                raise ValueError("Lazy parsing needs a token list or TokenBuffer.")
+            tokens = TokenWindow(tokens)
+
+        self.tokens: list[Token] | TokenBuffer | TokenWindow = tokens
         self.current: int = 0
+        self.errors: list[ParseError] = []
+        self.error_index: int = -1
+        self.lazy: bool = lazy
+        # Kinds of a `TokenBuffer` as bytes, for skipping bodies.
+        self.kind_bytes: bytes | None = None
+
+    def kind_at(self, index: int) -> TokenKind:
+        """Returns the kind of the token at `index`."""
+        return self.tokens[index].kind
 
     def peek(self) -> Token:
         """Returns the current token before it is consumed."""
@@ -56,28 +150,61 @@ class Parser:
         return self.tokens[self.current - 1]
 
     def is_at_end(self) -> bool:
-        return self.peek().is_kind(TokenKind.End)
+        return self.kind_at(self.current) == TokenKind.End
 
     def consume(self) -> Token:
         """Advances to the next token in the list. Returns the currently
         consumed token.
         """
-        if not self.is_at_end():
-            self.current += 1
+        self.advance()
         return self.previous()
 
+    def advance(self) -> None:
+        """Advances to the next token without fetching the consumed one."""
+        if self.kind_at(self.current) != TokenKind.End:
+            self.current += 1
+
     def must_consume(self, kind: TokenKind, message: str):
         """Consume the given kind of token and if current token is not of
-        that kind then raise an error exception.
+        that kind then raise a `ParseError`.
         """
         if self.check(kind):
             return self.consume()
         else:
-            raise Exception(message)
+            raise ParseError(message, self.peek())
+
+    def report(self, message: str) -> None:
+        """Records an error at the current token without unwinding."""
+        self.record(ParseError(message, self.peek()))
+
+    def record(self, error: ParseError) -> None:
+        """Records `error` unless one was already recorded at the current
+        token, follow-up errors at the same place only add noise.
+        """
+        if self.error_index != self.current:
+            self.error_index = self.current
+            self.errors.append(error)
+
+    def recover(self, error: ParseError, start: int) -> InvalidDecl:
+        """Records `error` raised while parsing the declaration that began at
+        token `start` and skips to the next declaration boundary (panic
+        mode). Returns the node standing in for the broken declaration.
+        """
+        self.record(error)
+
+        # Always make progress, or the same error would come up again.
+        if self.current == start:
+            self.advance()
+
+        sync_tokens = SYNC_TOKENS
+        while not self.is_at_end() and self.kind_at(self.current) not in sync_tokens:
+            self.current += 1
+
+        return InvalidDecl()
 
     def check(self, kind: TokenKind) -> bool:
         """Check if current token is of specified kind."""
-        return self.peek().is_kind(kind)
+        return self.kind_at(self.current) == kind
 
     def match(self, *kinds: TokenKind) -> bool:
         """Checks if current token is of specified kind. If it is
@@ -85,105 +212,89 @@ class Parser:
 
         Use `previous()` method to get the consumed token.
         """
-        if self.peek().is_any(*kinds):
-            self.consume()
+        if self.kind_at(self.current) in kinds:
+            self.advance()
             return True
         return False
 
     # ------------------------------ Expressions ------------------------------
     def parse_expr(self) -> Expr:
-        return self.parse_assignment_expr()
-
-    def parse_assignment_expr(self) -> Expr:
-        expr = self.parse_logical_or()
+        """expression:
+            IDENTIFIER '=' expression |
+            binary-expression;
+        """
+        expr: Expr = self.parse_binary_expr(1)
 
         if self.match(TokenKind.Op_Equal):
-            # TODO: Implement assignment
-            value: Expr = self.parse_assignment_expr()
+            value: Expr = self.parse_expr()
 
             # Check if the left hand expression is a valid l-value
             # i.e., left hand should be a variable expression
             if isinstance(expr, VariableExpr):
-                name: Token = expr.name
-                return AssignExpr(name, value)
+                return AssignExpr(expr.name, value)
             else:
-                raise Exception("Invalid assignment expression.")
-
-        return expr
-
-    def parse_logical_or(self) -> Expr:
-        expr = self.parse_logical_and()
-
-        while self.match(TokenKind.Kw_or):
-            right: Expr = self.parse_logical_and()
-            expr = BinaryExpr(expr, BinaryOp.Or, right)
-
-        return expr
-
-    def parse_logical_and(self) -> Expr:
-        expr = self.parse_equality_expr()
-
-        while self.match(TokenKind.Kw_and):
-            right: Expr = self.parse_equality_expr()
-            expr = BinaryExpr(expr, BinaryOp.And, right)
-
-        return expr
-
-    def parse_equality_expr(self) -> Expr:
-        expr = self.parse_comparison_expr()
-
-        while self.match(TokenKind.Op_EqualEqual, TokenKind.Op_ExclaimEqual):
-            op: BinaryOp = token_to_binaryop(self.previous())
-            right: Expr = self.parse_comparison_expr()
-            expr = BinaryExpr(expr, op, right)
+                raise ParseError("Invalid assignment expression.", self.previous())
 
         return expr
 
-    def parse_comparison_expr(self) -> Expr:
-        expr = self.parse_term_expr()
-
-        while self.match(TokenKind.Op_Less, TokenKind.Op_LessEqual,
-            TokenKind.Op_Greater, TokenKind.Op_GreaterEqual):
-            op: BinaryOp = token_to_binaryop(self.previous())
-            right: Expr = self.parse_term_expr()
-            expr = BinaryExpr(expr, op, right)
-
-        return expr
+    def parse_binary_expr(self, min_power: int) -> Expr:
+        """Precedence climbing over `BINARY_OPS`. Parses operators binding at
+        least as tight as `min_power`.
+        """
+        return self.parse_binary_rest(self.parse_operand_expr(), min_power)
 
-    def parse_term_expr(self) -> Expr:
-        expr = self.parse_factor_expr()
+    def parse_binary_rest(self, expr: Expr, min_power: int) -> Expr:
+        """Continues a binary expression whose leftmost operand `expr` has
+        already been parsed.
+        """
+        binary_ops = BINARY_OPS
+        kind_at = self.kind_at
 
-        while self.match(TokenKind.Op_Plus, TokenKind.Op_Minus):
-            op: BinaryOp = token_to_binaryop(self.previous())
-            right: Expr = self.parse_factor_expr()
-            expr = BinaryExpr(expr, op, right)
+        while True:
+            entry = binary_ops.get(kind_at(self.current))
+            if entry == None or entry[0] < min_power:
+                return expr
 
-        return expr
+            power, op = entry
+            self.current += 1
+            right: Expr = self.parse_operand_expr()
 
-    def parse_factor_expr(self) -> Expr:
-        expr = self.parse_unary_expr()
+            # Only descend when the next operator binds tighter, a plain
+            # operand needs no recursion of its own.
+            next_entry = binary_ops.get(kind_at(self.current))
+            if next_entry != None and next_entry[0] > power:
+                right = self.parse_binary_rest(right, power + 1)
 
-        while self.match(TokenKind.Op_Slash, TokenKind.Op_Star):
-            op: BinaryOp = token_to_binaryop(self.previous())
-            right: Expr = self.parse_unary_expr()
             expr = BinaryExpr(expr, op, right)
 
-        return expr
-
-    def parse_unary_expr(self) -> Expr:
-        if self.match(TokenKind.Op_Minus, TokenKind.Op_Exclaim):
-            op: UnaryOp = token_to_unaryop(self.previous())
-            expr: Expr = self.parse_unary_expr()
-            return UnaryExpr(op, expr)
+    def parse_operand_expr(self) -> Expr:
+        """Prefix operators, calls and primary expressions, dispatched on a
+        single look at the current token.
+        """
+        kind: TokenKind = self.kind_at(self.current)
 
-        return self.parse_call_expr()
+        op: UnaryOp | None = UNARY_OPS.get(kind)
+        if op != None:
+            self.current += 1
+            return UnaryExpr(op, self.parse_operand_expr())
 
-    def parse_call_expr(self) -> Expr:
-        expr = self.parse_primary_expr()
+        expr: Expr
+        if kind == TokenKind.Identifier:
+            self.current += 1
+            expr = VariableExpr(self.tokens[self.current - 1])
+        elif kind == TokenKind.Number:
+            self.current += 1
+            expr = LiteralExpr(self.tokens[self.current - 1].get_literal_data()) # type: ignore
+        elif kind == TokenKind.Op_LParen:
+            self.current += 1
+            expr = GroupExpr(self.parse_expr())
+            self.must_consume(TokenKind.Op_RParen, "Expected ')' after expression.")
+        else:
+            self.report("Expected an expression.")
+            return InvalidExpr()
 
-        # TODO: Check if the parenthesis even has any arguments before
-        #       trying to parse any arguments.
-        while self.match(TokenKind.Op_LParen):
+        while self.kind_at(self.current) == TokenKind.Op_LParen:
+            self.current += 1
             args: list[Expr] = self.parse_call_expr_args()
             self.must_consume(TokenKind.Op_RParen, "Expected ')' after arguments.")
             expr = CallExpr(expr, args)
@@ -200,22 +311,14 @@ class Parser:
 
         return args
 
-    def parse_primary_expr(self) -> Expr:
-        if self.match(TokenKind.Number):
-            return LiteralExpr(self.previous().get_literal_data()) # type: ignore
-
-        if self.match(TokenKind.Op_LParen):
-            expr: Expr = self.parse_expr()
-            self.must_consume(TokenKind.Op_RParen, "Expected ')' after expression.")
-            return GroupExpr(expr)
-
-        if self.match(TokenKind.Identifier):
-            return VariableExpr(self.previous())
-
-        return InvalidExpr()
-
     # ------------------------------ Declarations ------------------------------
-    def parse_decl(self) -> Decl:
+    def parse_decl(self) -> Decl | Stmt:
+        """declaration:
+            let-declaration |
+            func-declaration |
+            class-declaration |
+            statement;
+        """
         if self.match(TokenKind.Kw_let):
             return self.parse_let_decl()
 
@@ -225,7 +328,7 @@ class Parser:
         if self.match(TokenKind.Kw_class):
             return self.parse_class_decl()
 
-        return InvalidDecl()
+        return self.parse_stmt()
 
     def parse_let_decl(self) -> Decl:
         name: Token = self.must_consume(TokenKind.Identifier, "Expected an identifier.")
@@ -245,7 +348,11 @@ class Parser:
         self.must_consume(TokenKind.Op_RParen, "Expected ')' after parameter.")
 
         self.must_consume(TokenKind.Op_LBrace, "Expected a '{' before function body.")
-        body: Stmt = self.parse_block_stmt()
+        if self.lazy:
+            start, end = self.skip_block()
+            return FuncDecl(name, params, None, self.block_loader(start), (start, end))
+
+        body: BlockStmt = self.parse_block_stmt()
 
         return FuncDecl(name, params, body)
 
@@ -265,13 +372,17 @@ class Parser:
         # Inheritance list?
         inheritance_list: list[Token] = []
         if self.check(TokenKind.Op_Colon):
-            self.consume()
+            self.advance()
             inheritance_list = self.parse_inheritance_list()
 
         self.must_consume(TokenKind.Op_LBrace, "Expected '{' before class body.")
+        if self.lazy:
+            start, end = self.skip_block()
+            return ClassDecl(name, inheritance_list, None, self.block_loader(start), (start, end))
+
         block_stmt: BlockStmt = self.parse_block_stmt()
 
-        return ClassDecl(name, inheritance_list)
+        return ClassDecl(name, inheritance_list, block_stmt)
 
     def parse_inheritance_list(self) -> list[Token]:
         inherited: list[Token] = []
@@ -337,30 +448,248 @@ class Parser:
         return WhileStmt(condition, body)
 
     def parse_return_stmt(self) -> ReturnStmt:
-        # TODO: Check if there is an expression
-        expr: Expr = self.parse_expr()
-        return ReturnStmt(expr, None)
+        """return-statement:
+            'return' expression? ('if' expression)?
+        """
+        expr: Expr | None = None
+        if self.kind_at(self.current) in EXPR_START:
+            expr = self.parse_expr()
+
+        cond: Expr | None = None
+        if self.match(TokenKind.Kw_if):
+            cond = self.parse_expr()
+
+        return ReturnStmt(expr, cond)
 
     def parse_block_stmt(self) -> BlockStmt:
         elems: list[ASTNode] = []
 
         while not self.check(TokenKind.Op_RBrace) and not self.is_at_end():
-            decl: ASTNode = self.parse_decl()
-            elems.append(decl)
+            start: int = self.current
+            try:
+                elems.append(self.parse_decl())
+            except ParseError as e:
+                elems.append(self.recover(e, start))
+
+        # Keep the block on a missing '}', only the end of input gets here.
+        if self.is_at_end():
+            self.report("Expected '}' after block.")
+        else:
+            self.advance()
 
-        self.must_consume(TokenKind.Op_RBrace, "Expected '}' after block.")
         return BlockStmt(elems)
 
+    def skip_block(self) -> tuple[int, int]:
+        """Skips the rest of a block whose '{' was just consumed by matching
+        braces, without parsing it. Returns the token range from the first
+        token of the block up to its '}', or the end of input.
+        """
+        start: int = self.current
+        depth: int = 1
+
+        if isinstance(self.tokens, TokenBuffer):
+            # Jump from brace to brace in the packed kinds.
+            if self.kind_bytes == None:
+                self.kind_bytes = self.tokens.kinds.tobytes()
+            lbrace: int = TokenKind.Op_LBrace.value
+            end: int = len(self.tokens) - 1
+            for m in BRACE_KINDS.finditer(self.kind_bytes, start, end):
+                depth += 1 if self.kind_bytes[m.start()] == lbrace else -1
+                if depth == 0:
+                    end = m.start()
+                    break
+            self.current = end
+        else:
+            while not self.is_at_end():
+                kind: TokenKind = self.kind_at(self.current)
+                if kind == TokenKind.Op_LBrace:
+                    depth += 1
+                elif kind == TokenKind.Op_RBrace:
+                    depth -= 1
+                    if depth == 0:
+                        break
+                self.current += 1
+
+        end = self.current
+        self.advance()
+        return start, end
+
+    def block_loader(self, start: int) -> Callable[[], BlockStmt]:
+        """Returns a function that parses the block starting at token
+        `start`, recording its errors in this parser.
+        """
+        def load() -> BlockStmt:
+            parser: Parser = type(self)(self.tokens, self.lazy) # type: ignore
+            parser.kind_bytes = self.kind_bytes
+            parser.current = start
+            # Share the list, so do bodies nested in this one. A body that
+            # runs to the end of input reports the missing '}' at the same
+            # token as the block it is nested in, which reported it already.
+            parser.errors = self.errors
+            parser.error_index = self.error_index
+            return parser.parse_block_stmt()
+        return load
+
     def parse_expr_stmt(self):
+        # Bail out instead of looping on a token no expression can start with.
+        if self.kind_at(self.current) not in EXPR_START:
+            raise ParseError("Expected an expression.", self.peek())
+
         expr = self.parse_expr()
         return ExprStmt(expr)
 
-    def parse(self):
-        stmts: list[Decl] = []
-        while not self.is_at_end():
-            stmts.append(self.parse_decl())
+    def parse(self) -> ParserResult[list[Decl | Stmt]]:
+        """Parses the whole program.
 
+        Errors do not stop the parse: each one is recorded, the broken
+        declaration is replaced by an `InvalidDecl` and parsing resumes at
+        the next declaration or statement boundary.
+        """
+        decls: list[Decl | Stmt] = []
+        spans: list[tuple[int, int]] = []
+        error_ranges: list[tuple[int, int]] = []
+        while not self.is_at_end():
+            self.parse_top_decl(decls, spans, error_ranges)
+
+        return ParserResult(decls, self.errors, spans, error_ranges)
+
+    def parse_top_decl(
+        self,
+        decls: list[Decl | Stmt],
+        spans: list[tuple[int, int]],
+        error_ranges: list[tuple[int, int]]
+    ) -> None:
+        """Parses one top-level declaration, appending it to `decls`, its
+        source offsets to `spans` and the range of `errors` it recorded to
+        `error_ranges`.
+        """
+        start: int = self.current
+        offset: int = self.peek().start
+        first_error: int = len(self.errors)
         try:
-            return self.parse_expr()
-        except Exception as e:
-            print(f"Error: {str(e)}")
+            decls.append(self.parse_decl())
+        except ParseError as e:
+            decls.append(self.recover(e, start))
+        spans.append((offset, self.previous().end))
+        error_ranges.append((first_error, len(self.errors)))
+
+    @classmethod
+    def reparse(
+        cls,
+        previous_tree: ParserResult[list[Decl | Stmt]],
+        previous_source: str,
+        new_source: str,
+        interner: Interner | None = None
+    ) -> ParserResult[list[Decl | Stmt]]:
+        """Parses `new_source` after an edit of `previous_source`, reusing
+        the top-level declarations of `previous_tree` the edit did not touch.
+
+        The declaration before the edit is always parsed again, since the
+        grammar has no terminators and a declaration ends where the next
+        token cannot continue it. Parsing starts there and goes on until it
+        stops exactly at the start of an old declaration behind the edit,
+        from there on the old nodes are reused as they are. Edits that
+        change how later declarations split, like removing a '}', simply
+        parse further.
+
+        Reused nodes are the same objects as in `previous_tree` and their
+        tokens keep the offsets of `previous_source`. The `spans`, `errors`
+        and `error_ranges` of the result are moved to `new_source`, as a
+        full parse would report them. Errors are kept, dropped or moved with
+        the declaration that recorded them. An old declaration is not reused
+        when the declaration before it, old or new, may have recorded an
+        error at its first token, as the parser records one error per token
+        and the errors of the old declaration depend on that.
+
+        Args:
+            previous_tree: Result of `parse` or `reparse` for `previous_source`.
+            previous_source: The source `previous_tree` was parsed from.
+            new_source: The edited source.
+            interner: Interner used for `previous_tree`, if any.
+        """
+        decls: list[Decl | Stmt] = previous_tree.data # type: ignore
+        spans: list[tuple[int, int]] = previous_tree.spans
+        old_errors: list[ParseError] = previous_tree.errors
+        old_ranges: list[tuple[int, int]] = previous_tree.error_ranges
+
+        prefix: int = common_prefix(previous_source, new_source)
+        suffix: int = common_suffix(previous_source, new_source,
+            min(len(previous_source), len(new_source)) - prefix)
+        edit_end: int = len(previous_source) - suffix
+        delta: int = len(new_source) - len(previous_source)
+
+        # Keep everything up to the declaration before the first one that
+        # reaches into the edit.
+        first: int = max(bisect_left(spans, prefix, key=lambda span: span[1]) - 1, 0)
+        # Start behind a declaration without errors, see above.
+        while first > 0 and old_ranges[first - 1][0] != old_ranges[first - 1][1]:
+            first -= 1
+        # Candidates for reuse start behind the edit, a token starting right
+        # at its end could still be glued to the inserted text.
+        after: int = bisect_right(spans, edit_end, key=lambda span: span[0])
+
+        start: int = spans[first][0] if first < len(spans) else 0
+        lexer = Lexer(new_source, interner=interner)
+        lexer.current = start
+        parser = cls(lexer.iter_tokens())
+        # The errors of the kept declarations come first, so the ranges the
+        # parser records index the same list.
+        parser.errors = old_errors[:old_ranges[first][0] if first < len(old_ranges) else 0]
+        errors: list[ParseError] = parser.errors
+
+        new_decls: list[Decl | Stmt] = decls[:first]
+        new_spans: list[tuple[int, int]] = spans[:first]
+        new_ranges: list[tuple[int, int]] = old_ranges[:first]
+
+        while not parser.is_at_end():
+            offset: int = parser.peek().start
+            while after < len(spans) and spans[after][0] + delta < offset:
+                after += 1
+            if after < len(spans) and spans[after][0] + delta == offset \
+                    and parser.error_index != parser.current \
+                    and (after == 0 or old_ranges[after - 1][0] == old_ranges[after - 1][1]):
+                break
+            parser.parse_top_decl(new_decls, new_spans, new_ranges)
+        else:
+            after = len(spans)
+
+        if after < len(spans):
+            reused: int = old_ranges[after][0]
+            shift: int = len(errors) - reused
+            errors.extend(ParseError(e.message, e.token.moved(delta))
+                          for e in old_errors[reused:])
+            new_decls.extend(decls[after:])
+            new_spans.extend((s + delta, e + delta) for s, e in spans[after:])
+            new_ranges.extend((f + shift, e + shift) for f, e in old_ranges[after:])
+
+        return ParserResult(new_decls, errors, new_spans, new_ranges)
+
+
+# Block size `common_prefix` and `common_suffix` compare at once, slices are
+# compared in C so only the block holding the first difference is walked in
+# Python.
+COMPARE_BLOCK = 1024
+
+def common_prefix(a: str, b: str) -> int:
+    """Returns the length of the common prefix of `a` and `b`."""
+    limit: int = min(len(a), len(b))
+    pos: int = 0
+    while pos + COMPARE_BLOCK <= limit and a[pos:pos + COMPARE_BLOCK] == b[pos:pos + COMPARE_BLOCK]:
+        pos += COMPARE_BLOCK
+    while pos < limit and a[pos] == b[pos]:
+        pos += 1
+    return pos
+
+def common_suffix(a: str, b: str, limit: int) -> int:
+    """Returns the length of the common suffix of `a` and `b`, at most
+    `limit`.
+    """
+    end_a: int = len(a)
+    end_b: int = len(b)
+    n: int = 0
+    while n + COMPARE_BLOCK <= limit and \
+            a[end_a - n - COMPARE_BLOCK:end_a - n] == b[end_b - n - COMPARE_BLOCK:end_b - n]:
+        n += COMPARE_BLOCK
+    while n < limit and a[end_a - n - 1] == b[end_b - n - 1]:
+        n += 1
+    return n
@@ -1,13 +1,34 @@
 from typing import Generic, Optional, TypeVar
 
+from parser.parseerror import ParseError
+
 
 T = TypeVar("T")
 
 class ParserResult(Generic[T]):
-    """Wrapper around statments, expressions and declarations with
-    an additional `iserror` value which stores if there is an error
-    in the parse tree.
+    """Wrapper around statments, expressions and declarations with the
+    `errors` found in them, and `iserror` telling if there are any.
+
+    Errors of lazily parsed bodies are added to `errors` when the bodies are
+    parsed, `iserror` follows them.
+
+    Results of `Parser.parse` also carry the `spans` of the top-level
+    declarations, the (start, end) source offsets of each entry of `data`,
+    and their `error_ranges`, the (first, end) indices into `errors` of the
+    errors recorded while parsing each entry.
     """
-    def __init__(self, iserror: bool, data: Optional[T]) -> None:
+    def __init__(
+        self,
+        data: Optional[T],
+        errors: Optional[list[ParseError]] = None,
+        spans: Optional[list[tuple[int, int]]] = None,
+        error_ranges: Optional[list[tuple[int, int]]] = None
+    ) -> None:
         self.data = data
-        self.iserror = iserror
+        self.errors: list[ParseError] = errors if errors != None else []
+        self.spans: list[tuple[int, int]] = spans if spans != None else []
+        self.error_ranges: list[tuple[int, int]] = error_ranges if error_ranges != None else []
+
+    @property
+    def iserror(self) -> bool:
+        return len(self.errors) > 0
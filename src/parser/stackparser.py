@@ -0,0 +1,318 @@
+"""Contains a parser that does not recurse."""
+
+from __future__ import annotations
+from typing import Any
+
+from asttypes.astnode import ASTNode
+from asttypes.expr import (
+    AssignExpr,
+    BinaryExpr,
+    CallExpr,
+    Expr,
+    GroupExpr,
+    InvalidExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr
+)
+from asttypes.stmt import (
+    BlockStmt,
+    IfStmt,
+    Stmt,
+    WhileStmt
+)
+from asttypes.decl import (
+    ClassDecl,
+    Decl,
+    FuncDecl
+)
+
+from core.tokenkind import TokenKind
+
+from parser.parseerror import ParseError
+from parser.parser import BINARY_OPS, UNARY_OPS, Parser
+
+
+# Entries of the expression operator stack, see `StackParser.parse_expr`.
+OP_BINARY   = 0     # (OP_BINARY, power, op)
+OP_UNARY    = 1     # (OP_UNARY, op)
+OP_ASSIGN   = 2     # (OP_ASSIGN, target)
+OP_GROUP    = 3     # (OP_GROUP,)
+OP_CALL     = 4     # (OP_CALL, callee, args)
+
+# Frames of the statement work stack, see `StackParser.parse_decl`.
+FRAME_BLOCK = 0     # [FRAME_BLOCK, elems, start of the current elem]
+FRAME_IF    = 1     # [FRAME_IF, cond]
+FRAME_ELSE  = 2     # [FRAME_ELSE, cond, thenbranch]
+FRAME_WHILE = 3     # [FRAME_WHILE, cond]
+FRAME_FUNC  = 4     # [FRAME_FUNC, name, params]
+FRAME_CLASS = 5     # [FRAME_CLASS, name, inherited]
+
+
+class StackParser(Parser):
+    """Parser that keeps its own work stacks instead of recursing.
+
+    Builds the same tree as `Parser` and raises the same errors, but nesting
+    depth of blocks, statements, groups, calls and prefix operators is only
+    limited by memory rather than by the Python recursion limit.
+
+    Expressions are parsed by operator precedence with explicit operand and
+    operator stacks; statements and declarations by a stack of frames, one
+    per construct that is still waiting for a child.
+    """
+
+    # ------------------------------ Expressions ------------------------------
+    def parse_expr(self) -> Expr:
+        kind_at = self.kind_at
+        binary_ops = BINARY_OPS
+        unary_ops = UNARY_OPS
+
+        operands: list[Expr] = []
+        ops: list[tuple[Any, ...]] = []
+
+        while True:
+            # Expecting an operand: any number of prefix operators and open
+            # groups followed by a literal or a variable.
+            kind: TokenKind = kind_at(self.current)
+            while True:
+                unary = unary_ops.get(kind)
+                if unary != None:
+                    ops.append((OP_UNARY, unary))
+                elif kind == TokenKind.Op_LParen:
+                    ops.append((OP_GROUP,))
+                else:
+                    break
+                self.current += 1
+                kind = kind_at(self.current)
+
+            if kind == TokenKind.Identifier:
+                self.current += 1
+                operands.append(VariableExpr(self.tokens[self.current - 1]))
+            elif kind == TokenKind.Number:
+                self.current += 1
+                operands.append(LiteralExpr(self.tokens[self.current - 1].get_literal_data())) # type: ignore
+            else:
+                self.report("Expected an expression.")
+                operands.append(InvalidExpr())
+
+            # After an operand: calls, binary operators, assignment or the
+            # end of a group, argument or the whole expression.
+            while True:
+                kind = kind_at(self.current)
+
+                if kind == TokenKind.Op_LParen:
+                    self.current += 1
+                    if kind_at(self.current) == TokenKind.Op_RParen:
+                        self.current += 1
+                        operands.append(CallExpr(operands.pop(), []))
+                        continue
+                    ops.append((OP_CALL, operands.pop(), []))
+                    break
+
+                entry = binary_ops.get(kind)
+                if entry != None:
+                    self.reduce(operands, ops, entry[0])
+                    self.current += 1
+                    ops.append((OP_BINARY, entry[0], entry[1]))
+                    break
+
+                if kind == TokenKind.Op_Equal:
+                    self.reduce(operands, ops, 0)
+                    self.current += 1
+                    ops.append((OP_ASSIGN, operands.pop()))
+                    break
+
+                self.reduce_assign(operands, ops)
+                top = ops[-1] if ops else None
+
+                if kind == TokenKind.Op_Comma and top != None and top[0] == OP_CALL:
+                    self.current += 1
+                    top[2].append(operands.pop())
+                    break
+
+                if top == None:
+                    return operands.pop()
+
+                if top[0] == OP_GROUP:
+                    self.must_consume(TokenKind.Op_RParen, "Expected ')' after expression.")
+                    ops.pop()
+                    operands.append(GroupExpr(operands.pop()))
+                else:
+                    self.must_consume(TokenKind.Op_RParen, "Expected ')' after arguments.")
+                    ops.pop()
+                    top[2].append(operands.pop())
+                    operands.append(CallExpr(top[1], top[2]))
+
+    def reduce(self, operands: list[Expr], ops: list[tuple[Any, ...]], power: int) -> None:
+        """Applies stacked prefix operators and binary operators binding at
+        least as tight as `power`, down to the innermost group, call or
+        assignment.
+        """
+        while ops:
+            top = ops[-1]
+            if top[0] == OP_UNARY:
+                ops.pop()
+                operands.append(UnaryExpr(top[1], operands.pop()))
+            elif top[0] == OP_BINARY and top[1] >= power:
+                ops.pop()
+                right: Expr = operands.pop()
+                operands.append(BinaryExpr(operands.pop(), top[2], right))
+            else:
+                return
+
+    def reduce_assign(self, operands: list[Expr], ops: list[tuple[Any, ...]]) -> None:
+        """Closes the innermost expression, including pending assignments,
+        down to the innermost group or call.
+        """
+        while True:
+            self.reduce(operands, ops, 0)
+            if not ops or ops[-1][0] != OP_ASSIGN:
+                return
+
+            target: Expr = ops.pop()[1]
+            value: Expr = operands.pop()
+
+            # Check if the left hand expression is a valid l-value
+            # i.e., left hand should be a variable expression
+            if isinstance(target, VariableExpr):
+                operands.append(AssignExpr(target.name, value))
+            else:
+                raise ParseError("Invalid assignment expression.", self.previous())
+
+    # ------------------------------ Declarations ------------------------------
+    def parse_decl(self) -> Decl | Stmt:
+        return self.parse_nested(True)
+
+    def parse_stmt(self) -> Stmt:
+        return self.parse_nested(False) # type: ignore
+
+    def parse_nested(self, allow_decl: bool) -> Decl | Stmt:
+        """Parses one declaration, or statement if `allow_decl` is false,
+        together with everything nested in it.
+        """
+        stack: list[list[Any]] = []
+
+        while True:
+            node: ASTNode | None
+            top = stack[-1] if stack else None
+
+            if top != None and top[0] == FRAME_BLOCK and (
+                self.check(TokenKind.Op_RBrace) or self.is_at_end()):
+                # Keep the block on a missing '}', only the end of input
+                # gets here.
+                if self.is_at_end():
+                    self.report("Expected '}' after block.")
+                else:
+                    self.advance()
+                stack.pop()
+                node = BlockStmt(top[1])
+            else:
+                try:
+                    # Blocks hold declarations, other statements only hold
+                    # statements.
+                    if top == None:
+                        node = self.begin(stack, allow_decl)
+                    elif top[0] == FRAME_BLOCK:
+                        top[2] = self.current
+                        node = self.begin(stack, True)
+                    else:
+                        node = self.begin(stack, False)
+                except ParseError as e:
+                    # Recover in the innermost block like `Parser` does,
+                    # dropping the frames of whatever was nested in it.
+                    while stack and stack[-1][0] != FRAME_BLOCK:
+                        stack.pop()
+                    if not stack:
+                        raise
+                    node = self.recover(e, stack[-1][2])
+
+                if node == None:
+                    continue
+
+            # Hand the finished node to the frames waiting for it.
+            while stack:
+                top = stack[-1]
+                frame: int = top[0]
+
+                if frame == FRAME_BLOCK:
+                    top[1].append(node)
+                    break
+                elif frame == FRAME_IF:
+                    if self.match(TokenKind.Kw_else):
+                        stack[-1] = [FRAME_ELSE, top[1], node]
+                        break
+                    stack.pop()
+                    node = IfStmt(top[1], node, None) # type: ignore
+                elif frame == FRAME_ELSE:
+                    stack.pop()
+                    node = IfStmt(top[1], top[2], node) # type: ignore
+                elif frame == FRAME_WHILE:
+                    stack.pop()
+                    node = WhileStmt(top[1], node) # type: ignore
+                elif frame == FRAME_FUNC:
+                    stack.pop()
+                    node = FuncDecl(top[1], top[2], node) # type: ignore
+                else:
+                    stack.pop()
+                    node = ClassDecl(top[1], top[2], node) # type: ignore
+            else:
+                return node # type: ignore
+
+    def begin(self, stack: list[list[Any]], allow_decl: bool) -> ASTNode | None:
+        """Starts parsing a declaration or statement. Returns the node when it
+        has no nested statements, otherwise pushes frames for it and returns
+        `None`.
+        """
+        if allow_decl:
+            if self.match(TokenKind.Kw_let):
+                return self.parse_let_decl()
+
+            if self.match(TokenKind.Kw_func):
+                name = self.must_consume(TokenKind.Identifier, "Expected an identifier.")
+                self.must_consume(TokenKind.Op_LParen, "Expected '(' after function name.")
+                params = self.parse_func_parameters()
+                self.must_consume(TokenKind.Op_RParen, "Expected ')' after parameter.")
+                self.must_consume(TokenKind.Op_LBrace, "Expected a '{' before function body.")
+                if self.lazy:
+                    start, end = self.skip_block()
+                    return FuncDecl(name, params, None, self.block_loader(start), (start, end))
+                stack.append([FRAME_FUNC, name, params])
+                stack.append([FRAME_BLOCK, [], -1])
+                return None
+
+            if self.match(TokenKind.Kw_class):
+                name = self.must_consume(TokenKind.Identifier, "Expected an identifier as class name.")
+                inherited = []
+                if self.check(TokenKind.Op_Colon):
+                    self.advance()
+                    inherited = self.parse_inheritance_list()
+                self.must_consume(TokenKind.Op_LBrace, "Expected '{' before class body.")
+                if self.lazy:
+                    start, end = self.skip_block()
+                    return ClassDecl(name, inherited, None, self.block_loader(start), (start, end))
+                stack.append([FRAME_CLASS, name, inherited])
+                stack.append([FRAME_BLOCK, [], -1])
+                return None
+
+        if self.match(TokenKind.Op_LBrace):
+            stack.append([FRAME_BLOCK, [], -1])
+            return None
+
+        if self.match(TokenKind.Kw_if):
+            self.must_consume(TokenKind.Op_LParen, "Expected '(' after 'if'.")
+            cond: Expr = self.parse_expr()
+            self.must_consume(TokenKind.Op_RParen, "Expected ')' after if condition.")
+            stack.append([FRAME_IF, cond])
+            return None
+
+        if self.match(TokenKind.Kw_while):
+            self.must_consume(TokenKind.Op_LParen, "Expected '(' after 'while'.")
+            cond: Expr = self.parse_expr()
+            self.must_consume(TokenKind.Op_RParen, "Expected ')' after while condition.")
+            stack.append([FRAME_WHILE, cond])
+            return None
+
+        if self.match(TokenKind.Kw_return):
+            return self.parse_return_stmt()
+
+        return self.parse_expr_stmt()
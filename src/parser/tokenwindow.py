@@ -0,0 +1,46 @@
+from collections import deque
+from typing import Iterable
+
+from lexer.token import Token
+
+
+# Default number of tokens kept by a `TokenWindow`. The parser only ever
+# looks at the current and the previously consumed token.
+LOOKAHEAD = 4
+
+
+class TokenWindow:
+    """Bounded view over a token iterator that can be indexed like the token
+    list the parser normally works on.
+
+    Tokens are pulled from the iterator on demand and only the last `size`
+    of them are kept, so memory stays constant no matter how long the input
+    is. Indexing a token that already fell out of the window raises an
+    `IndexError`. Indexing past the end of the stream returns the final
+    token, which is the lexer's `End` token.
+    """
+
+    def __init__(self, tokens: Iterable[Token], size: int = LOOKAHEAD) -> None:
+        self.tokens = iter(tokens)
+        self.window: deque[Token] = deque()
+        self.base: int = 0
+        self.size = size
+
+    def __getitem__(self, index: int) -> Token:
+        offset: int = index - self.base
+        if offset < 0:
+            raise IndexError("Token is no longer buffered.")
+
+        window = self.window
+        while offset >= len(window):
+            tok: Token | None = next(self.tokens, None)
+            if tok is None:
+                return window[-1]
+
+            window.append(tok)
+            if len(window) > self.size:
+                window.popleft()
+                self.base += 1
+                offset -= 1
+
+        return window[offset]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+
+from backend.codecache import CodeCache
+from backend.compileerror import CompileError
+from backend.evalerror import EvalError
+from backend.transpiler import compile_source, run
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Run an .ar program, lowered to Python code objects.")
+    argparser.add_argument('path', help="program to run")
+    argparser.add_argument('--cache-dir', default=os.environ.get('ARCACHE', '.arcache'),
+                           help="directory of the code cache (default: $ARCACHE or .arcache)")
+    argparser.add_argument('--no-cache', action='store_true',
+                           help="always lower, neither read nor write the cache")
+    args = argparser.parse_args()
+
+    try:
+        with open(args.path, 'rb') as file:
+            data: bytes = file.read()
+    except OSError as e:
+        print(f"Failed to open {args.path}: {e}!")
+        sys.exit(1)
+
+    try:
+        if args.no_cache:
+            code = compile_source(data)
+        else:
+            code = CodeCache(args.cache_dir).compile(data)
+    except CompileError as e:
+        for error in e.errors:
+            where = f"{args.path}:{error.offset}" if error.offset >= 0 else args.path
+            print(f"{where}: error: {error.message}")
+        sys.exit(1)
+
+    try:
+        run(code)
+    except EvalError as e:
+        print(f"{args.path}: runtime error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from asttypes.astnode import ASTNode
+from sema.semaerror import SemaError
+
+
+class Resolution:
+    """Side tables produced by `Resolver`.
+
+    Scopes are numbered outward from the innermost scope at a use, so
+    `(depth, slot)` reaches a variable by following `depth` enclosing
+    frames, then indexing with `slot`. The frames of a function are its
+    parameter scope and its blocks, enclosed by the global frame. Tables
+    are keyed by the nodes themselves.
+
+    Attributes:
+        addresses: (depth, slot) of every `VariableExpr` and `AssignExpr`
+            that reads or writes a variable.
+        slots: Slot of every `LetDecl`, `FuncDecl`, `ClassDecl` and
+            parameter in its own scope.
+        frame_sizes: Number of slots of the scope opened by each
+            `BlockStmt`, and of the parameter scope of each `FuncDecl`.
+            The global scope is under None.
+        global_names: Names of the global slots, in slot order.
+        errors: Undefined and duplicate names.
+    """
+
+    def __init__(self) -> None:
+        self.addresses: dict[ASTNode, tuple[int, int]] = {}
+        self.slots: dict[ASTNode, int] = {}
+        self.frame_sizes: dict[Optional[ASTNode], int] = {}
+        self.global_names: list[str] = []
+        self.errors: list[SemaError] = []
+
+    @property
+    def iserror(self) -> bool:
+        return len(self.errors) > 0
@@ -0,0 +1,144 @@
+"""Resolution of variable uses to lexical addresses."""
+
+from __future__ import annotations
+from typing import Iterable, Optional
+
+from asttypes.astnode import ASTNode
+from asttypes.decl import ClassDecl, FuncDecl, LetDecl
+from asttypes.expr import AssignExpr, VariableExpr
+from asttypes.stmt import BlockStmt
+from asttypes.walker import walk
+from lexer.token import Token
+from sema.resolution import Resolution
+from sema.scope import Scope
+from sema.semaerror import SemaError
+
+
+BUILTINS = ('print',)
+
+
+class Resolver:
+    """Resolves every variable use to a (depth, slot) address, see
+    `Resolution`.
+
+    Follows the scoping of `Evaluator`: blocks open scopes, a `let` is
+    visible after its initializer, a function after its name, including in
+    its own body. Functions see their own scopes and the globals but not
+    the locals of the code around them. Uses in functions may refer to
+    globals declared later, top-level code may not.
+
+    Walks the trees once without recursing.
+
+    Args:
+        builtins: Names predeclared in the global scope, in slot order.
+    """
+
+    def __init__(self, builtins: Iterable[str] = BUILTINS) -> None:
+        self.builtins = list(builtins)
+
+    def resolve(self, decls: Iterable[ASTNode]) -> Resolution:
+        self.result = Resolution()
+        self.globals = Scope(None, None)
+        self.scopes: list[Scope] = [self.globals]
+        # Innermost function being resolved.
+        self.function: Optional[FuncDecl] = None
+        # Parameters, which are declared rather than resolved as uses.
+        self.params: set[int] = set()
+        # Uses in functions of names not declared yet, with their depth
+        # to the global scope.
+        self.pending: list[tuple[ASTNode, Token, int]] = []
+
+        for name in self.builtins:
+            self.globals.declare(name)
+        walk(decls, self.enter, self.leave)
+
+        for node, token, depth in self.pending:
+            slot = self.globals.slots.get(token.get_identifier_data()) # type: ignore
+            if slot == None:
+                self.undefined(token)
+            else:
+                self.result.addresses[node] = (depth, slot)
+        self.result.frame_sizes[None] = len(self.globals.slots)
+        self.result.global_names = list(self.globals.slots)
+        return self.result
+
+    def enter(self, node: ASTNode) -> None:
+        kind = type(node)
+        if kind is VariableExpr:
+            if id(node) not in self.params:
+                self.resolve_use(node, node.name) # type: ignore
+        elif kind is AssignExpr:
+            self.resolve_use(node, node.name) # type: ignore
+        elif kind is BlockStmt:
+            self.scopes.append(Scope(node, self.function))
+        elif kind is FuncDecl:
+            self.declare(node, node.name) # type: ignore
+            self.function = node # type: ignore
+            scope = Scope(node, node)
+            self.scopes.append(scope)
+            for param in node.params: # type: ignore
+                # The parser takes any expression as a parameter.
+                if type(param) is not VariableExpr:
+                    self.result.errors.append(SemaError("Expected a parameter name.", node.name)) # type: ignore
+                    continue
+                self.params.add(id(param))
+                self.declare(param, param.name)
+        elif kind is ClassDecl:
+            self.declare(node, node.name) # type: ignore
+
+    def leave(self, node: ASTNode) -> None:
+        kind = type(node)
+        if kind is LetDecl:
+            self.declare(node, node.name) # type: ignore
+        elif kind is BlockStmt:
+            scope = self.scopes.pop()
+            self.result.frame_sizes[node] = len(scope.slots)
+        elif kind is FuncDecl:
+            scope = self.scopes.pop()
+            self.result.frame_sizes[node] = len(scope.slots)
+            for param in node.params: # type: ignore
+                self.params.discard(id(param))
+            self.function = self.scopes[-1].function # type: ignore
+
+    def declare(self, node: ASTNode, token: Token) -> None:
+        scope = self.scopes[-1]
+        name: str = token.get_identifier_data() # type: ignore
+        slot = scope.declare(name)
+        if slot == None:
+            self.result.errors.append(SemaError(f"'{name}' is already declared in this scope.", token))
+            slot = scope.slots[name]
+        self.result.slots[node] = slot
+
+    def resolve_use(self, node: ASTNode, token: Token) -> None:
+        name: str = token.get_identifier_data() # type: ignore
+        function = self.function
+        scopes = self.scopes
+        depth = 0
+        index = len(scopes) - 1
+        while index > 0 and scopes[index].function is function:
+            slot = scopes[index].slots.get(name)
+            if slot != None:
+                self.result.addresses[node] = (depth, slot)
+                return
+            depth += 1
+            index -= 1
+
+        # Names of the code around a function are out of its reach.
+        if function != None:
+            for scope in scopes[1:index + 1]:
+                if name in scope.slots:
+                    self.result.errors.append(SemaError(
+                        f"'{name}' belongs to an enclosing scope and cannot be used in a function.",
+                        token))
+                    return
+
+        slot = self.globals.slots.get(name)
+        if slot != None:
+            self.result.addresses[node] = (depth, slot)
+        elif function != None:
+            self.pending.append((node, token, depth))
+        else:
+            self.undefined(token)
+
+    def undefined(self, token: Token) -> None:
+        self.result.errors.append(SemaError(f"Undefined variable '{token.get_identifier_data()}'.", token))
@@ -0,0 +1,32 @@
+from __future__ import annotations
+from typing import Optional
+
+from asttypes.astnode import ASTNode
+
+
+class Scope:
+    """Names declared in one lexical scope, each with its slot.
+
+    Args:
+        node: Node that opens the scope, a `BlockStmt` or, for the
+            parameters, a `FuncDecl`. None for the global scope.
+        function: Innermost function the scope belongs to, None outside of
+            functions.
+    """
+
+    __slots__ = ('node', 'function', 'slots')
+
+    def __init__(self, node: Optional[ASTNode], function: Optional[ASTNode]) -> None:
+        self.node = node
+        self.function = function
+        self.slots: dict[str, int] = {}
+
+    def declare(self, name: str) -> Optional[int]:
+        """Gives `name` the next slot. Returns None if it is already
+        declared in this scope.
+        """
+        if name in self.slots:
+            return None
+        slot = len(self.slots)
+        self.slots[name] = slot
+        return slot
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from lexer.token import Token
+
+
+class SemaError(Exception):
+    """An error found by a semantic pass, e.g. an undefined name."""
+
+    def __init__(self, message: str, token: Optional[Token]) -> None:
+        super().__init__(message, token)
+        self.message = message
+        self.token = token
+
+    @property
+    def offset(self) -> int:
+        """Offset of the offending token in the source, -1 if unknown."""
+        return self.token.start if self.token != None else -1
+
+    def __str__(self) -> str:
+        return self.message